@@ -0,0 +1,312 @@
+"""
+Read-only access to mongodump `.bson` files over an mmap.
+
+A dump file is a plain concatenation of BSON documents, each prefixed by its
+int32 length, so document boundaries can be found without decoding anything.
+Decoding is pure Python and only touches the top-level fields that are asked
+for; the others are skipped by their encoded size.
+
+    bson_file = BsonFile("query_dataset/yelp_business/business.bson")
+    len(bson_file)                                         # number of documents
+    for doc in bson_file.iter_documents(["business_id", "attributes"]):
+        ...
+    bson_file.doc_at(42)                                   # one document by position
+    table = bson_file.to_arrow(["business_id", "description", "attributes"])
+
+Document offsets are persisted next to the dataset cache (keyed by file size
+and mtime), so reopening a dump does not walk it again. The columnar scan
+decodes each projected field straight into a per-column list, without building
+per-document dicts, and returns Arrow or NumPy columns; nested values (e.g.
+`attributes`) become JSON text, like in dataset_cache.
+
+ObjectIds come back as bson.ObjectId when pymongo is installed, else as hex strings.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+
+from dataset_cache import CACHE_DIR
+
+try:
+    from bson import ObjectId
+except ImportError:  # pymongo is optional here
+    def ObjectId(raw):
+        return raw.hex()
+
+
+_INT32 = struct.Struct("<i")
+_INT64 = struct.Struct("<q")
+_UINT64 = struct.Struct("<Q")
+_DOUBLE = struct.Struct("<d")
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# element types with a fixed encoded size
+FIXED_SIZES = {
+    0x01: 8,    # double
+    0x07: 12,   # ObjectId
+    0x08: 1,    # bool
+    0x09: 8,    # UTC datetime
+    0x0A: 0,    # null
+    0x06: 0,    # undefined
+    0x10: 4,    # int32
+    0x11: 8,    # timestamp
+    0x12: 8,    # int64
+    0x13: 16,   # decimal128
+    0x7F: 0,    # max key
+    0xFF: 0,    # min key
+}
+
+
+class BsonError(ValueError):
+    pass
+
+
+def _cstring_end(buf, pos):
+    end = buf.find(b"\x00", pos)
+    if end < 0:
+        raise BsonError(f"unterminated cstring at {pos}")
+    return end
+
+
+def element_size(buf, kind, pos):
+    """Encoded size of the value of type `kind` starting at `pos`"""
+    size = FIXED_SIZES.get(kind)
+    if size is not None:
+        return size
+    if kind in (0x02, 0x0D, 0x0E):                      # string, JS code, symbol
+        return 4 + _INT32.unpack_from(buf, pos)[0]
+    if kind in (0x03, 0x04, 0x0F):                      # document, array, code with scope
+        return _INT32.unpack_from(buf, pos)[0]
+    if kind == 0x05:                                    # binary
+        return 5 + _INT32.unpack_from(buf, pos)[0]
+    if kind == 0x0B:                                    # regex: two cstrings
+        end = _cstring_end(buf, _cstring_end(buf, pos) + 1)
+        return end + 1 - pos
+    if kind == 0x0C:                                    # DBPointer
+        return 4 + _INT32.unpack_from(buf, pos)[0] + 12
+    raise BsonError(f"unknown element type 0x{kind:02x} at {pos}")
+
+
+def decode_value(buf, kind, pos):
+    """Decode one value of type `kind` starting at `pos`"""
+    if kind == 0x02 or kind in (0x0D, 0x0E):
+        length = _INT32.unpack_from(buf, pos)[0]
+        return bytes(buf[pos + 4:pos + 3 + length]).decode("utf-8")
+    if kind == 0x03:
+        return decode_document(buf, pos)
+    if kind == 0x04:
+        return list(decode_document(buf, pos).values())
+    if kind == 0x10:
+        return _INT32.unpack_from(buf, pos)[0]
+    if kind == 0x12:
+        return _INT64.unpack_from(buf, pos)[0]
+    if kind == 0x01:
+        return _DOUBLE.unpack_from(buf, pos)[0]
+    if kind == 0x08:
+        return buf[pos] != 0
+    if kind in (0x0A, 0x06, 0x7F, 0xFF):
+        return None
+    if kind == 0x07:
+        return ObjectId(bytes(buf[pos:pos + 12]))
+    if kind == 0x09:
+        return _EPOCH + timedelta(milliseconds=_INT64.unpack_from(buf, pos)[0])
+    if kind == 0x11:
+        return _UINT64.unpack_from(buf, pos)[0]
+    if kind == 0x05:
+        length = _INT32.unpack_from(buf, pos)[0]
+        return bytes(buf[pos + 5:pos + 5 + length])
+    # regex, decimal128, DBPointer, code with scope: keep the raw bytes
+    return bytes(buf[pos:pos + element_size(buf, kind, pos)])
+
+
+def decode_document(buf, offset=0, fields=None):
+    """
+    Decode the document at `offset` into a dict. With `fields`, only those
+    top-level fields are decoded; everything else is skipped unread.
+    """
+    end = offset + _INT32.unpack_from(buf, offset)[0] - 1
+    pos = offset + 4
+    doc = {}
+    remaining = len(fields) if fields is not None else -1
+    while pos < end and remaining:
+        kind = buf[pos]
+        name_end = _cstring_end(buf, pos + 1)
+        name = bytes(buf[pos + 1:name_end]).decode("utf-8")
+        pos = name_end + 1
+        if fields is None or name in fields:
+            doc[name] = decode_value(buf, kind, pos)
+            remaining -= 1
+        pos += element_size(buf, kind, pos)
+    return doc
+
+
+def document_offsets(buf):
+    """Start offset of every document in a concatenated BSON buffer"""
+    offsets = []
+    pos, size = 0, len(buf)
+    while pos < size:
+        length = _INT32.unpack_from(buf, pos)[0]
+        if length < 5 or pos + length > size:
+            raise BsonError(f"corrupt document length {length} at {pos}")
+        offsets.append(pos)
+        pos += length
+    return np.asarray(offsets, dtype=np.int64)
+
+
+INDEX_VERSION = 1
+
+
+def _offsets_prefix(path):
+    where = hashlib.sha256(str(Path(path).resolve()).encode("utf-8")).hexdigest()[:8]
+    return f"bson_offsets.v{INDEX_VERSION}.{Path(path).stem}.{where}"
+
+
+def offsets_path(path):
+    """Persisted offset index for a .bson file, keyed by its location, size and mtime"""
+    stat = os.stat(path)
+    return CACHE_DIR / f"{_offsets_prefix(path)}.{stat.st_size}.{stat.st_mtime_ns}.npy"
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return value.hex()
+    return str(value)
+
+
+class BsonFile:
+    """A memory-mapped mongodump collection file"""
+
+    def __init__(self, path, persist_offsets=True):
+        self.path = path
+        self.persist_offsets = persist_offsets
+        with open(path, "rb") as f:
+            size = f.seek(0, 2)
+            self.buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self._offsets = None
+
+    @property
+    def offsets(self):
+        if self._offsets is None:
+            self._offsets = self._load_offsets()
+        return self._offsets
+
+    def _load_offsets(self):
+        if not self.persist_offsets:
+            return document_offsets(self.buf)
+        path = offsets_path(self.path)
+        if path.exists():
+            return np.load(path)
+        offsets = document_offsets(self.buf)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npy")  # unique per process: readers may race here
+        np.save(tmp, offsets)
+        os.replace(tmp, path)
+        for stale in path.parent.glob(f"{_offsets_prefix(self.path)}.*.npy"):
+            if stale != path and not stale.name.endswith(".tmp.npy"):
+                stale.unlink(missing_ok=True)
+        return offsets
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def doc_at(self, i, fields=None):
+        """Document number `i` (negative counts from the end), optionally only `fields`"""
+        return decode_document(self.buf, int(self.offsets[i]), set(fields) if fields is not None else None)
+
+    def iter_documents(self, fields=None):
+        """Yield each document, decoding only the top-level `fields` if given"""
+        fields = set(fields) if fields is not None else None
+        for offset in self.offsets:
+            yield decode_document(self.buf, int(offset), fields)
+
+    def __iter__(self):
+        return self.iter_documents()
+
+    def scan_columns(self, fields):
+        """{field: list of values} for the top-level `fields` (None where a document lacks one)"""
+        fields = list(fields)
+        slots = {name: i for i, name in enumerate(fields)}
+        columns = [[None] * len(self) for _ in fields]
+        buf = self.buf
+        for row, offset in enumerate(self.offsets.tolist()):
+            end = offset + _INT32.unpack_from(buf, offset)[0] - 1
+            pos = offset + 4
+            remaining = len(fields)
+            while pos < end and remaining:
+                kind = buf[pos]
+                name_end = _cstring_end(buf, pos + 1)
+                slot = slots.get(bytes(buf[pos + 1:name_end]).decode("utf-8"))
+                pos = name_end + 1
+                if slot is not None:
+                    columns[slot][row] = decode_value(buf, kind, pos)
+                    remaining -= 1
+                pos += element_size(buf, kind, pos)
+        return dict(zip(fields, columns))
+
+    def to_arrow(self, fields, nested="json"):
+        """
+        Projected fields as a pyarrow Table. Nested documents / arrays are JSON
+        text with nested="json", or inferred struct / list columns with nested="struct".
+        """
+        arrays = {}
+        for name, values in self.scan_columns(fields).items():
+            if nested == "json" and any(isinstance(v, (dict, list)) for v in values):
+                values = [None if v is None else json.dumps(v, ensure_ascii=False, default=_json_default)
+                          for v in values]
+            elif any(not isinstance(v, (str, int, float, bool, bytes, datetime, dict, list, type(None)))
+                     for v in values):
+                values = [None if v is None else str(v) for v in values]   # ObjectId etc.
+            arrays[name] = pa.array(values)
+        return pa.table(arrays)
+
+    def to_numpy(self, fields):
+        """Projected fields as NumPy arrays: int64 / float64 / bool when a column has no gaps, else object"""
+        out = {}
+        for name, values in self.scan_columns(fields).items():
+            kinds = {type(v) for v in values}
+            if kinds == {int}:
+                out[name] = np.asarray(values, dtype=np.int64)
+            elif kinds <= {int, float} and kinds:
+                out[name] = np.asarray(values, dtype=np.float64)
+            elif kinds == {bool}:
+                out[name] = np.asarray(values, dtype=bool)
+            else:
+                array = np.empty(len(values), dtype=object)
+                array[:] = values
+                out[name] = array
+        return out
+
+    def close(self):
+        if isinstance(self.buf, mmap.mmap):
+            self.buf.close()
+
+
+def main():
+    import argparse
+    import time
+    import pyarrow.parquet as pq
+    parser = argparse.ArgumentParser(description="Export projected fields of a mongodump .bson file to Parquet")
+    parser.add_argument("path")
+    parser.add_argument("--fields", nargs="+", required=True)
+    parser.add_argument("-o", "--output", required=True)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    bson_file = BsonFile(args.path)
+    table = bson_file.to_arrow(args.fields)
+    pq.write_table(table, args.output)
+    print(f"📦 {len(bson_file)} documents x {table.num_columns} fields → {args.output} "
+          f"in {time.perf_counter() - t0:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Build the user_dataset DuckDB file (query_dataset/yelp_user.db) from origin_dataset.
+
+Ingests review_query.json, tip_query.json and user_query.json with explicit
+column types, in one of two forms:
+  - raw:   every column as in the JSON, dates left as the free-text strings the
+           benchmark describes (the "messy" variant the agents see);
+  - typed: the same rows with dates parsed to TIMESTAMP in DuckDB, by the
+           rules of datetime_normalizer (epoch digits, ISO, then try_strptime
+           over its STRPTIME_FORMATS).
+Tables are sorted by business_ref and date (users by registration time), so
+DuckDB's per-row-group min/max zone maps prune time-range and per-business
+scans, and get ART indexes on their id columns.
+
+The output file holds only the chosen variant (--variant messy: raw tables,
+--variant clean: typed ones), as `review`, `tip` and `user`; agents query it,
+so it must not contain the parsed dates of the messy variant. --companion
+writes the other form to a separate file the agent config does not point to.
+Files are built next to their target and moved into place, so readers never
+see a half-built database:
+
+    python build_user_db.py                      # db_path of user_dataset in db_config.yaml
+    python build_user_db.py --companion /tmp/yelp_user.typed.db
+    python build_user_db.py --variant clean -o /tmp/yelp_user.db
+"""
+import argparse
+import os
+import time
+from pathlib import Path
+
+import duckdb
+
+from connections import PROJECT_DIR, load_db_config
+from datetime_normalizer import EPOCH_MS_FROM, PATTERNS, STRPTIME_FORMATS
+
+
+ORIGIN_DIR = PROJECT_DIR / "origin_dataset"
+
+# table -> source file, column types, date columns, sort keys, indexed columns
+TABLES = {
+    "review": {
+        "source": "review_query.json",
+        "columns": {
+            "review_id": "VARCHAR", "user_id": "VARCHAR", "business_ref": "VARCHAR", "rating": "INTEGER",
+            "useful": "INTEGER", "funny": "INTEGER", "cool": "INTEGER", "text": "VARCHAR", "date": "VARCHAR",
+        },
+        "dates": ["date"],
+        "order": ["business_ref", "date"],
+        "indexes": ["review_id", "user_id", "business_ref"],
+    },
+    "tip": {
+        "source": "tip_query.json",
+        "columns": {
+            "user_id": "VARCHAR", "business_ref": "VARCHAR", "text": "VARCHAR", "date": "VARCHAR",
+            "compliment_count": "INTEGER",
+        },
+        "dates": ["date"],
+        "order": ["business_ref", "date"],
+        "indexes": ["user_id", "business_ref"],
+    },
+    "user": {
+        "source": "user_query.json",
+        "columns": {
+            "user_id": "VARCHAR", "name": "VARCHAR", "review_count": "INTEGER", "yelping_since": "VARCHAR",
+            "useful": "INTEGER", "funny": "INTEGER", "cool": "INTEGER", "elite": "VARCHAR",
+        },
+        "dates": ["yelping_since"],
+        "order": ["yelping_since"],
+        "indexes": ["user_id"],
+    },
+}
+
+
+def quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def literal(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def parse_timestamp_sql(column):
+    """SQL turning a free-text Yelp date column into a TIMESTAMP (NULL when no format matches)"""
+    col = quote(column)
+    epoch = next(pattern for name, pattern, _ in PATTERNS if name == "epoch")
+    number = f"TRY_CAST({col} AS DOUBLE)"
+    micros = f"CAST(CASE WHEN abs({number}) >= {EPOCH_MS_FROM} THEN {number} * 1000 ELSE {number} * 1000000 END AS BIGINT)"
+    attempts = [
+        f"CASE WHEN regexp_full_match(trim({col}), {literal(epoch)}) THEN make_timestamp({micros}) END",
+        f"TRY_CAST(trim({col}) AS TIMESTAMP)",
+    ] + [f"try_strptime(trim({col}), {literal(fmt)})" for fmt in STRPTIME_FORMATS]
+    return f"COALESCE({', '.join(attempts)})"
+
+
+def read_json_sql(path, columns):
+    spec = ", ".join(f"{literal(name)}: {literal(kind)}" for name, kind in columns.items())
+    return f"read_json({literal(path)}, format = 'newline_delimited', columns = {{{spec}}})"
+
+
+def load_table(con, name, spec, source_dir, targets):
+    """
+    Create `name` in every database of `targets` ({catalog: typed?}); returns
+    (rows, unparsed dates)
+    """
+    columns = spec["columns"]
+    parsed = {col: parse_timestamp_sql(col) for col in spec["dates"]}
+
+    # parse once into a staging table, ordered by the typed sort keys
+    con.execute(f"""
+        CREATE TEMP TABLE staging AS
+        SELECT {', '.join(quote(c) for c in columns)},
+               {', '.join(f'{expr} AS {quote("__ts_" + c)}' for c, expr in parsed.items())}
+        FROM {read_json_sql(Path(source_dir) / spec['source'], columns)}
+    """)
+    order = ", ".join(quote("__ts_" + c) if c in parsed else quote(c) for c in spec["order"])
+    raw_select = ", ".join(quote(c) for c in columns)
+    typed_select = ", ".join(quote("__ts_" + c) + f" AS {quote(c)}" if c in parsed else quote(c) for c in columns)
+    for catalog, typed in targets.items():
+        con.execute(f"CREATE TABLE {catalog}.{quote(name)} AS "
+                    f"SELECT {typed_select if typed else raw_select} FROM staging ORDER BY {order}")
+        for col in spec["indexes"]:
+            con.execute(f"CREATE INDEX {quote(f'{name}_{col}_idx')} ON {catalog}.{quote(name)} ({quote(col)})")
+    rows = con.execute("SELECT count(*) FROM staging").fetchone()[0]
+    unparsed = {
+        c: con.execute(f"SELECT count(*) FROM staging WHERE {quote(c)} IS NOT NULL "
+                       f"AND {quote('__ts_' + c)} IS NULL").fetchone()[0]
+        for c in parsed
+    }
+    con.execute("DROP TABLE staging")
+    return rows, unparsed
+
+
+def _tmp_path(path):
+    tmp = path.with_name(path.name + f".tmp{os.getpid()}")
+    tmp.unlink(missing_ok=True)
+    return tmp
+
+
+def _move_into_place(tmp, path):
+    os.replace(tmp, path)
+    Path(str(tmp) + ".wal").unlink(missing_ok=True)
+
+
+def build(output, source_dir=ORIGIN_DIR, variant="messy", companion=None):
+    """
+    Build the `variant` database at `output`, and with `companion` the other
+    form in that separate file (both atomically replaced)
+    """
+    paths = {"main": Path(output)}
+    if companion is not None:
+        paths["companion"] = Path(companion)
+        if paths["companion"].resolve() == paths["main"].resolve():
+            raise ValueError("the companion database must be a different file than the output")
+    targets = {"main": variant == "clean", "companion": variant != "clean"}
+    tmps = {}
+    for catalog, path in paths.items():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmps[catalog] = _tmp_path(path)
+
+    con = duckdb.connect(str(tmps["main"]))
+    try:
+        if "companion" in tmps:
+            con.execute(f"ATTACH {literal(tmps['companion'])} AS companion")
+        stats = {name: load_table(con, name, spec, source_dir, {c: targets[c] for c in paths})
+                 for name, spec in TABLES.items()}
+        con.execute("CHECKPOINT")
+        if "companion" in tmps:
+            con.execute("CHECKPOINT companion")
+            con.execute("DETACH companion")
+    finally:
+        con.close()
+    for catalog, path in paths.items():
+        _move_into_place(tmps[catalog], path)
+    return stats
+
+
+def main():
+    config = load_db_config()
+    default_output = config["db_clients"]["user_dataset"]["db_path"]
+    parser = argparse.ArgumentParser(description="Build the user_dataset DuckDB file from origin_dataset")
+    parser.add_argument("-o", "--output", default=default_output)
+    parser.add_argument("--source-dir", default=str(ORIGIN_DIR))
+    parser.add_argument("--variant", choices=["messy", "clean"], default="messy",
+                        help="messy: dates as the raw strings; clean: dates parsed to TIMESTAMP")
+    parser.add_argument("--companion", default=None,
+                        help="also write the other variant to this separate database file")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    stats = build(args.output, args.source_dir, args.variant, args.companion)
+    for name, (rows, unparsed) in stats.items():
+        warn = "".join(f", ⚠️ {n} unparsed {col}" for col, n in unparsed.items() if n)
+        print(f"📦 {name}: {rows} rows{warn}")
+    companion = f", companion {args.companion}" if args.companion else ""
+    print(f"✅ Built {args.output} ({args.variant}{companion}) in {time.perf_counter() - t0:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Fused, materialized feature extraction for the Mongo business docs.
+
+Every manual query needs some structured field that only lives in the free-text
+`description` or the messy `attributes` of a business (city, state, categories,
+WiFi, credit cards, parking). Instead of one LLM pass per field per query, one
+request per business extracts all of them, and the result is persisted as a
+side table under query_dataset/derived:
+
+    business_features.<version>.jsonl     one row per business_id
+
+The version is a hash of the source docs (business_id, name, description,
+attributes), the extraction prompt and the model, so the table is rebuilt only
+when one of those changes. Rows whose extraction failed are stored with
+ok=false and retried on the next load; everything else is reused as-is.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from entity_resolution import parse_json_object
+from llm_map import LLMMap
+
+
+DERIVED_DIR = Path(__file__).resolve().parent / "query_dataset" / "derived"
+TABLE_NAME = "business_features"
+
+# fields the extraction reads from each Mongo doc; pass as the find() projection
+SOURCE_FIELDS = ("business_id", "name", "description", "attributes")
+SOURCE_PROJECTION = {field: 1 for field in SOURCE_FIELDS}
+
+TEXT_FIELDS = ("city", "state", "address")
+FLAG_FIELDS = ("has_wifi", "accepts_credit_card", "offers_parking")
+FEATURE_FIELDS = TEXT_FIELDS + ("categories",) + FLAG_FIELDS
+
+SYSTEM_PROMPT = "You extract structured fields from business records. You answer only with JSON."
+INSTRUCTIONS = (
+    "Given the following business record (a free-text description and a dictionary of attributes), "
+    "extract these fields and respond only with a JSON object with exactly these keys:\n"
+    "- \"city\": the city the business is located in, or null if unknown\n"
+    "- \"state\": the full U.S. state name (e.g., 'California', 'Texas', 'New York'), or null if unknown\n"
+    "- \"address\": the street address (e.g., '6901 Phelps Rd'), or null if not mentioned\n"
+    "- \"categories\": a list of all business category terms explicitly mentioned in the description, "
+    "verbatim (word-for-word), e.g. [\"Nail Salon\", \"Spa\"]; do not guess or generalize\n"
+    "- \"has_wifi\": true only if there is clear evidence in the attributes that WiFi is provided, otherwise false\n"
+    "- \"accepts_credit_card\": true only if the attributes show the business accepts credit card payments, "
+    "otherwise false\n"
+    "- \"offers_parking\": true if BikeParking is true or any of garage, street, validated, lot, valet in "
+    "BusinessParking is true, otherwise false. BusinessParking may be a dictionary encoded as a string; "
+    "parse it before deciding."
+)
+SCHEMA_VERSION = 1
+
+
+def render_business(doc):
+    return (f"Description: {doc.get('description') or ''}\n"
+            f"Attributes: {json.dumps(doc.get('attributes') or {}, indent=2, default=str)}")
+
+
+def to_flag(value):
+    """Normalize a model answer (true / "yes" / "True" / 1 ...) to a bool"""
+    if isinstance(value, str):
+        return value.strip().strip(".").lower() in ("true", "yes", "1")
+    return bool(value)
+
+
+def to_text(value):
+    if value is None:
+        return None
+    value = str(value).strip()
+    return None if value.lower() in ("", "null", "none", "unknown", "n/a") else value
+
+
+def to_categories(value):
+    if isinstance(value, str):
+        value = value.split(",")
+    return [str(c).strip() for c in (value or []) if str(c).strip()]
+
+
+def parse_features(text):
+    """Model reply -> normalized feature dict"""
+    raw = parse_json_object(text)
+    features = {field: to_text(raw.get(field)) for field in TEXT_FIELDS}
+    features["categories"] = to_categories(raw.get("categories"))
+    features.update({field: to_flag(raw.get(field)) for field in FLAG_FIELDS})
+    return features
+
+
+def source_key(doc):
+    return json.dumps({field: doc.get(field) for field in SOURCE_FIELDS}, sort_keys=True, default=str)
+
+
+def table_version(business_docs, deployment_name):
+    """Hash of the source docs, the extraction prompt and the model"""
+    h = hashlib.sha256()
+    h.update(json.dumps([SCHEMA_VERSION, SYSTEM_PROMPT, INSTRUCTIONS, deployment_name]).encode("utf-8"))
+    for key in sorted(source_key(doc) for doc in business_docs):
+        h.update(key.encode("utf-8"))
+        h.update(b"\n")
+    return h.hexdigest()[:16]
+
+
+def table_path(version, derived_dir=DERIVED_DIR):
+    return Path(derived_dir) / f"{TABLE_NAME}.{version}.jsonl"
+
+
+def read_table(path):
+    rows = {}
+    if Path(path).exists():
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    row = json.loads(line)
+                    rows[row["business_id"]] = row
+    return rows
+
+
+def write_table(path, rows):
+    """Write rows atomically, so readers never see a half-written version"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + f".tmp{os.getpid()}")
+    with open(tmp, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    os.replace(tmp, path)
+
+
+def extract_features(client, deployment_name, business_docs, **map_kwargs):
+    """One request per business (or several packed per request, see LLMMap)"""
+    extractor = LLMMap(
+        client, deployment_name,
+        system=SYSTEM_PROMPT,
+        instructions=INSTRUCTIONS,
+        render=render_business,
+        parse=parse_features,
+        default=None,
+        max_tokens=300,
+        json_mode=True,
+        name="business_features",
+        **map_kwargs,
+    )
+    rows = []
+    for doc, features in zip(business_docs, extractor.map(business_docs)):
+        row = {"business_id": doc["business_id"], "name": doc.get("name"), "ok": features is not None}
+        row.update(features or {field: None for field in FEATURE_FIELDS})
+        rows.append(row)
+    return rows
+
+
+def load_business_features(client, deployment_name, business_docs, derived_dir=DERIVED_DIR,
+                           refresh=False, **map_kwargs):
+    """
+    The business_features table for `business_docs` as a DataFrame, extracting
+    only the businesses that are missing from (or failed in) the current version.
+    """
+    business_docs = [doc for doc in business_docs if doc.get("business_id")]
+    version = table_version(business_docs, deployment_name)
+    path = table_path(version, derived_dir)
+    rows = {} if refresh else read_table(path)
+
+    todo = [doc for doc in business_docs if not rows.get(doc["business_id"], {}).get("ok")]
+    if todo:
+        print(f"🧱 Extracting features for {len(todo)}/{len(business_docs)} businesses → {path.name}")
+        for row in extract_features(client, deployment_name, todo, **map_kwargs):
+            rows[row["business_id"]] = row
+        write_table(path, [rows[doc["business_id"]] for doc in business_docs])
+    else:
+        print(f"📦 Using materialized features: {path.name} ({len(rows)} businesses)")
+
+    df = pd.DataFrame([rows[doc["business_id"]] for doc in business_docs],
+                      columns=["business_id", "name", "ok", *FEATURE_FIELDS])
+    failed = int((~df["ok"].astype(bool)).sum())
+    if failed:
+        print(f"⚠️  Feature extraction failed for {failed} businesses; they will be retried next time")
+    return df
+
+
+def explode_categories(df_features):
+    """(business_id, category) rows from the features table"""
+    df = df_features[["business_id", "categories"]].explode("categories")
+    return df.dropna(subset=["categories"]).rename(columns={"categories": "category"}).reset_index(drop=True)
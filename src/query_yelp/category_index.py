@@ -0,0 +1,182 @@
+"""
+Business × category incidence index for category-grouped aggregates.
+
+Built once per business file and persisted next to the dataset cache:
+  - `categories`:   the category dictionary (id -> name)
+  - `business_ids`: row labels
+  - CSR incidence:  the categories of business `b` are
+                    indices[indptr[b]:indptr[b + 1]], in their original listed order
+
+Per-category aggregates over reviews are then transposed sparse products
+(M^T @ w) computed with np.bincount, instead of explode + merge + a Python
+counter loop:
+
+    index = CategoryIndex.for_dataset("../ground_truth_dataset/business_gt.json")
+    stats = index.review_stats(df_review["business_id"], df_review["stars"])   # count / sum / mean per category
+    top = index.top_categories(df_cohort_reviews["business_id"], k=5)
+
+scipy is not a dependency of this project, so the CSR arrays are plain numpy.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from dataset_cache import CACHE_DIR, DATASET_DIR, file_digest, source_key, load_table
+
+
+FORMAT_VERSION = 1
+
+
+class CategoryIndex:
+    """CSR incidence matrix between businesses (rows) and categories (columns)"""
+
+    def __init__(self, business_ids, categories, indptr, indices):
+        self.business_ids = np.asarray(business_ids, dtype=object)
+        self.categories = np.asarray(categories, dtype=object)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self._rows = pd.Index(self.business_ids)
+        # row of each stored entry, and its position within the business's category list
+        self._entry_rows = np.repeat(np.arange(len(self.business_ids)), np.diff(self.indptr))
+        self._entry_pos = np.arange(len(self.indices)) - self.indptr[self._entry_rows]
+        # first occurrence of each (business, category) pair; a category can be listed twice
+        pairs = self._entry_rows * max(self.n_categories, 1) + self.indices
+        self._distinct = np.zeros(len(pairs), dtype=bool)
+        self._distinct[np.unique(pairs, return_index=True)[1]] = True
+
+    @property
+    def n_businesses(self):
+        return len(self.business_ids)
+
+    @property
+    def n_categories(self):
+        return len(self.categories)
+
+    @classmethod
+    def from_lists(cls, business_ids, category_lists):
+        """Build from parallel sequences of business_ids and category name lists"""
+        lengths = np.fromiter((len(c) if c is not None else 0 for c in category_lists), dtype=np.int64,
+                              count=len(business_ids))
+        flat = [c for cats in category_lists if cats is not None for c in cats]
+        codes, categories = pd.factorize(pd.Series(flat, dtype=object))
+        indptr = np.concatenate([[0], np.cumsum(lengths)])
+        return cls(business_ids, np.asarray(categories, dtype=object), indptr, codes)
+
+    @classmethod
+    def from_frame(cls, df_business):
+        """Build from a frame with business_id and category_list columns"""
+        return cls.from_lists(df_business["business_id"].tolist(), df_business["category_list"].tolist())
+
+    def save(self, path):
+        np.savez(path, business_ids=self.business_ids.astype(str), categories=self.categories.astype(str),
+                 indptr=self.indptr, indices=self.indices)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as npz:
+            return cls(npz["business_ids"].astype(object), npz["categories"].astype(object),
+                       npz["indptr"], npz["indices"])
+
+    @classmethod
+    def for_dataset(cls, business_path=DATASET_DIR / "business_gt.json"):
+        """Index for a business JSONL file, persisted and keyed by the file's path and content hash"""
+        digest = file_digest(business_path)
+        prefix = f"category_index.{source_key(business_path)}"   # per source path, so other datasets' files survive cleanup
+        path = CACHE_DIR / f"{prefix}.v{FORMAT_VERSION}.{digest[:16]}.npz"
+        if path.exists():
+            return cls.load(path)
+        index = cls.from_frame(load_table(business_path, ["business_id", "category_list"]))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npz")  # unique per process: workers may race here
+        index.save(tmp)
+        tmp.replace(path)
+        for stale in path.parent.glob(f"{prefix}.v*.npz"):
+            if stale != path and not stale.name.endswith(".tmp.npz"):
+                stale.unlink(missing_ok=True)
+        return index
+
+    # ---- lookups ----
+
+    def codes(self, business_ids):
+        """Row of each business_id, -1 for businesses not in the index"""
+        return self._rows.get_indexer(pd.Index(business_ids))
+
+    def business_mask(self, business_ids):
+        """Boolean row mask selecting `business_ids`"""
+        mask = np.zeros(self.n_businesses, dtype=bool)
+        codes = self.codes(business_ids)
+        mask[codes[codes >= 0]] = True
+        return mask
+
+    def explode(self):
+        """(business_id, category) rows, like exploding the category lists"""
+        return pd.DataFrame({"business_id": self.business_ids[self._entry_rows],
+                             "category": self.categories[self.indices]})
+
+    # ---- sparse products ----
+
+    def category_totals(self, weights, distinct=False):
+        """
+        M^T @ weights: per-category sum of a per-business weight vector. A
+        category listed twice by one business counts twice (like exploding the
+        list) unless `distinct`, e.g. for counting distinct businesses.
+        """
+        weights = np.asarray(weights, dtype=np.float64)
+        entries = self._distinct if distinct else slice(None)
+        return np.bincount(self.indices[entries], weights=weights[self._entry_rows[entries]],
+                           minlength=self.n_categories)
+
+    def business_totals(self, business_ids, values=None):
+        """Per-business count (or sum of `values`) over rows such as reviews"""
+        codes = self.codes(business_ids)
+        known = codes >= 0
+        weights = None if values is None else np.asarray(values, dtype=np.float64)[known]
+        return np.bincount(codes[known], weights=weights, minlength=self.n_businesses)
+
+    def review_stats(self, business_ids, values, business_mask=None):
+        """
+        Per-category count / sum / mean of `values` over reviews (one row per
+        review, given by its business_id), optionally only for businesses in
+        `business_mask`. Categories without reviews are omitted.
+        """
+        counts = self.business_totals(business_ids)
+        sums = self.business_totals(business_ids, values)
+        if business_mask is not None:
+            counts, sums = counts * business_mask, sums * business_mask
+        n = self.category_totals(counts)
+        total = self.category_totals(sums)
+        keep = n > 0
+        return pd.DataFrame({
+            "category": self.categories[keep],
+            "count": n[keep].astype(np.int64),
+            "sum": total[keep],
+            "mean": total[keep] / n[keep],
+        })
+
+    def first_seen(self, business_ids):
+        """
+        Rank of each category's first appearance when walking `business_ids` in
+        order and each business's categories in listed order (inf if never seen).
+        """
+        codes = self.codes(business_ids)
+        positions = np.arange(len(codes))
+        first_row = np.full(self.n_businesses, np.iinfo(np.int64).max, dtype=np.int64)
+        np.minimum.at(first_row, codes[codes >= 0], positions[codes >= 0])
+
+        width = int(np.diff(self.indptr).max(initial=0)) + 1
+        seen = first_row[self._entry_rows] != np.iinfo(np.int64).max
+        keys = np.full(self.n_categories, np.inf)
+        np.minimum.at(keys, self.indices[seen],
+                      first_row[self._entry_rows[seen]].astype(np.float64) * width + self._entry_pos[seen])
+        return keys
+
+    def top_categories(self, business_ids, k=5):
+        """
+        The k categories with the most rows (e.g. reviews) in `business_ids`,
+        ties broken by first appearance, like a stable sort of a running counter.
+        """
+        counts = self.category_totals(self.business_totals(business_ids))
+        order = np.lexsort((self.first_seen(business_ids), -counts))
+        order = order[counts[order] > 0][:k]
+        return pd.DataFrame({"category": self.categories[order], "review_count": counts[order].astype(np.int64)})
@@ -0,0 +1,196 @@
+"""
+Check-ins as a CSR layout of sorted epoch seconds, with range queries.
+
+The Yelp check-in files keep one comma-joined `date` string per business.
+The store parses them once into
+  - `business_ids`: row labels
+  - `times`:        one int64 array of check-in times (epoch seconds, naive UTC),
+                    sorted within each business
+  - `indptr`:       business `b` owns times[indptr[b]:indptr[b + 1]]
+
+and persists them next to the dataset cache, keyed by the source file's hash.
+Counting or listing the check-ins of one or many businesses in [t0, t1) is then
+a binary search, instead of splitting and to_datetime-ing every string again:
+
+    store = CheckinStore.for_dataset("../ground_truth_dataset/checkin_gt.json")
+    store.count("businessid_2", "2012-01-01", "2013-01-01")
+    store.counts(df_business["business_id"], "2018-01-01", "2019-01-01")   # int64 array
+    store.between("businessid_2", "2012-01-01", "2013-01-01")             # datetime64[s] array
+
+Source records can come from any JSONL file (read with jsonl_stream) or any
+iterable of {"business_id", "date"} documents, e.g. a Mongo cursor.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from dataset_cache import CACHE_DIR, DATASET_DIR, file_digest, source_key
+from datetime_normalizer import parse_datetime, parse_datetimes
+from jsonl_stream import iter_records
+
+
+FORMAT_VERSION = 1
+
+
+def to_epoch(value):
+    """str / datetime / np.datetime64 / epoch number (datetime_normalizer rules) -> int epoch seconds"""
+    stamp = parse_datetime(value)
+    if stamp is None:
+        raise ValueError(f"unparseable time {value!r}")
+    return int(pd.Timestamp(stamp).value // 10**9)
+
+
+class CheckinStore:
+    """Per-business sorted check-in times in one flat array"""
+
+    def __init__(self, business_ids, indptr, times):
+        self.business_ids = np.asarray(business_ids, dtype=object)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.times = np.asarray(times, dtype=np.int64)
+        self._rows = pd.Index(self.business_ids)
+        # global sort key: (row, time) packed into one monotonic int64, so ranges
+        # over many businesses are a single vectorized searchsorted
+        rows = np.repeat(np.arange(len(self.business_ids)), np.diff(self.indptr))
+        self._t_min = int(self.times.min()) if len(self.times) else 0
+        self._span = (int(self.times.max()) - self._t_min + 2) if len(self.times) else 1
+        self._keys = rows * self._span + (self.times - self._t_min)
+
+    def __len__(self):
+        return len(self.times)
+
+    @property
+    def n_businesses(self):
+        return len(self.business_ids)
+
+    @property
+    def nbytes(self):
+        return self.times.nbytes + self.indptr.nbytes + self._keys.nbytes
+
+    @classmethod
+    def from_records(cls, records):
+        """Build from an iterable of {"business_id", "date"} documents (date is the comma-joined string)"""
+        business_ids, lengths, chunks = [], [], []
+        for record in records:
+            text = record.get("date") or ""
+            stamps = [s.strip() for s in text.split(",") if s.strip()]
+            business_ids.append(record["business_id"])
+            lengths.append(len(stamps))
+            chunks.append(stamps)
+        flat = [s for stamps in chunks for s in stamps]
+        parsed = parse_datetimes(pd.Series(flat, dtype=object))
+        times = parsed.to_numpy(dtype="datetime64[s]").astype(np.int64)
+        valid = parsed.notna().to_numpy()
+
+        # drop unparseable stamps and sort each business's times
+        rows = np.repeat(np.arange(len(business_ids)), lengths)[valid]
+        times = times[valid]
+        order = np.lexsort((times, rows))
+        indptr = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=len(business_ids)))]).astype(np.int64)
+        return cls(business_ids, indptr, times[order])
+
+    @classmethod
+    def from_frame(cls, df_checkin):
+        """Build from a frame with business_id and date columns"""
+        return cls.from_records(df_checkin[["business_id", "date"]].to_dict("records"))
+
+    @classmethod
+    def from_jsonl(cls, path):
+        """Build by streaming a check-in JSONL file"""
+        return cls.from_records(iter_records(path, columns=["business_id", "date"]))
+
+    def save(self, path):
+        np.savez(path, business_ids=self.business_ids.astype(str), indptr=self.indptr, times=self.times)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as npz:
+            return cls(npz["business_ids"].astype(object), npz["indptr"], npz["times"])
+
+    @classmethod
+    def for_dataset(cls, checkin_path=DATASET_DIR / "checkin_gt.json"):
+        """Store for a check-in JSONL file, persisted and keyed by the file's path and content hash"""
+        digest = file_digest(checkin_path)
+        prefix = f"checkin_store.{source_key(checkin_path)}"   # per source path, so other datasets' files survive cleanup
+        path = CACHE_DIR / f"{prefix}.v{FORMAT_VERSION}.{digest[:16]}.npz"
+        if path.exists():
+            return cls.load(path)
+        store = cls.from_jsonl(checkin_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npz")  # unique per process: workers may race here
+        store.save(tmp)
+        tmp.replace(path)
+        for stale in path.parent.glob(f"{prefix}.v*.npz"):
+            if stale != path and not stale.name.endswith(".tmp.npz"):
+                stale.unlink(missing_ok=True)
+        return store
+
+    # ---- range queries, all over [t0, t1); None means unbounded ----
+
+    def codes(self, business_ids):
+        """Row of each business_id, -1 for businesses without check-ins"""
+        return self._rows.get_indexer(pd.Index(business_ids))
+
+    def _bounds(self, rows, t0, t1):
+        lo = 0 if t0 is None else min(max(to_epoch(t0) - self._t_min, 0), self._span - 1)
+        hi = self._span - 1 if t1 is None else min(max(to_epoch(t1) - self._t_min, 0), self._span - 1)
+        base = rows * self._span
+        return np.searchsorted(self._keys, base + lo), np.searchsorted(self._keys, base + hi)
+
+    def counts(self, business_ids, t0=None, t1=None):
+        """Check-ins in [t0, t1) for each of `business_ids` (0 for unknown businesses)"""
+        rows = self.codes(business_ids)
+        known = rows >= 0
+        out = np.zeros(len(rows), dtype=np.int64)
+        start, stop = self._bounds(rows[known], t0, t1)
+        out[known] = stop - start
+        return out
+
+    def count(self, business_id, t0=None, t1=None):
+        """Check-ins of one business in [t0, t1)"""
+        return int(self.counts([business_id], t0, t1)[0])
+
+    def total(self, business_ids=None, t0=None, t1=None):
+        """Check-ins in [t0, t1) summed over `business_ids` (default: every business)"""
+        if business_ids is None:
+            business_ids = self.business_ids
+        return int(self.counts(business_ids, t0, t1).sum())
+
+    def between(self, business_id, t0=None, t1=None):
+        """Sorted check-in times of one business in [t0, t1), as datetime64[s]"""
+        rows = self.codes([business_id])
+        if rows[0] < 0:
+            return np.array([], dtype="datetime64[s]")
+        start, stop = self._bounds(rows, t0, t1)
+        return self.times[start[0]:stop[0]].astype("datetime64[s]")
+
+    def to_frame(self, business_ids=None, t0=None, t1=None):
+        """Exploded (business_id, date) rows in [t0, t1), for code that wants pandas"""
+        if business_ids is None:
+            business_ids = self.business_ids
+        rows = self.codes(business_ids)
+        rows = rows[rows >= 0]
+        start, stop = self._bounds(rows, t0, t1)
+        lengths = stop - start
+        entries = np.repeat(start - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths) + np.arange(lengths.sum())
+        return pd.DataFrame({
+            "business_id": np.repeat(self.business_ids[rows], lengths),
+            "date": self.times[entries].astype("datetime64[s]"),
+        })
+
+
+def main():
+    import argparse
+    import time
+    parser = argparse.ArgumentParser(description="Build the check-in store for a check-in JSONL file")
+    parser.add_argument("path", nargs="?", default=str(DATASET_DIR / "checkin_gt.json"))
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    store = CheckinStore.for_dataset(args.path)
+    print(f"📦 {store.n_businesses} businesses, {len(store)} check-ins, {store.nbytes / 1024:.0f} KiB "
+          f"in {time.perf_counter() - t0:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Shared database handles for the scripts and the experiment runner.
+
+db_config.yaml is read once per process and its paths are resolved against
+the project folder (src/query_yelp), so nothing depends on the working
+directory. Handles are opened on first use and reused afterwards:
+  - DuckDB: one read-only connection per database file, plus one cursor per
+    thread (DuckDB cursors are independent connections to the same database);
+  - Mongo: one client per process, shared by every thread; pymongo pools its
+    sockets itself (size from MONGO_POOL_SIZE), and MONGO_URI=embedded://
+    serves the configured dump in-process (see mongo_lite.py).
+
+    from connections import get_manager
+    con_duck = get_manager().duckdb()            # the "user_dataset" database
+    client_mongo = get_manager().mongo()         # the "businessinfo_dataset" client
+"""
+import os
+import threading
+from pathlib import Path
+
+import duckdb
+import yaml
+
+from mongo_lite import DEFAULT_MONGO_URI, EMBEDDED_SCHEME, EmbeddedClient, connect_mongo
+
+
+PROJECT_DIR = Path(__file__).resolve().parent
+CONFIG_PATH = PROJECT_DIR / "db_config.yaml"
+PATH_KEYS = ("db_path", "dump_folder")
+
+
+def load_db_config(path=CONFIG_PATH, project_dir=PROJECT_DIR):
+    """db_config.yaml with db_path / dump_folder made absolute"""
+    with open(path) as f:
+        config = yaml.safe_load(f) or {}
+    for client in config.get("db_clients", {}).values():
+        for key in PATH_KEYS:
+            if client.get(key):
+                client[key] = str((Path(project_dir) / client[key]).resolve())
+    return config
+
+
+class ConnectionManager:
+    """Lazily opened, process-wide DuckDB and Mongo handles for the clients in db_config.yaml"""
+
+    def __init__(self, config_path=CONFIG_PATH, mongo_uri=None, mongo_pool_size=None):
+        self.config_path = Path(config_path)
+        self.config = load_db_config(self.config_path, self.config_path.parent)
+        self.mongo_uri = mongo_uri or os.getenv("MONGO_URI", DEFAULT_MONGO_URI)
+        self.mongo_pool_size = int(mongo_pool_size or os.getenv("MONGO_POOL_SIZE", 16))
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._duckdb = {}
+        self._mongo = {}
+
+    def client_config(self, name, db_type):
+        clients = self.config.get("db_clients", {})
+        if name is None:
+            matching = [n for n, c in clients.items() if c.get("db_type") == db_type]
+            if not matching:
+                raise KeyError(f"no {db_type} client in {self.config_path}")
+            name = matching[0]
+        if name not in clients:
+            raise KeyError(f"no client {name!r} in {self.config_path} (has {list(clients)})")
+        return name, clients[name]
+
+    def duckdb(self, name=None):
+        """This thread's read-only cursor on DuckDB client `name` (default: the first DuckDB client)"""
+        name, cfg = self.client_config(name, "duckdb")
+        cursors = self._local.__dict__.setdefault("duckdb", {})
+        if name not in cursors:
+            with self._lock:
+                if name not in self._duckdb:
+                    path = cfg["db_path"]
+                    if not Path(path).exists():
+                        raise FileNotFoundError(f"DuckDB file for {name!r} not found: {path} "
+                                                f"(build it with build_user_db.py)")
+                    self._duckdb[name] = duckdb.connect(path, read_only=True)
+                cursors[name] = self._duckdb[name].cursor()
+        return cursors[name]
+
+    def mongo(self, name=None):
+        """The process-wide Mongo client for client `name` (default: the first Mongo client)"""
+        name, cfg = self.client_config(name, "mongo")
+        with self._lock:
+            if name not in self._mongo:
+                if self.mongo_uri == EMBEDDED_SCHEME and cfg.get("dump_folder"):
+                    # a dump folder is one database; its parent holds all of them
+                    self._mongo[name] = EmbeddedClient(Path(cfg["dump_folder"]).parent)
+                else:
+                    self._mongo[name] = connect_mongo(self.mongo_uri, maxPoolSize=self.mongo_pool_size)
+            return self._mongo[name]
+
+    def close(self):
+        with self._lock:
+            for con in self._duckdb.values():
+                con.close()
+            for client in self._mongo.values():
+                client.close()
+            self._duckdb.clear()
+            self._mongo.clear()
+            self._local = threading.local()
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_manager():
+    """The process-wide ConnectionManager for db_config.yaml"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = ConnectionManager()
+        return _manager
@@ -0,0 +1,161 @@
+"""
+Columnar Parquet cache for the ground_truth_dataset JSONL files.
+
+Each `*_gt.json` file is parsed once with pd.read_json (so values match what
+the ground-truth scripts used to read) and written as typed Parquet:
+  - date columns are parsed to timestamps (review/tip `date`, user `yelping_since`),
+  - business `categories` gets a pre-split `category_list` column next to it,
+  - nested dict / list columns (`attributes`, `hours`) are stored as JSON text
+    and decoded back to Python objects only when they are read.
+
+Cache files are named after the table, a short hash of the source file's
+resolved path and the SHA-256 of its contents, so editing a JSONL file
+invalidates its cache automatically and only that file's stale versions are
+deleted (same-named files in other directories keep theirs). Reads go
+through pyarrow with column projection, so a script that needs `stars`, `date`
+and `business_id` never touches the review text.
+
+    from dataset_cache import load_table
+    df_review = load_table("../ground_truth_dataset/review_gt.json", columns=["business_id", "stars"])
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+DATASET_DIR = Path(__file__).resolve().parent / "ground_truth_dataset"
+CACHE_DIR = Path(os.getenv("DATASET_CACHE_DIR", Path(__file__).resolve().parent / ".dataset_cache"))
+
+# bump when the conversion below changes, so existing cache files are rebuilt
+FORMAT_VERSION = 1
+JSON_COLUMNS_KEY = b"dataset_cache.json_columns"
+
+# per-table typing applied on conversion, keyed by file stem without "_gt"
+TABLES = {
+    "business": {"split": {"categories": "category_list"}},
+    "review": {"dates": ["date"]},
+    "tip": {"dates": ["date"]},
+    "user": {"dates": ["yelping_since"]},
+    "checkin": {},
+}
+
+
+def table_name(path):
+    stem = Path(path).stem
+    return stem[:-3] if stem.endswith("_gt") else stem
+
+
+def source_key(path):
+    """Short hash of the resolved path, so same-named sources in different directories get their own cache files"""
+    return hashlib.sha256(str(Path(path).resolve()).encode("utf-8")).hexdigest()[:8]
+
+
+def file_digest(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def split_list(value, sep=","):
+    """'A, B,,C' -> ['A', 'B', 'C']; anything that is not a string -> []"""
+    if isinstance(value, str):
+        return [v.strip() for v in value.split(sep) if v.strip()]
+    return []
+
+
+def is_nested(series):
+    return series.dtype == object and series.map(lambda v: isinstance(v, (dict, list))).any()
+
+
+def convert(source):
+    """JSONL file -> (typed DataFrame, names of columns stored as JSON text)"""
+    spec = TABLES.get(table_name(source), {})
+    df = pd.read_json(source, lines=True)
+    for col in spec.get("dates", []):
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+    for col, list_col in spec.get("split", {}).items():
+        if col in df.columns:
+            df[list_col] = df[col].map(split_list)
+    json_columns = [col for col in df.columns if col not in spec.get("split", {}).values() and is_nested(df[col])]
+    for col in json_columns:
+        df[col] = df[col].map(lambda v: None if v is None or v is pd.NA else json.dumps(v, ensure_ascii=False))
+    return df, json_columns
+
+
+def _cache_prefix(source):
+    return f"{table_name(source)}.{source_key(source)}"
+
+
+def cache_path(source, digest=None):
+    digest = digest or file_digest(source)
+    return CACHE_DIR / f"{_cache_prefix(source)}.v{FORMAT_VERSION}.{digest[:16]}.parquet"
+
+
+def build(source, path):
+    """Convert `source` and write it to `path` atomically, removing stale versions"""
+    df, json_columns = convert(source)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[JSON_COLUMNS_KEY] = json.dumps(json_columns).encode("utf-8")
+    table = table.replace_schema_metadata(metadata)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".tmp{os.getpid()}")
+    pq.write_table(table, tmp)
+    os.replace(tmp, path)
+    for stale in path.parent.glob(f"{_cache_prefix(source)}.v*.parquet"):
+        if stale != path:
+            stale.unlink(missing_ok=True)
+
+
+def ensure_cached(source):
+    """Path of the up-to-date Parquet file for `source`, building it if needed"""
+    path = cache_path(source)
+    if not path.exists():
+        build(source, path)
+    return path
+
+
+def load_table(source, columns=None):
+    """
+    Load a ground-truth JSONL file as a DataFrame through the Parquet cache.
+    `columns` limits what is read; nested columns come back as dicts / lists.
+    """
+    path = ensure_cached(source)
+    parquet = pq.ParquetFile(path)
+    json_columns = json.loads(parquet.schema_arrow.metadata.get(JSON_COLUMNS_KEY, b"[]"))
+    missing = set(columns or []) - set(parquet.schema_arrow.names)
+    if missing:
+        raise KeyError(f"{sorted(missing)} not in {Path(source).name} (has {parquet.schema_arrow.names})")
+    df = parquet.read(columns=list(columns) if columns else None).to_pandas()
+    for col in json_columns:
+        if col in df.columns:
+            df[col] = df[col].map(lambda v: json.loads(v) if isinstance(v, str) else None).astype(object)
+    return df
+
+
+def load_dataset(name, columns=None, dataset_dir=DATASET_DIR):
+    """load_table() by table name, e.g. load_dataset("review", ["business_id", "stars"])"""
+    return load_table(Path(dataset_dir) / f"{name}_gt.json", columns)
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Build the Parquet cache for the ground-truth JSONL files")
+    parser.add_argument("files", nargs="*", help="JSONL files; default is every *_gt.json in ground_truth_dataset")
+    args = parser.parse_args()
+    for source in args.files or sorted(DATASET_DIR.glob("*_gt.json")):
+        path = ensure_cached(source)
+        print(f"📦 {Path(source).name} → {path.name} ({path.stat().st_size / 1024:.0f} KiB)")
+
+
+if __name__ == "__main__":
+    main()
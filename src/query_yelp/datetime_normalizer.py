@@ -0,0 +1,218 @@
+"""
+Vectorized, deterministic parsing of the mixed-format Yelp timestamps.
+
+The origin files mix several spellings of the same instant, e.g.
+    "2013-07-08 21:47:00"              ISO
+    "August 01, 2016 at 03:44 AM"      month name, 12-hour clock
+    "29 May 2013, 23:01"               day first, abbreviated month
+    1466812800000                      epoch milliseconds (ground-truth files)
+Epoch times, as numbers or digit strings, follow one rule: magnitudes from
+EPOCH_MS_FROM (10**10) up are milliseconds, smaller ones seconds.
+Instead of trying formats row by row (or asking a model), parse_datetimes()
+factorizes the column, classifies each distinct string by an exact pattern,
+and parses every pattern group with one pd.to_datetime(format=...) call.
+Parsed strings are cached across calls, so re-parsing a column is a lookup.
+Values that match no pattern become NaT; nothing is guessed. parse_datetime()
+applies the same rules to a single value, for row-at-a-time readers
+(jsonl_stream.DateRange, checkin_store bounds).
+
+    from datetime_normalizer import parse_datetime, parse_datetimes
+    df_review["date_parsed"] = parse_datetimes(df_review["date"])
+    parse_datetime("August 01, 2016 at 03:44 AM")   # datetime(2016, 8, 1, 3, 44)
+"""
+import re
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+
+_FULL = r"(?:January|February|March|April|May|June|July|August|September|October|November|December)"
+_ABBR = r"(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)"
+_TIME_12 = r"\d{1,2}:\d{2} [AaPp][Mm]"
+
+# |epoch| at or above this is milliseconds, below it seconds (10**10 s is year 2286)
+EPOCH_MS_FROM = 10**10
+
+# (name, full-match pattern, pandas format or "epoch"), tried in order
+PATTERNS = [
+    ("epoch", r"-?\d{9,13}(?:\.\d+)?", "epoch"),
+    ("iso", r"\d{4}-\d{2}-\d{2}(?:[ T]\d{1,2}:\d{2}(?::\d{2}(?:\.\d+)?)?)?(?:Z|[+-]\d{2}:?\d{2})?", "ISO8601"),
+    ("month_day_year_at", rf"{_FULL} \d{{1,2}}, \d{{4}} at {_TIME_12}", "%B %d, %Y at %I:%M %p"),
+    ("mon_day_year_at", rf"{_ABBR} \d{{1,2}}, \d{{4}} at {_TIME_12}", "%b %d, %Y at %I:%M %p"),
+    ("month_day_year", rf"{_FULL} \d{{1,2}}, \d{{4}}", "%B %d, %Y"),
+    ("mon_day_year", rf"{_ABBR} \d{{1,2}}, \d{{4}}", "%b %d, %Y"),
+    ("day_mon_year_time", rf"\d{{1,2}} {_ABBR} \d{{4}}, \d{{1,2}}:\d{{2}}", "%d %b %Y, %H:%M"),
+    ("day_month_year_time", rf"\d{{1,2}} {_FULL} \d{{4}}, \d{{1,2}}:\d{{2}}", "%d %B %Y, %H:%M"),
+    ("day_mon_year", rf"\d{{1,2}} {_ABBR} \d{{4}}", "%d %b %Y"),
+    ("day_month_year", rf"\d{{1,2}} {_FULL} \d{{4}}", "%d %B %Y"),
+    ("us_datetime_seconds", r"\d{1,2}/\d{1,2}/\d{4} \d{1,2}:\d{2}:\d{2}", "%m/%d/%Y %H:%M:%S"),
+    ("us_datetime", r"\d{1,2}/\d{1,2}/\d{4} \d{1,2}:\d{2}", "%m/%d/%Y %H:%M"),
+    ("us_date", r"\d{1,2}/\d{1,2}/\d{4}", "%m/%d/%Y"),
+]
+_COMPILED = [(name, re.compile(pattern, re.IGNORECASE), fmt) for name, pattern, fmt in PATTERNS]
+_FORMATS = {name: fmt for name, _, fmt in PATTERNS}
+
+# strptime formats of the named-field patterns, for SQL engines (build_user_db.py)
+STRPTIME_FORMATS = tuple(fmt for _, _, fmt in PATTERNS if "%" in fmt)
+
+NAT = np.datetime64("NaT", "ns").astype(np.int64)
+_EPOCH = datetime(1970, 1, 1)
+
+
+def pattern_of(text):
+    """Name of the first pattern `text` fully matches, or None"""
+    text = str(text).strip()
+    for name, regex, _ in _COMPILED:
+        if regex.fullmatch(text):
+            return name
+    return None
+
+
+def epoch_to_datetime(values):
+    """Epoch numbers -> datetime64[ns] Series, milliseconds or seconds by magnitude (see EPOCH_MS_FROM)"""
+    numbers = pd.to_numeric(pd.Series(values), errors="coerce").astype("float64")
+    ms = numbers.where(numbers.abs() >= EPOCH_MS_FROM, numbers * 1000)
+    return pd.to_datetime(ms, unit="ms", errors="coerce").astype("datetime64[ns]")
+
+
+def _parse_group(values, fmt):
+    """Strings of one pattern -> int64 nanoseconds (NaT where the format still rejects them)"""
+    series = pd.Series(values, dtype=object)
+    if fmt == "epoch":
+        parsed = epoch_to_datetime(series)
+    elif fmt == "ISO8601":
+        parsed = pd.to_datetime(series, format=fmt, utc=True, errors="coerce").dt.tz_convert(None)
+    else:
+        parsed = pd.to_datetime(series, format=fmt, errors="coerce")
+    return parsed.to_numpy(dtype="datetime64[ns]").astype(np.int64)
+
+
+def _epoch_ns(value):
+    """One epoch number -> int64 nanoseconds (ms or s by magnitude), or NAT"""
+    try:
+        if isinstance(value, (int, np.integer)):
+            ns = int(value) * (10**6 if abs(value) >= EPOCH_MS_FROM else 10**9)
+        else:
+            value = float(value)
+            ns = pd.Timestamp(value if abs(value) >= EPOCH_MS_FROM else value * 1000, unit="ms").as_unit("ns").value
+    except (ValueError, OverflowError):
+        return NAT
+    return ns if -2**63 < ns < 2**63 else NAT
+
+
+def _parse_text(text):
+    """One string -> int64 nanoseconds, or NAT; the scalar twin of _parse_group"""
+    text = text.strip()
+    name = pattern_of(text)
+    if name is None:
+        return NAT
+    fmt = _FORMATS[name]
+    try:
+        if fmt == "epoch":
+            return _epoch_ns(int(text) if text.lstrip("-").isdigit() else text)
+        if fmt == "ISO8601":
+            stamp = pd.Timestamp(text)
+            if stamp.tzinfo is not None:
+                stamp = stamp.tz_convert(None)
+        else:
+            return (datetime.strptime(text, fmt) - _EPOCH) // timedelta(microseconds=1) * 1000
+    except (ValueError, OverflowError):
+        return NAT
+    return stamp.as_unit("ns").value
+
+
+class DatetimeNormalizer:
+    """parse() with a cache of already-parsed strings (cleared when it grows past `max_cache`)"""
+
+    def __init__(self, max_cache=1_000_000):
+        self.max_cache = max_cache
+        self.cache = {}
+
+    def _parse_strings(self, texts):
+        """Distinct strings -> int64 nanoseconds, through the cache"""
+        out = np.full(len(texts), NAT, dtype=np.int64)
+        todo = {}
+        for i, text in enumerate(texts):
+            cached = self.cache.get(text)
+            if cached is not None:
+                out[i] = cached
+                continue
+            name = pattern_of(text)
+            if name is not None:
+                todo.setdefault(name, []).append(i)
+        for name, positions in todo.items():
+            out[positions] = _parse_group([texts[i].strip() for i in positions], _FORMATS[name])
+        if len(self.cache) + len(texts) > self.max_cache:
+            self.cache.clear()
+        self.cache.update(zip(texts, out.tolist()))
+        return out
+
+    def parse(self, values):
+        """
+        Any sequence / Series of timestamps -> datetime64[ns] Series (same index).
+        Numbers are epoch times (ms or s by magnitude); datetimes pass through.
+        """
+        series = values if isinstance(values, pd.Series) else pd.Series(values, dtype=object)
+        if pd.api.types.is_datetime64_any_dtype(series.dtype):
+            if getattr(series.dt, "tz", None) is not None:
+                series = series.dt.tz_convert(None)
+            return series.astype("datetime64[ns]")
+        if pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+            return epoch_to_datetime(series)
+
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        uniques = np.asarray(uniques, dtype=object)
+        parsed = np.full(len(uniques), NAT, dtype=np.int64)
+        is_text = np.fromiter((isinstance(v, str) for v in uniques), dtype=bool, count=len(uniques))
+        if is_text.any():
+            parsed[is_text] = self._parse_strings(uniques[is_text].tolist())
+        for i in np.flatnonzero(~is_text):
+            value = uniques[i]
+            if isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, bool):
+                parsed[i] = _epoch_ns(value)
+            else:
+                stamp = pd.to_datetime(value, errors="coerce")
+                if stamp is not pd.NaT and stamp.tzinfo is not None:
+                    stamp = stamp.tz_convert(None)
+                parsed[i] = NAT if stamp is pd.NaT else stamp.as_unit("ns").value
+
+        result = np.append(parsed, NAT)[codes]   # code -1 (missing) picks the trailing NaT
+        return pd.Series(result.astype("datetime64[ns]"), index=series.index, name=series.name)
+
+    def parse_one(self, value):
+        """One timestamp -> naive datetime (UTC for aware / epoch inputs), or None; same rules as parse()"""
+        if value is None or isinstance(value, bool):
+            return None
+        if isinstance(value, str):
+            ns = self.cache.get(value)
+            if ns is None:
+                ns = _parse_text(value)
+                if len(self.cache) >= self.max_cache:
+                    self.cache.clear()
+                self.cache[value] = ns
+        elif isinstance(value, (int, float, np.integer, np.floating)):
+            ns = _epoch_ns(value)
+        else:
+            stamp = pd.to_datetime(value, errors="coerce")
+            if stamp is pd.NaT:
+                return None
+            if stamp.tzinfo is not None:
+                stamp = stamp.tz_convert(None)
+            ns = stamp.as_unit("ns").value
+        if ns == NAT:
+            return None
+        return _EPOCH + timedelta(microseconds=int(ns) // 1000)
+
+
+_default = DatetimeNormalizer()
+
+
+def parse_datetimes(values):
+    """Parse mixed-format timestamps with the shared, cached normalizer (see DatetimeNormalizer.parse)"""
+    return _default.parse(values)
+
+
+def parse_datetime(value):
+    """Parse one timestamp with the shared, cached normalizer (see DatetimeNormalizer.parse_one)"""
+    return _default.parse_one(value)
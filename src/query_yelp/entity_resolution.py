@@ -0,0 +1,156 @@
+"""
+Batch resolution of review `business_ref` values to Mongo `business_id`s.
+
+Instead of one chat completion per review row, the resolver
+  1. dedupes the refs,
+  2. asks the model for a small sample of mappings as one JSON object,
+  3. tries to compile the verified pairs into a local prefix-rewrite rule
+     (e.g. businessref_N -> businessid_N) and applies it to the whole column,
+  4. sends whatever the rule cannot map to the model in packed batches,
+     validating every answer against the known business_id set and
+     re-asking only for the failures.
+"""
+import json
+import re
+
+import pandas as pd
+
+
+def parse_json_object(text):
+    """Extract the first JSON object from a model reply (tolerates ``` fences and prose)"""
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end <= start:
+        raise ValueError(f"No JSON object in reply: {text[:80]!r}")
+    return json.loads(text[start:end + 1])
+
+
+def common_suffix_len(a, b):
+    n = 0
+    while n < min(len(a), len(b)) and a[-1 - n] == b[-1 - n]:
+        n += 1
+    return n
+
+
+class PrefixRule:
+    """Mapping that rewrites a fixed prefix of the ref into a fixed prefix of the id"""
+
+    def __init__(self, ref_prefix, id_prefix):
+        self.ref_prefix = ref_prefix
+        self.id_prefix = id_prefix
+        self._pattern = "^" + re.escape(ref_prefix)
+
+    @classmethod
+    def infer(cls, pairs):
+        """Infer a rule that reproduces every (ref, id) pair, or None if there is none"""
+        rules = set()
+        for ref, id_ in pairs:
+            n = common_suffix_len(ref, id_)
+            if n == 0:
+                return None
+            rules.add((ref[:len(ref) - n], id_[:len(id_) - n]))
+        if len(rules) != 1:
+            return None
+        return cls(*rules.pop())
+
+    def apply(self, refs: pd.Series):
+        """Vectorized rewrite; refs without the ref prefix map to NaN"""
+        refs = refs.astype("string")
+        mapped = refs.str.replace(self._pattern, self.id_prefix, regex=True)
+        return mapped.where(refs.str.startswith(self.ref_prefix))
+
+    def __repr__(self):
+        return f"{self.ref_prefix}* -> {self.id_prefix}*"
+
+
+class BatchRefResolver:
+    """Resolve business_ref values to known business_ids in a handful of requests"""
+
+    def __init__(self, client, deployment_name, known_ids, rule_hint=None,
+                 batch_size=100, sample_size=20, max_rounds=3, verbose=True):
+        self.client = client
+        self.deployment_name = deployment_name
+        self.known_ids = set(known_ids)
+        self.rule_hint = rule_hint
+        self.batch_size = batch_size
+        self.sample_size = sample_size
+        self.max_rounds = max_rounds
+        self.verbose = verbose
+        self.rule = None
+        self.calls = 0
+
+    def _ask(self, refs):
+        """One request mapping a batch of refs; returns only answers that name a known id"""
+        prompt = (
+            (f"The previously inferred mapping rule is:\n\n{self.rule_hint}\n\n" if self.rule_hint else "")
+            + "Map each of the following `business_ref` values to its `business_id`.\n"
+            f"business_refs: {json.dumps(refs)}\n\n"
+            "Respond only with a JSON object whose keys are the business_refs and whose values "
+            "are the corresponding business_ids, e.g. {\"ref_a\": \"id_a\", \"ref_b\": \"id_b\"}."
+        )
+        self.calls += 1
+        try:
+            response = self.client.chat.completions.create(
+                model=self.deployment_name,
+                messages=[
+                    {"role": "system", "content": "You are a data assistant that maps review business_refs to business_ids."},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.0,
+                max_tokens=max(50, 20 * len(refs)),
+                response_format={"type": "json_object"},
+            )
+            answer = parse_json_object(response.choices[0].message.content)
+        except Exception as e:
+            print(f"❌ GPT error on batch of {len(refs)} refs: {e}")
+            return {}
+        wanted = set(refs)
+        return {
+            ref: str(id_).strip().strip("'\"") for ref, id_ in answer.items()
+            if ref in wanted and str(id_).strip().strip("'\"") in self.known_ids
+        }
+
+    def _ask_all(self, refs):
+        """Resolve refs in packed batches, re-asking only for failures"""
+        resolved = {}
+        pending = list(refs)
+        for round_no in range(1, self.max_rounds + 1):
+            if not pending:
+                break
+            for i in range(0, len(pending), self.batch_size):
+                resolved.update(self._ask(pending[i:i + self.batch_size]))
+            pending = [ref for ref in pending if ref not in resolved]
+            if self.verbose and pending:
+                print(f"🔁 Round {round_no}: {len(pending)} refs unresolved, re-asking")
+        return resolved
+
+    def resolve(self, refs):
+        """Map every distinct non-null ref to a business_id (None if it could not be resolved)"""
+        unique = pd.Series(pd.unique(pd.Series(refs).dropna().astype(str)), dtype="string")
+        mapping = {}
+
+        # learn from a small sample, then try to turn it into a local rule
+        sample = unique.head(self.sample_size).tolist()
+        verified = self._ask_all(sample)
+        mapping.update(verified)
+        self.rule = PrefixRule.infer(verified.items()) if len(verified) >= 2 else None
+        if self.rule is not None:
+            mapped = self.rule.apply(unique)
+            ok = mapped.isin(self.known_ids).fillna(False)
+            mapping.update(dict(zip(unique[ok], mapped[ok])))
+            if self.verbose:
+                print(f"🧩 Compiled rule {self.rule!r} from {len(verified)} verified pairs; "
+                      f"mapped {int(ok.sum())}/{len(unique)} refs locally")
+
+        rest = [ref for ref in unique if ref not in mapping]
+        mapping.update(self._ask_all(rest))
+
+        if self.verbose:
+            missing = len(unique) - len(mapping)
+            print(f"✅ Resolved {len(mapping)}/{len(unique)} refs with {self.calls} calls"
+                  + (f" ({missing} unresolved)" if missing else ""))
+        return {ref: mapping.get(ref) for ref in unique}
+
+    def resolve_column(self, refs: pd.Series):
+        """Resolve a whole column; returns business_ids aligned with `refs`"""
+        mapping = self.resolve(refs)
+        return refs.map(mapping).astype(object).where(refs.notna(), None)
@@ -0,0 +1,228 @@
+"""
+Offline, deterministic stand-in for the chat completions endpoint.
+
+Lets the harness and the manual query scripts run without network access or
+API spend, e.g. to load-test the scheduler. Responses come from a script of
+regex rules and/or a recording, and each reply is delayed by a simulated
+latency plus generation time, both drawn from seeded distributions, so the
+same request always gets the same answer and the same delay.
+
+Script file (YAML):
+    default: "I don't know."
+    latency: {median: 0.8, sigma: 0.5}     # lognormal seconds before the first token
+    tokens_per_second: {median: 80, sigma: 0.3}   # lognormal generation speed per request (or a fixed number)
+    rules:                                 # first regex matching the last user message wins
+      - match: "located in Indianapolis"
+        response: "yes"
+      - match: "business_ref: businessref_(\\d+)"
+        response: "businessid_\\1"         # group references are expanded
+    recordings: fake_llm_recordings.jsonl  # optional {"messages": [...], "response": ...} lines
+
+Two ways to use it:
+  - in-process: FakeChatClient(...) has the same chat.completions.create as
+    the OpenAI SDK clients; sweep specs use it via `type: fake`.
+  - over HTTP: `python fake_llm.py serve --script fake.yaml --port 8765`, then
+    point AZURE_API_BASE (or any endpoint env var) at http://127.0.0.1:8765.
+    Both /v1/chat/completions and Azure's
+    /openai/deployments/<name>/chat/completions routes are served.
+"""
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from types import SimpleNamespace
+
+import yaml
+from openai.types.chat import ChatCompletion
+
+from llm_cache import messages_key
+
+
+def estimate_tokens(text):
+    """Rough tokenizer-free token count (~4 characters per token)"""
+    return max(1, len(text) // 4) if text else 0
+
+
+def make_completion(model, content=None, tool_calls=None, prompt_tokens=0, completion_tokens=0):
+    """Build an SDK ChatCompletion object for a synthetic reply"""
+    message = {"role": "assistant", "content": content}
+    if tool_calls:
+        message["tool_calls"] = tool_calls
+    return ChatCompletion.model_validate({
+        "id": f"chatcmpl-fake-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "finish_reason": "tool_calls" if tool_calls else "stop",
+            "message": message,
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    })
+
+
+class FakeChatClient:
+    """
+    Drop-in for AzureOpenAI / OpenAI clients that answers chat completions
+    from a script. `rules` is a list of {"match": regex, "response": str or
+    {"content": ..., "tool_calls": [...]}}; `recordings` maps messages_key()
+    hashes of exact requests to responses and takes precedence.
+    """
+
+    def __init__(self, rules=None, default="", recordings=None, latency_median=0.0,
+                 latency_sigma=0.0, tokens_per_second=None, tokens_per_second_sigma=0.0,
+                 seed=0, sleep=time.sleep):
+        self.rules = [(re.compile(r["match"], re.S), r["response"]) for r in (rules or [])]
+        self.default = default
+        self.recordings = recordings or {}
+        self.latency_median = latency_median
+        self.latency_sigma = latency_sigma
+        self.tokens_per_second = tokens_per_second
+        self.tokens_per_second_sigma = tokens_per_second_sigma
+        self.seed = seed
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    @classmethod
+    def from_script(cls, path, **overrides):
+        path = Path(path)
+        with open(path) as f:
+            script = yaml.safe_load(f) or {}
+        latency = script.get("latency") or {}
+        speed = script.get("tokens_per_second")
+        if not isinstance(speed, dict):
+            speed = {"median": speed}
+        recordings = {}
+        if script.get("recordings"):
+            recordings = load_recordings(path.parent / script["recordings"])
+        kwargs = {
+            "rules": script.get("rules"),
+            "default": script.get("default", ""),
+            "recordings": recordings,
+            "latency_median": latency.get("median", 0.0),
+            "latency_sigma": latency.get("sigma", 0.0),
+            "tokens_per_second": speed.get("median"),
+            "tokens_per_second_sigma": speed.get("sigma", 0.0),
+            "seed": script.get("seed", 0),
+        }
+        kwargs.update(overrides)
+        return cls(**kwargs)
+
+    def respond(self, model, messages, **params):
+        """Pick the scripted reply for a request: (content, tool_calls)"""
+        reply = self.recordings.get(messages_key(model, messages, **params))
+        if reply is None:
+            last_user = next((m.get("content") or "" for m in reversed(messages)
+                              if m.get("role") == "user"), "")
+            if not isinstance(last_user, str):
+                last_user = json.dumps(last_user, ensure_ascii=False)
+            reply = self.default
+            for pattern, response in self.rules:
+                match = pattern.search(last_user)
+                if match:
+                    reply = match.expand(response) if isinstance(response, str) else response
+                    break
+        if isinstance(reply, dict):
+            return reply.get("content"), reply.get("tool_calls")
+        return reply, None
+
+    def latency(self, key, completion_tokens):
+        """Deterministic simulated latency in seconds for a request hash: time to first token plus generation"""
+        rng = random.Random(f"{self.seed}:{key}")
+        delay = rng.lognormvariate(0.0, self.latency_sigma) * self.latency_median
+        if self.tokens_per_second:
+            speed = rng.lognormvariate(0.0, self.tokens_per_second_sigma) * self.tokens_per_second
+            delay += completion_tokens / speed
+        return delay
+
+    def _create(self, model, messages, **params):
+        messages = [dict(m) if not isinstance(m, dict) else m for m in messages]
+        content, tool_calls = self.respond(model, messages, **params)
+        prompt_tokens = sum(estimate_tokens(str(m.get("content") or "")) for m in messages)
+        completion_tokens = estimate_tokens(content or json.dumps(tool_calls or ""))
+        if params.get("max_tokens"):
+            completion_tokens = min(completion_tokens, params["max_tokens"])
+
+        delay = self.latency(messages_key(model, messages, **params), completion_tokens)
+        if delay > 0:
+            self._sleep(delay)
+        with self._lock:
+            self.calls += 1
+        return make_completion(model, content, tool_calls, prompt_tokens, completion_tokens)
+
+
+def load_recordings(path):
+    """Read {"model"?, "messages", "params"?, "response"} JSONL lines into a recordings map"""
+    recordings = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                rec = json.loads(line)
+                key = messages_key(rec.get("model", ""), rec["messages"], **rec.get("params", {}))
+                recordings[key] = rec["response"]
+    return recordings
+
+
+def serve(client, host="127.0.0.1", port=8765):
+    """Serve `client` as an OpenAI-compatible HTTP endpoint until interrupted"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            route = self.path.split("?", 1)[0]
+            if not route.endswith("/chat/completions"):
+                self.send_error(404, f"Unknown route: {route}")
+                return
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            # Azure puts the deployment in the path instead of the body
+            deployment = re.search(r"/deployments/([^/]+)/", route)
+            model = body.pop("model", None) or (deployment.group(1) if deployment else "fake")
+            messages = body.pop("messages", [])
+            body.pop("stream", None)
+            completion = client.chat.completions.create(model=model, messages=messages, **body)
+            payload = completion.model_dump_json(exclude_none=True).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    print(f"🧪 Fake LLM listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Offline deterministic chat completions endpoint")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_serve = sub.add_parser("serve", help="run an OpenAI-compatible HTTP server")
+    p_serve.add_argument("--script", default=None, help="script YAML (rules, default, latency, ...)")
+    p_serve.add_argument("--host", default="127.0.0.1")
+    p_serve.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    client = FakeChatClient.from_script(args.script) if args.script else FakeChatClient()
+    serve(client, args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,490 @@
+"""
+Federated queries over the db_clients in db_config.yaml.
+
+A logical plan of scans, filters, joins and aggregates is optimized before
+anything is read:
+  - filters are pushed below joins to the side that owns their columns, and
+    into the scans: a DuckDB scan gets a WHERE clause, a Mongo scan a find()
+    filter ($match) document;
+  - scans that declare their columns are pruned to the ones the plan uses,
+    so DuckDB selects and Mongo projects only those.
+Each source then returns an Arrow table, and the cross-source part of the
+plan (joins, leftover filters, aggregates, sorting) runs as one SQL statement
+in an in-memory DuckDB over those tables:
+
+    plan = (
+        Scan("user_dataset", "review", columns=["business_ref", "rating", "date"],
+             derive={"business_id": "replace(business_ref, 'businessref_', 'businessid_')"})
+        .filter(("date", ">=", "2018-01-01"))
+        .join(Scan("businessinfo_dataset", "business", columns=["business_id", "name"]), on="business_id")
+        .aggregate(["name"], n=("rating", "count"), avg_rating=("rating", "mean"))
+        .sort("n", descending=True)
+    )
+    df = execute(plan).to_pandas()
+    print(explain(plan))
+
+Predicates are (column, op, value) tuples with op in ==, !=, <, <=, >, >=,
+in, not in, is null, not null. Join keys can be derived per scan: a SQL
+expression (DuckDB sources only, evaluated in the source) or a callable
+taking the fetched DataFrame, e.g. an LLM-backed id resolver. Frame() wraps
+an in-memory DataFrame or Arrow table as a source.
+"""
+import copy
+import json
+import re
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+import pyarrow as pa
+
+from connections import get_manager
+
+
+# op -> (SQL operator, Mongo operator)
+OPS = {
+    "==": ("=", "$eq"),
+    "!=": ("<>", "$ne"),
+    "<": ("<", "$lt"),
+    "<=": ("<=", "$lte"),
+    ">": (">", "$gt"),
+    ">=": (">=", "$gte"),
+    "in": ("IN", "$in"),
+    "not in": ("NOT IN", "$nin"),
+    "is null": ("IS NULL", None),
+    "not null": ("IS NOT NULL", None),
+}
+
+# aggregate name -> SQL template
+AGGREGATES = {
+    "count": "count({})",
+    "sum": "sum({})",
+    "mean": "avg({})",
+    "avg": "avg({})",
+    "min": "min({})",
+    "max": "max({})",
+    "nunique": "count(DISTINCT {})",
+}
+
+
+def quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def check_predicate(predicate):
+    column, op, *_ = predicate
+    if op not in OPS:
+        raise ValueError(f"unsupported operator {op!r} in {predicate}")
+    return predicate
+
+
+def predicate_sql(predicate, params):
+    """(column, op, value) -> SQL condition, appending its parameters to `params`"""
+    column, op, *rest = predicate
+    sql_op = OPS[op][0]
+    if op in ("is null", "not null"):
+        return f"{quote(column)} {sql_op}"
+    value = rest[0]
+    if op in ("in", "not in"):
+        values = list(value)
+        if not values:
+            return "FALSE" if op == "in" else "TRUE"
+        params.extend(values)
+        return f"{quote(column)} {sql_op} ({', '.join('?' * len(values))})"
+    params.append(value)
+    return f"{quote(column)} {sql_op} ?"
+
+
+def predicates_mongo(predicates):
+    """[(column, op, value)] -> a Mongo filter document, one {op: value} condition per column where possible"""
+    conditions, extra = {}, []
+    for column, op, *rest in predicates:
+        if op == "is null":
+            mongo_op, value = "$eq", None
+        elif op == "not null":
+            mongo_op, value = "$ne", None
+        else:
+            mongo_op = OPS[op][1]
+            value = list(rest[0]) if op in ("in", "not in") else rest[0]
+        condition = conditions.setdefault(column, {})
+        if mongo_op in condition:
+            extra.append({column: {mongo_op: value}})   # same operator twice on one column
+        else:
+            condition[mongo_op] = value
+    return {**conditions, "$and": extra} if extra else conditions
+
+
+def to_arrow(rows, columns):
+    """Documents -> Arrow table; nested values become JSON text"""
+    if columns is None:
+        columns = list(dict.fromkeys(k for row in rows for k in row))
+    data = {}
+    for column in columns:
+        values = [row.get(column) for row in rows]
+        if any(isinstance(v, (dict, list)) for v in values):
+            values = [None if v is None else json.dumps(v, ensure_ascii=False, default=str) for v in values]
+        elif any(v is not None and not isinstance(v, (str, int, float, bool)) for v in values):
+            values = [None if v is None else str(v) for v in values]   # ObjectId, datetimes from Mongo
+        data[column] = pa.array(values)
+    return pa.table(data)
+
+
+# ---- logical plan ----
+
+class Node:
+    def filter(self, *predicates):
+        return Filter(self, [check_predicate(p) for p in predicates])
+
+    def join(self, other, on=None, left_on=None, right_on=None, how="inner"):
+        return Join(self, other, left_on or on, right_on or on, how)
+
+    def aggregate(self, by=(), **aggs):
+        return Aggregate(self, by, aggs)
+
+    def sort(self, by, descending=False):
+        return Sort(self, by, descending)
+
+    def limit(self, n):
+        return Limit(self, n)
+
+
+class Scan(Node):
+    """
+    Rows of `table` (DuckDB table or Mongo collection) from db_clients entry
+    `source`. `derive` adds columns: {name: SQL expression or callable(DataFrame)}.
+    """
+
+    def __init__(self, source, table, columns=None, where=(), derive=None, database=None):
+        self.source = source
+        self.table = table
+        self.columns = list(columns) if columns is not None else None
+        self.where = [check_predicate(p) for p in where]
+        self.derive = dict(derive or {})
+        self.database = database
+
+    def output_columns(self):
+        if self.columns is None:
+            return None
+        return self.columns + [c for c in self.derive if c not in self.columns]
+
+    def pushable(self, column):
+        """Whether a predicate on `column` can be evaluated by the source itself"""
+        return not callable(self.derive.get(column))
+
+    def __repr__(self):
+        return f"Scan({self.source}.{self.table})"
+
+
+class Frame(Node):
+    """An in-memory DataFrame / Arrow table used as a source"""
+
+    def __init__(self, data, name="frame"):
+        self.table = data if isinstance(data, pa.Table) else pa.Table.from_pandas(data, preserve_index=False)
+        self.name = name
+
+    def output_columns(self):
+        return list(self.table.column_names)
+
+    def __repr__(self):
+        return f"Frame({self.name})"
+
+
+class Filter(Node):
+    def __init__(self, child, predicates):
+        self.child = child
+        self.predicates = list(predicates)
+
+    def output_columns(self):
+        return self.child.output_columns()
+
+
+class Join(Node):
+    def __init__(self, left, right, left_on, right_on, how="inner"):
+        if how not in ("inner", "left"):
+            raise ValueError(f"unsupported join type {how!r}")
+        self.left = left
+        self.right = right
+        self.left_on = [left_on] if isinstance(left_on, str) else list(left_on)
+        self.right_on = [right_on] if isinstance(right_on, str) else list(right_on)
+        self.how = how
+
+    def output_columns(self):
+        left, right = self.left.output_columns(), self.right.output_columns()
+        if left is None or right is None:
+            return None
+        shared = {r for l, r in zip(self.left_on, self.right_on) if l == r}
+        return left + [c if c not in left else f"{c}_right" for c in right if c not in shared]
+
+
+class Aggregate(Node):
+    def __init__(self, child, by, aggs):
+        self.child = child
+        self.by = [by] if isinstance(by, str) else list(by)
+        self.aggs = {}
+        for name, (column, func) in aggs.items():
+            if func not in AGGREGATES:
+                raise ValueError(f"unsupported aggregate {func!r} for {name}")
+            self.aggs[name] = (column, func)
+
+    def output_columns(self):
+        return self.by + list(self.aggs)
+
+
+class Sort(Node):
+    def __init__(self, child, by, descending=False):
+        self.child = child
+        self.by = [by] if isinstance(by, str) else list(by)
+        self.descending = descending
+
+    def output_columns(self):
+        return self.child.output_columns()
+
+
+class Limit(Node):
+    def __init__(self, child, n):
+        self.child = child
+        self.n = int(n)
+
+    def output_columns(self):
+        return self.child.output_columns()
+
+
+# ---- optimizer ----
+
+def push_filters(node, predicates=()):
+    """Move predicates as far down as they can go; what cannot move stays in a Filter"""
+    predicates = list(predicates)
+    if isinstance(node, Filter):
+        return push_filters(node.child, predicates + node.predicates)
+    if isinstance(node, Scan):
+        scan = copy.copy(node)
+        pushed = [p for p in predicates if scan.pushable(p[0])]
+        scan.where = node.where + pushed
+        residual = [p for p in predicates if not scan.pushable(p[0])]
+        return Filter(scan, residual) if residual else scan
+    if isinstance(node, Join):
+        left_cols, right_cols = node.left.output_columns(), node.right.output_columns()
+        to_left, to_right, residual = [], [], []
+        for p in predicates:
+            column = p[0]
+            on_left = left_cols is not None and column in left_cols
+            on_right = right_cols is not None and column in right_cols
+            if on_left:
+                to_left.append(p)
+                # a predicate on a shared inner-join key holds on both sides
+                if node.how == "inner" and column in node.left_on and \
+                        node.right_on[node.left_on.index(column)] == column:
+                    to_right.append(p)
+            elif on_right and node.how == "inner" and column not in (left_cols or []):
+                to_right.append(p)
+            else:
+                residual.append(p)
+        join = copy.copy(node)
+        join.left = push_filters(node.left, to_left)
+        join.right = push_filters(node.right, to_right)
+        return Filter(join, residual) if residual else join
+    if isinstance(node, (Aggregate, Sort, Limit)):
+        # predicates above these change their meaning; keep them here
+        inner = copy.copy(node)
+        inner.child = push_filters(node.child)
+        return Filter(inner, predicates) if predicates else inner
+    return Filter(node, predicates) if predicates else node
+
+
+def prune_columns(node, required=None):
+    """Narrow scans with declared columns to those in `required` (None = everything)"""
+    if isinstance(node, Scan):
+        if required is None or node.columns is None:
+            return node
+        scan = copy.copy(node)
+        needed = set(required) | {p[0] for p in node.where}
+        scan.derive = {name: expr for name, expr in node.derive.items() if name in needed}
+        for expr in scan.derive.values():
+            # a callable may read any column; a SQL expression reads the ones it names
+            needed |= set(node.columns) if callable(expr) else \
+                {c for c in node.columns if re.search(rf"\b{re.escape(c)}\b", expr)}
+        scan.columns = [c for c in node.columns if c in needed]
+        return scan
+    if isinstance(node, Frame):
+        return node
+    if isinstance(node, Filter):
+        out = copy.copy(node)
+        out.child = prune_columns(node.child, None if required is None else set(required) | {p[0] for p in node.predicates})
+        return out
+    if isinstance(node, Join):
+        out = copy.copy(node)
+        if required is None:
+            out.left, out.right = prune_columns(node.left), prune_columns(node.right)
+            return out
+        required = set(required)
+        right_cols = node.right.output_columns() or []
+        # a "<col>_right" output comes from the right side's <col>
+        right_required = {c[:-len("_right")] for c in required if c.endswith("_right")}
+        out.left = prune_columns(node.left, required | set(node.left_on))
+        out.right = prune_columns(node.right, ({c for c in required if c in right_cols} | right_required)
+                                  | set(node.right_on))
+        return out
+    if isinstance(node, Aggregate):
+        out = copy.copy(node)
+        out.child = prune_columns(node.child, set(node.by) | {c for c, _ in node.aggs.values() if c != "*"})
+        return out
+    if isinstance(node, Sort):
+        out = copy.copy(node)
+        out.child = prune_columns(node.child, None if required is None else set(required) | set(node.by))
+        return out
+    if isinstance(node, Limit):
+        out = copy.copy(node)
+        out.child = prune_columns(node.child, required)
+        return out
+    return node
+
+
+def optimize(plan):
+    return prune_columns(push_filters(plan))
+
+
+# ---- execution ----
+
+class Federation:
+    """Runs plans against the sources of a ConnectionManager"""
+
+    def __init__(self, manager=None):
+        self.manager = manager or get_manager()
+
+    def source_type(self, scan):
+        clients = self.manager.config.get("db_clients", {})
+        if scan.source not in clients:
+            raise KeyError(f"no client {scan.source!r} in db_config.yaml (has {list(clients)})")
+        return clients[scan.source]["db_type"]
+
+    def database_name(self, scan):
+        """Mongo database of a scan: explicit, else the dump folder's name (what mongorestore creates)"""
+        if scan.database:
+            return scan.database
+        _, cfg = self.manager.client_config(scan.source, "mongo")
+        return Path(cfg["dump_folder"]).name if cfg.get("dump_folder") else cfg["db_name"]
+
+    def duckdb_query(self, scan):
+        """(SQL, params) that scan reads from its DuckDB source"""
+        select = ", ".join(quote(c) for c in scan.columns) if scan.columns is not None else "*"
+        select += "".join(f", {expr} AS {quote(name)}" for name, expr in scan.derive.items() if not callable(expr))
+        sql = f"SELECT {select} FROM {quote(scan.table)}"
+        params = []
+        if scan.where:
+            conditions = " AND ".join(predicate_sql(p, params) for p in scan.where)
+            sql = f"SELECT * FROM ({sql}) AS src WHERE {conditions}"
+        return sql, params
+
+    def mongo_query(self, scan):
+        """(filter, projection) that scan sends to its Mongo source"""
+        if any(not callable(expr) for expr in scan.derive.values()):
+            raise ValueError(f"{scan}: SQL-derived columns need a DuckDB source; derive with a callable instead")
+        projection = {"_id": 0}
+        if scan.columns is not None:
+            projection.update({c: 1 for c in scan.columns if c != "_id"})
+        return predicates_mongo(scan.where), projection
+
+    def fetch(self, scan):
+        """Arrow table of the rows and columns the (optimized) scan asks its source for"""
+        if self.source_type(scan) == "duckdb":
+            sql, params = self.duckdb_query(scan)
+            table = self.manager.duckdb(scan.source).execute(sql, params).fetch_arrow_table()
+        else:
+            match, projection = self.mongo_query(scan)
+            collection = self.manager.mongo(scan.source)[self.database_name(scan)][scan.table]
+            table = to_arrow(list(collection.find(match, projection)), scan.columns)
+        derived = {name: func for name, func in scan.derive.items() if callable(func)}
+        if derived:
+            df = table.to_pandas()
+            for name, func in derived.items():
+                df[name] = func(df)
+            table = pa.Table.from_pandas(df, preserve_index=False)
+        return table
+
+    def compile(self, node, con, params):
+        """SQL over registered Arrow tables for `node` -> (SQL, output columns)"""
+        if isinstance(node, (Scan, Frame)):
+            table = self.fetch(node) if isinstance(node, Scan) else node.table
+            name = f"src_{id(node):x}"
+            con.register(name, table)
+            return f"SELECT * FROM {name}", list(table.column_names)
+        if isinstance(node, Filter):
+            sql, columns = self.compile(node.child, con, params)
+            if not node.predicates:
+                return sql, columns
+            conditions = " AND ".join(predicate_sql(p, params) for p in node.predicates)
+            return f"SELECT * FROM ({sql}) AS t WHERE {conditions}", columns
+        if isinstance(node, Join):
+            left_sql, left_cols = self.compile(node.left, con, params)
+            right_sql, right_cols = self.compile(node.right, con, params)
+            shared = {r for l, r in zip(node.left_on, node.right_on) if l == r}
+            select, columns = ["l.*"], list(left_cols)
+            for c in right_cols:
+                if c in shared:
+                    continue
+                alias = c if c not in left_cols else f"{c}_right"
+                select.append(f"r.{quote(c)} AS {quote(alias)}")
+                columns.append(alias)
+            on = " AND ".join(f"l.{quote(l)} = r.{quote(r)}" for l, r in zip(node.left_on, node.right_on))
+            kind = "INNER" if node.how == "inner" else "LEFT"
+            return (f"SELECT {', '.join(select)} FROM ({left_sql}) AS l {kind} JOIN ({right_sql}) AS r ON {on}",
+                    columns)
+        if isinstance(node, Aggregate):
+            sql, _ = self.compile(node.child, con, params)
+            items = [quote(c) for c in node.by] + [
+                f"{AGGREGATES[func].format('*' if column == '*' else quote(column))} AS {quote(name)}"
+                for name, (column, func) in node.aggs.items()
+            ]
+            group = f" GROUP BY {', '.join(quote(c) for c in node.by)}" if node.by else ""
+            return f"SELECT {', '.join(items)} FROM ({sql}) AS t{group}", node.output_columns()
+        if isinstance(node, Sort):
+            sql, columns = self.compile(node.child, con, params)
+            direction = "DESC" if node.descending else "ASC"
+            order = ", ".join(f"{quote(c)} {direction}" for c in node.by)
+            return f"SELECT * FROM ({sql}) AS t ORDER BY {order}", columns
+        if isinstance(node, Limit):
+            sql, columns = self.compile(node.child, con, params)
+            return f"SELECT * FROM ({sql}) AS t LIMIT {node.n}", columns
+        raise TypeError(f"unknown plan node {node!r}")
+
+    def execute(self, plan):
+        """Optimize and run `plan`; returns a pyarrow Table"""
+        con = duckdb.connect()
+        try:
+            params = []
+            sql, _ = self.compile(optimize(plan), con, params)
+            return con.execute(sql, params).fetch_arrow_table()
+        finally:
+            con.close()
+
+    def explain(self, plan):
+        """What each source is asked for after optimization, one line per scan"""
+        lines = []
+
+        def walk(node):
+            if isinstance(node, Scan):
+                if self.source_type(node) == "duckdb":
+                    sql, params = self.duckdb_query(node)
+                    lines.append(f"duckdb {node.source}: {sql}  {params}")
+                else:
+                    match, projection = self.mongo_query(node)
+                    lines.append(f"mongo {node.source}: {self.database_name(node)}.{node.table}"
+                                 f".find({match}, {projection})")
+                if any(callable(e) for e in node.derive.values()):
+                    lines.append(f"  + derived locally: {[n for n, e in node.derive.items() if callable(e)]}")
+            elif isinstance(node, Frame):
+                lines.append(f"frame {node.name}: {node.table.num_rows} rows")
+            for child in ("child", "left", "right"):
+                if hasattr(node, child):
+                    walk(getattr(node, child))
+
+        walk(optimize(plan))
+        return "\n".join(lines)
+
+
+def execute(plan, manager=None):
+    return Federation(manager).execute(plan)
+
+
+def explain(plan, manager=None):
+    return Federation(manager).explain(plan)
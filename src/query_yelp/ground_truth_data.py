@@ -0,0 +1,77 @@
+"""
+Shared tables and intermediates for the queryN/ground_truth.py scripts.
+
+Each ground_truth.py declares the columns it reads in a module-level `TABLES`
+dict and computes its answer from a GroundTruthData with `compute(data)`.
+The intermediates below are built lazily, at most once per GroundTruthData,
+so regenerate_ground_truth.py can share one load of each table (and one
+review→business join, one category index, one attribute parse) across all
+queries. Shared frames must be treated as read-only by the queries.
+"""
+from functools import cached_property
+from pathlib import Path
+
+import pandas as pd
+
+from category_index import CategoryIndex
+from checkin_store import CheckinStore
+from dataset_cache import DATASET_DIR, load_table
+from yelp_attributes import normalize_attributes
+
+
+def merge_columns(*table_specs):
+    """Union several {table: [columns]} specs, keeping first-seen column order"""
+    merged = {}
+    for spec in table_specs:
+        for table, columns in spec.items():
+            merged.setdefault(table, [])
+            merged[table] += [c for c in columns if c not in merged[table]]
+    return merged
+
+
+class GroundTruthData:
+    """Ground-truth tables by name ("business", "review", "user", ...) plus shared intermediates"""
+
+    def __init__(self, tables, paths=None):
+        self.tables = tables
+        self.paths = paths or {}
+
+    @classmethod
+    def load(cls, columns, dataset_dir=DATASET_DIR):
+        """Load each table in `columns` ({table: [columns]}) from `dataset_dir` once"""
+        return cls.from_paths(columns, **{
+            table: Path(dataset_dir) / f"{table}_gt.json" for table in columns
+        })
+
+    @classmethod
+    def from_paths(cls, columns, **paths):
+        """Load tables from explicit JSONL paths, e.g. from_paths(TABLES, business=..., review=...)"""
+        return cls({table: load_table(path, columns.get(table)) for table, path in paths.items()}, paths)
+
+    def __getitem__(self, table):
+        return self.tables[table]
+
+    @cached_property
+    def review_business(self):
+        """Reviews inner-joined with their business row"""
+        return pd.merge(self["review"], self["business"], on="business_id", how="inner",
+                        suffixes=("", "_business"))
+
+    @cached_property
+    def category_index(self):
+        """Business × category incidence index, persisted per business file when its path is known"""
+        if "business" in self.paths:
+            return CategoryIndex.for_dataset(self.paths["business"])
+        return CategoryIndex.from_frame(self["business"])
+
+    @cached_property
+    def checkins(self):
+        """Per-business sorted check-in times with range queries, persisted per check-in file when its path is known"""
+        if "checkin" in self.paths:
+            return CheckinStore.for_dataset(self.paths["checkin"])
+        return CheckinStore.from_frame(self["checkin"])
+
+    @cached_property
+    def business_attributes(self):
+        """Normalized attribute columns (see yelp_attributes), aligned with the business table"""
+        return normalize_attributes(self["business"]["attributes"])
@@ -0,0 +1,245 @@
+"""
+Span instrumentation for agent runs, exported as a Chrome trace.
+
+While a Tracer is enabled, every agent run records where its time goes:
+  - run:        the whole run_baseline_agent call (Tracer.run)
+  - model:      each chat completion, with prompt / completion tokens and attempts
+  - rate_limit: time spent waiting for the token bucket or retry backoff first
+  - tool:       the gap between a reply asking for tool calls and the next request,
+                i.e. the DB round trips the agent ran, with the tool names and the
+                rows each result holds
+  - validation: each Validator call (validators.py)
+Model and rate-limit spans come from RateLimitedClient and tool spans are
+derived from the conversation it sees, since the agent's tools live in the
+scaffold; anything else can be timed with span().
+
+The trace opens in chrome://tracing or https://ui.perfetto.dev, and
+summarize() gives per-query (and per model / description in a sweep)
+percentiles of each span category:
+
+    tracer = instrumentation.enable()
+    with tracer.run(query_id="query1", run_id=1):
+        ...
+    tracer.export_chrome("runs.trace.json")
+    print(instrumentation.summarize(tracer.events))
+
+    python instrumentation.py pass_at_k_results_wh_gpt-4.1.trace.json      # summary of a saved trace
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+
+CATEGORIES = ("run", "model", "rate_limit", "tool", "validation")
+# run tags that split the summary besides query_id (sweep cells)
+CELL_TAGS = ("model", "description")
+
+
+def _get(obj, key, default=None):
+    """Field of a chat message / response, whether it is a dict or an SDK object"""
+    if isinstance(obj, dict):
+        return obj.get(key, default)
+    return getattr(obj, key, default)
+
+
+def count_rows(content):
+    """Rows in a tool result: length of a JSON list (or of a dict's rows/data list), else non-empty lines"""
+    if not content:
+        return 0
+    if not isinstance(content, str):
+        content = str(content)
+    try:
+        value = json.loads(content)
+    except ValueError:
+        return sum(1 for line in content.splitlines() if line.strip())
+    if isinstance(value, dict):
+        value = next((value[k] for k in ("rows", "data", "result", "results") if isinstance(value.get(k), list)), value)
+    return len(value) if isinstance(value, list) else 1
+
+
+class Tracer:
+    """Thread-safe collector of complete ("X") spans, timestamped from its creation"""
+
+    def __init__(self):
+        self.events = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._t0 = time.perf_counter()
+        self._tids = {}
+
+    def _tid(self):
+        ident = threading.get_ident()
+        with self._lock:
+            return self._tids.setdefault(ident, len(self._tids) + 1)
+
+    def add(self, name, cat, start, end, **args):
+        """Record a span from perf_counter() times `start` to `end`, tagged with the current run"""
+        event = {
+            "name": name, "cat": cat, "ph": "X", "pid": os.getpid(), "tid": self._tid(),
+            "ts": (start - self._t0) * 1e6, "dur": max(end - start, 0.0) * 1e6,
+            "args": {**getattr(self._local, "run", {}), **args},
+        }
+        with self._lock:
+            self.events.append(event)
+        return event
+
+    @contextmanager
+    def span(self, name, cat, **args):
+        """Time the block; `args` can be updated inside it (e.g. rows once they are known)"""
+        start = time.perf_counter()
+        try:
+            yield args
+        finally:
+            self.add(name, cat, start, time.perf_counter(), **args)
+
+    @contextmanager
+    def run(self, **attrs):
+        """Tag every span of this thread with `attrs` (query_id, run_id, ...) and time the run"""
+        self._local.run = attrs
+        self._local.pending_tools = None
+        try:
+            with self.span(attrs.get("query_id", "run"), "run"):
+                yield
+        finally:
+            self._local.run = {}
+            self._local.pending_tools = None
+
+    def model_call(self, messages, response, requested, start, end, attempts=1):
+        """
+        Record one chat completion: requested (call entry) -> start (sent after
+        rate limiting) -> end (reply). Also closes the tool span opened by the
+        previous reply on this thread, if it asked for tool calls.
+        """
+        messages = list(messages or ())
+        pending = getattr(self._local, "pending_tools", None)
+        if pending is not None:
+            tools_end, names = pending[0], pending[1]
+            results = []
+            for message in reversed(messages):  # tool results since the reply that asked for them
+                role = _get(message, "role")
+                if role == "assistant":
+                    break
+                if role == "tool":
+                    results.append(count_rows(_get(message, "content")))
+            self.add(",".join(names) or "tool", "tool", tools_end, requested,
+                     tools=names, calls=len(names), rows=sum(results), rows_per_call=results[::-1])
+        if start - requested > 1e-3:
+            self.add("rate_limit", "rate_limit", requested, start)
+
+        usage = _get(response, "usage")
+        choices = _get(response, "choices") or []
+        message = _get(choices[0], "message") if choices else None
+        tool_calls = (_get(message, "tool_calls") or []) if message is not None else []
+        self.add("chat.completions", "model", start, end,
+                 prompt_tokens=_get(usage, "prompt_tokens", 0) or 0,
+                 completion_tokens=_get(usage, "completion_tokens", 0) or 0,
+                 messages=len(messages), tool_calls=len(tool_calls), attempts=attempts)
+        names = [_get(_get(call, "function"), "name", "tool") for call in tool_calls]
+        self._local.pending_tools = (end, names) if tool_calls else None
+
+    def export_chrome(self, path):
+        """Write the spans as a Chrome trace JSON file (atomically)"""
+        with self._lock:
+            events = list(self.events)
+            tids = dict(self._tids)
+        meta = [{"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": f"worker {tid}"}}
+                for tid in tids.values()]
+        tmp = f"{path}.tmp{os.getpid()}"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": meta + events, "displayTimeUnit": "ms"}, f, ensure_ascii=False, default=str)
+        os.replace(tmp, path)
+        return path
+
+
+def load_chrome(path):
+    """Complete spans of a Chrome trace file written by export_chrome"""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    events = data["traceEvents"] if isinstance(data, dict) else data
+    return [e for e in events if e.get("ph") == "X"]
+
+
+def summarize(events, percentiles=(50, 90, 99)):
+    """
+    Per (model, description, query_id, category) span statistics in seconds:
+    count, total, mean, percentiles and max, the category's share of run time,
+    and the token (model spans) and row (tool spans) totals. model and
+    description are left out when no span carries them.
+    """
+    spans = [e for e in events if e.get("ph") == "X"]
+    if not spans:
+        return pd.DataFrame()
+    keys = [k for k in CELL_TAGS if any(k in e["args"] for e in spans)] + ["query_id"]
+    df = pd.DataFrame([
+        {**{k: e["args"].get(k, "-") for k in keys}, "cat": e["cat"], "seconds": e["dur"] / 1e6,
+         "prompt_tokens": e["args"].get("prompt_tokens", 0), "completion_tokens": e["args"].get("completion_tokens", 0),
+         "rows": e["args"].get("rows", 0)}
+        for e in spans
+    ])
+    grouped = df.groupby(keys + ["cat"], sort=True)
+    out = grouped["seconds"].agg(count="size", total="sum", mean="mean", max="max")
+    for p in percentiles:
+        out[f"p{p}"] = grouped["seconds"].quantile(p / 100)
+    out = out[["count", "total", "mean"] + [f"p{p}" for p in percentiles] + ["max"]]
+    out[["prompt_tokens", "completion_tokens", "rows"]] = grouped[["prompt_tokens", "completion_tokens", "rows"]].sum()
+    out = out.reset_index()
+    run_total = out.loc[out["cat"] == "run", keys + ["total"]].rename(columns={"total": "_run_total"})
+    out = out.merge(run_total, on=keys, how="left")
+    out["share"] = out["total"] / out.pop("_run_total")
+    order = {cat: i for i, cat in enumerate(CATEGORIES)}
+    out["_order"] = out["cat"].map(lambda c: order.get(c, len(order)))
+    return out.sort_values(keys + ["_order"], kind="stable").drop(columns="_order").reset_index(drop=True)
+
+
+_tracer = None
+
+
+def enable():
+    """Start collecting spans process-wide; returns the Tracer"""
+    global _tracer
+    _tracer = Tracer()
+    return _tracer
+
+
+def disable():
+    global _tracer
+    _tracer = None
+
+
+def current():
+    """The enabled Tracer, or None (instrumented code checks this and does nothing when off)"""
+    return _tracer
+
+
+@contextmanager
+def span(name, cat, **args):
+    """Tracer.span on the enabled tracer; a no-op when tracing is off"""
+    tracer = _tracer
+    if tracer is None:
+        yield args
+        return
+    with tracer.span(name, cat, **args) as span_args:
+        yield span_args
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Per-query latency percentiles of a saved trace")
+    parser.add_argument("trace", help="Chrome trace JSON written by run_experiments.py")
+    parser.add_argument("-o", "--output", default=None, help="CSV path; default prints to stdout")
+    args = parser.parse_args()
+
+    df = summarize(load_chrome(args.trace))
+    if args.output:
+        df.to_csv(args.output, index=False)
+        print(f"💾 Saved latency summary to: {args.output}")
+    else:
+        print(df.to_string(index=False, float_format=lambda x: f"{x:.3f}"))
+
+
+if __name__ == "__main__":
+    main()
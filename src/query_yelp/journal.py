@@ -0,0 +1,77 @@
+"""
+Append-only journal of individual agent runs.
+
+Every finished (query_id, run_id) is written as one JSON line and fsync'd
+before the next run is scheduled, so an interrupted sweep loses at most the
+runs that were still in flight. Aggregate pass@k tables are derived from the
+journal rather than stored as the source of truth.
+"""
+import json
+import os
+import threading
+import time
+
+
+class RunJournal:
+    """
+    JSONL journal of {model, description, query_id, run_id, success, latency,
+    tokens, ts} records. A run is identified by KEY_FIELDS; records written
+    before sweeps existed carry no model / description, and `defaults` fills
+    those in (e.g. the single-model run they belong to) so both spellings of
+    the same run match.
+    """
+
+    KEY_FIELDS = ("model", "description", "query_id", "run_id")
+
+    def __init__(self, path, defaults=None):
+        self.path = path
+        self.defaults = dict(defaults or {})
+        self._lock = threading.Lock()
+        self._checked_tail = False
+
+    def replay(self):
+        """
+        Read every complete record back, in write order. A torn last line
+        (crash mid-write) is ignored; if a run was recorded twice, the later
+        record wins.
+        """
+        if not os.path.exists(self.path):
+            return []
+        records = {}
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    break
+                try:
+                    rec = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                key = self.key(rec)
+                records.pop(key, None)
+                records[key] = rec
+        return list(records.values())
+
+    def key(self, record):
+        """The run a record belongs to"""
+        return tuple(record.get(k, self.defaults.get(k)) for k in self.KEY_FIELDS)
+
+    def append(self, **record):
+        """Durably append one run record; safe to call from several threads"""
+        record.setdefault("ts", time.time())
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                if not self._checked_tail:
+                    # terminate a torn line left by a crash so it stays a single bad record
+                    if f.tell() > 0 and not self._ends_with_newline():
+                        f.write("\n")
+                    self._checked_tail = True
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+        return record
+
+    def _ends_with_newline(self):
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
@@ -0,0 +1,205 @@
+"""
+Streaming JSONL reader with projection and predicate pushdown.
+
+Reads a JSONL file in chunks of lines and yields pyarrow RecordBatches, so
+memory stays flat no matter how large the file is. Predicates are evaluated
+while parsing, before a row is ever materialized in a batch:
+
+    from jsonl_stream import DateRange, Eq, In, read_batches, read_table
+
+    batches = read_batches("origin_dataset/review_query.json",
+                           columns=["business_ref", "rating", "date"],
+                           where=[DateRange("date", "2018-01-01", "2019-01-01")])
+    df = read_table("origin_dataset/yelp_business_light.json", where=[Eq("city", "Indianapolis")]).to_pandas()
+
+Eq / In on plain ASCII strings also prefilter the raw bytes of each line, so
+lines that cannot match are skipped without being decoded. Decoding uses
+orjson when it is installed, else the standard json module.
+"""
+import json
+import re
+from abc import ABC, abstractmethod
+
+import pyarrow as pa
+
+from datetime_normalizer import parse_datetime
+
+try:
+    import orjson
+    loads = orjson.loads
+except ImportError:  # optional speed-up
+    loads = json.loads
+
+
+_PLAIN = re.compile(r"[ -!#-.0-\[\]-~]*")   # printable ASCII without '"', '/' or '\', never escaped
+
+
+class Predicate(ABC):
+    """A condition on one column. `needles` (raw bytes, any must occur) enable the line prefilter"""
+    column = None
+    needles = None
+
+    @abstractmethod
+    def __call__(self, value):
+        """Whether a row whose `column` holds `value` passes"""
+
+
+def _needle(value):
+    if isinstance(value, str) and _PLAIN.fullmatch(value):
+        return json.dumps(value).encode("ascii")
+    return None
+
+
+class Eq(Predicate):
+    def __init__(self, column, value):
+        self.column = column
+        self.value = value
+        needle = _needle(value)
+        self.needles = [needle] if needle else None
+
+    def __call__(self, value):
+        return value == self.value
+
+    def __repr__(self):
+        return f"Eq({self.column!r}, {self.value!r})"
+
+
+class In(Predicate):
+    MAX_NEEDLES = 64
+
+    def __init__(self, column, values):
+        self.column = column
+        self.values = frozenset(values)
+        needles = [_needle(v) for v in self.values]
+        self.needles = needles if len(needles) <= self.MAX_NEEDLES and all(needles) else None
+
+    def __call__(self, value):
+        return value in self.values
+
+    def __repr__(self):
+        return f"In({self.column!r}, <{len(self.values)} values>)"
+
+
+class Range(Predicate):
+    """lo <= key(value) < hi; either bound may be None. Rows whose value cannot be keyed fail"""
+
+    def __init__(self, column, lo=None, hi=None, key=None):
+        self.column = column
+        self.key = key
+        self.lo = key(lo) if key and lo is not None else lo
+        self.hi = key(hi) if key and hi is not None else hi
+
+    def __call__(self, value):
+        if self.key is not None:
+            value = self.key(value)
+        if value is None:
+            return False
+        return (self.lo is None or value >= self.lo) and (self.hi is None or value < self.hi)
+
+    def __repr__(self):
+        return f"Range({self.column!r}, {self.lo!r}, {self.hi!r})"
+
+
+class DateRange(Range):
+    """start <= date < end, with the column and bounds parsed by datetime_normalizer.parse_datetime()"""
+
+    def __init__(self, column, start=None, end=None):
+        super().__init__(column, start, end, key=parse_datetime)
+
+
+class ScanStats:
+    def __init__(self):
+        self.lines = 0
+        self.prefiltered = 0
+        self.parsed = 0
+        self.matched = 0
+        self.errors = 0
+
+    def __repr__(self):
+        return (f"ScanStats(lines={self.lines}, prefiltered={self.prefiltered}, parsed={self.parsed}, "
+                f"matched={self.matched}, errors={self.errors})")
+
+
+def iter_records(path, columns=None, where=(), chunk_bytes=1 << 22, on_error="raise", stats=None):
+    """Yield projected dicts for the rows of a JSONL file that satisfy every predicate in `where`"""
+    where = list(where)
+    prefilters = [p.needles for p in where if p.needles]
+    stats = stats if stats is not None else ScanStats()
+    line_no = 0
+    with open(path, "rb") as f:
+        for lines in iter(lambda: f.readlines(chunk_bytes), []):
+            for line in lines:
+                line_no += 1
+                if not line.strip():
+                    continue
+                stats.lines += 1
+                if prefilters and not all(any(n in line for n in needles) for needles in prefilters):
+                    stats.prefiltered += 1
+                    continue
+                try:
+                    record = loads(line)
+                except ValueError as e:
+                    stats.errors += 1
+                    if on_error == "raise":
+                        raise ValueError(f"{path}:{line_no}: invalid JSON ({e})") from e
+                    continue
+                stats.parsed += 1
+                if all(p(record.get(p.column)) for p in where):
+                    stats.matched += 1
+                    yield record if columns is None else {c: record.get(c) for c in columns}
+
+
+def read_batches(path, columns=None, where=(), batch_size=65536, schema=None, **kwargs):
+    """
+    Yield pyarrow RecordBatches of at most `batch_size` matching rows. Without
+    `schema` each batch's types are inferred from its own rows (a column that
+    is all null in one batch is typed null there); read_table() unifies them.
+    """
+    if schema is not None and columns is None:
+        columns = schema.names
+    rows = []
+    for record in iter_records(path, columns, where, **kwargs):
+        rows.append(record)
+        if len(rows) >= batch_size:
+            yield pa.RecordBatch.from_pylist(rows, schema=schema)
+            rows = []
+    if rows:
+        yield pa.RecordBatch.from_pylist(rows, schema=schema)
+
+
+def read_table(path, columns=None, where=(), batch_size=65536, schema=None, **kwargs):
+    """All matching rows as one pyarrow Table (null-typed columns are promoted across batches)"""
+    tables = [pa.Table.from_batches([batch])
+              for batch in read_batches(path, columns, where, batch_size, schema, **kwargs)]
+    if not tables:
+        empty = schema or pa.schema([(c, pa.null()) for c in (columns or [])])
+        return empty.empty_table()
+    return pa.concat_tables(tables, promote_options="default")
+
+
+def main():
+    import argparse
+    import time
+    parser = argparse.ArgumentParser(description="Scan a JSONL file with projection and predicates")
+    parser.add_argument("path")
+    parser.add_argument("--columns", nargs="*", default=None)
+    parser.add_argument("--eq", nargs=2, action="append", default=[], metavar=("COLUMN", "VALUE"))
+    parser.add_argument("--date-range", nargs=3, action="append", default=[], metavar=("COLUMN", "START", "END"))
+    parser.add_argument("-o", "--output", default=None, help="write the result as Parquet")
+    args = parser.parse_args()
+
+    where = [Eq(c, v) for c, v in args.eq] + [DateRange(c, s, e) for c, s, e in args.date_range]
+    stats = ScanStats()
+    t0 = time.perf_counter()
+    table = read_table(args.path, args.columns, where, stats=stats)
+    print(f"🔎 {stats} in {time.perf_counter() - t0:.2f}s → {table.num_rows} rows x {table.num_columns} columns")
+    if args.output:
+        import pyarrow.parquet as pq
+        pq.write_table(table, args.output)
+        print(f"💾 Saved to {args.output}")
+    else:
+        print(table.slice(0, 5).to_pandas().to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Content-addressed record/replay cache for chat completions.
+
+Responses are stored in SQLite keyed by a hash of (model, messages, params),
+so re-running a deterministic script after a code change only pays for the
+prompts that actually changed. The least recently used entries are evicted
+once the stored responses exceed max_bytes.
+
+Modes:
+  - record:      serve hits from the cache; on a miss call the API and store the reply
+  - replay:      serve from the cache only; a miss raises CacheMiss (no API calls at all)
+  - passthrough: ignore the cache; every call goes to the API
+
+Only temperature-0 requests are cached: sampled calls (e.g. agent runs, where
+n independent samples are the point) always pass through.
+
+The manual query scripts wrap their client with wrap_client(), configured by
+LLM_CACHE_MODE, LLM_CACHE_PATH and LLM_CACHE_MAX_MB.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+from openai.types.chat import ChatCompletion
+
+
+MODES = ("record", "replay", "passthrough")
+DEFAULT_PATH = Path(__file__).resolve().parent / ".llm_cache.sqlite"
+
+
+def messages_key(model, messages, **params):
+    """Stable hash of a chat request: the cache key, also used by fake_llm to seed latency and find recordings"""
+    payload = json.dumps({"model": model, "messages": messages, "params": params},
+                         sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CacheMiss(KeyError):
+    """Raised in replay mode when a request has no recorded response"""
+
+
+class ResponseCache:
+    """SQLite store of serialized ChatCompletion responses with LRU eviction by size"""
+
+    def __init__(self, path=DEFAULT_PATH, max_bytes=512 * 1024 * 1024):
+        self.path = str(path)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, model TEXT, response TEXT NOT NULL,"
+            " size INTEGER NOT NULL, created REAL NOT NULL, last_access REAL NOT NULL,"
+            " hits INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_access)")
+        self._conn.commit()
+        self._total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE responses SET last_access = ?, hits = hits + 1 WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+        return ChatCompletion.model_validate_json(row[0])
+
+    def put(self, key, model, response):
+        payload = response.model_dump_json()
+        size = len(payload.encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, size, created, last_access)"
+                " VALUES (?, ?, ?, ?, ?, ?)", (key, model, payload, size, now, now)
+            )
+            self._total += size - (old[0] if old else 0)
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        while self._total > self.max_bytes:
+            victims = self._conn.execute(
+                "SELECT key, size FROM responses ORDER BY last_access LIMIT 64"
+            ).fetchall()
+            if not victims:
+                break
+            for key, size in victims:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._total -= size
+                if self._total <= self.max_bytes:
+                    break
+
+    def stats(self):
+        with self._lock:
+            entries, hits = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM responses"
+            ).fetchone()
+        return {"entries": entries, "bytes": self._total, "hits": hits}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class CachedClient:
+    """
+    Wrap an OpenAI-style client so chat.completions.create goes through a
+    ResponseCache. Everything else is passed through to the wrapped client.
+    """
+
+    def __init__(self, client, cache, mode="record"):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}, got {mode!r}")
+        self._client = client
+        self.cache = cache
+        self.mode = mode
+        self.hits = 0
+        self.misses = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, model, messages, **params):
+        if self.mode == "passthrough" or params.get("temperature", 1.0) != 0:
+            return self._client.chat.completions.create(model=model, messages=messages, **params)
+
+        key = messages_key(model, messages, **params)
+        response = self.cache.get(key)
+        if response is not None:
+            self.hits += 1
+            return response
+        self.misses += 1
+        if self.mode == "replay":
+            raise CacheMiss(f"No recorded response for request {key[:12]} (model={model})")
+        response = self._client.chat.completions.create(model=model, messages=messages, **params)
+        self.cache.put(key, model, response)
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+def wrap_client(client, mode=None, path=None, max_mb=None):
+    """Wrap `client` with a cache configured from LLM_CACHE_MODE / LLM_CACHE_PATH / LLM_CACHE_MAX_MB"""
+    mode = mode or os.getenv("LLM_CACHE_MODE", "record")
+    if mode == "passthrough":
+        return client
+    path = path or os.getenv("LLM_CACHE_PATH") or DEFAULT_PATH
+    max_mb = float(max_mb or os.getenv("LLM_CACHE_MAX_MB", 512))
+    cache = ResponseCache(path, max_bytes=int(max_mb * 1024 * 1024))
+    print(f"🗄️  LLM cache: mode={mode}, {cache.stats()['entries']} entries at {path}")
+    return CachedClient(client, cache, mode)
@@ -0,0 +1,189 @@
+"""
+Async map operator for per-document LLM calls.
+
+The manual query scripts classify every business doc (state, WiFi, parking,
+credit cards, categories) with one chat completion each. LLMMap runs those
+calls concurrently instead of one blocking call at a time:
+  - at most `concurrency` requests are in flight (asyncio semaphore),
+  - transient / rate-limit errors are retried with exponential backoff,
+  - results come back in input order, with `default` for items that failed,
+  - with batch_size > 1, several docs are packed into one request and the
+    model answers with a JSON object keyed by item number; a packed request
+    that cannot be parsed falls back to one request per doc.
+
+Sync OpenAI clients (and the wrapped clients from llm_cache / scheduler) are
+called on a thread pool; async clients are awaited directly.
+
+Defaults come from LLM_MAP_CONCURRENCY and LLM_MAP_BATCH_SIZE.
+"""
+import asyncio
+import inspect
+import json
+import os
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from entity_resolution import parse_json_object
+from scheduler import is_retryable
+
+
+class MapStats:
+    """Counters for one LLMMap.map() call"""
+
+    def __init__(self):
+        self.items = 0
+        self.requests = 0
+        self.retries = 0
+        self.errors = 0
+        self.fallbacks = 0
+        self.latencies = []
+        self.elapsed = 0.0
+
+    @property
+    def throughput(self):
+        return self.items / self.elapsed if self.elapsed > 0 else 0.0
+
+    def as_dict(self):
+        return {
+            "items": self.items,
+            "requests": self.requests,
+            "retries": self.retries,
+            "errors": self.errors,
+            "fallbacks": self.fallbacks,
+            "elapsed": self.elapsed,
+            "items_per_s": self.throughput,
+            "p50_latency": statistics.median(self.latencies) if self.latencies else None,
+        }
+
+    def __str__(self):
+        p50 = f", p50 {statistics.median(self.latencies):.2f}s/request" if self.latencies else ""
+        return (f"{self.items} items in {self.elapsed:.1f}s ({self.throughput:.1f} items/s), "
+                f"{self.requests} requests, {self.retries} retries, {self.errors} errors{p50}")
+
+
+class LLMMap:
+    """
+    Apply one prompt to many items. `instructions` is the task text shared by
+    every item, `render(item)` formats one item (e.g. "Description: ...") and
+    `parse(text)` turns the model's answer for one item into a value.
+    With json_mode, every request asks for a JSON object reply.
+    """
+
+    def __init__(self, client, deployment_name, instructions, render, parse=str.strip, system=None,
+                 default=None, max_tokens=20, batch_size=None, concurrency=None,
+                 max_retries=4, base_delay=1.0, max_delay=30.0, json_mode=False, name="llm_map",
+                 verbose=True):
+        self.client = client
+        self.deployment_name = deployment_name
+        self.instructions = instructions
+        self.render = render
+        self.parse = parse
+        self.system = system
+        self.default = default
+        self.max_tokens = max_tokens
+        self.batch_size = batch_size or int(os.getenv("LLM_MAP_BATCH_SIZE", 1))
+        self.concurrency = concurrency or int(os.getenv("LLM_MAP_CONCURRENCY", 8))
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.json_mode = json_mode
+        self.name = name
+        self.verbose = verbose
+        self.stats = MapStats()
+
+    def _messages(self, prompt):
+        messages = [{"role": "system", "content": self.system}] if self.system else []
+        return messages + [{"role": "user", "content": prompt}]
+
+    def _single_prompt(self, item):
+        return f"{self.instructions}\n\n{self.render(item)}"
+
+    def _packed_prompt(self, items):
+        body = "\n\n".join(f"### Item {i}\n{self.render(item)}" for i, item in enumerate(items))
+        return (
+            f"{self.instructions}\n\n"
+            f"Apply these instructions separately to each of the {len(items)} numbered items below. "
+            "Respond only with a JSON object mapping each item number (as a string) to the answer "
+            "you would give for that item alone, e.g. {\"0\": \"...\", \"1\": \"...\"}.\n\n"
+            f"{body}"
+        )
+
+    async def _call(self, prompt, max_tokens, **params):
+        """One chat completion with retries; returns the reply text"""
+        create = self.client.chat.completions.create
+        kwargs = dict(model=self.deployment_name, messages=self._messages(prompt),
+                      temperature=0.0, max_tokens=max_tokens, **params)
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._semaphore:
+                    self.stats.requests += 1
+                    t0 = time.perf_counter()
+                    if inspect.iscoroutinefunction(create):
+                        response = await create(**kwargs)
+                    else:
+                        loop = asyncio.get_running_loop()
+                        response = await loop.run_in_executor(self._executor, lambda: create(**kwargs))
+                    self.stats.latencies.append(time.perf_counter() - t0)
+                return response.choices[0].message.content or ""
+            except Exception as e:
+                if attempt == self.max_retries or not is_retryable(e):
+                    raise
+                self.stats.retries += 1
+                delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+                await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+
+    async def _one(self, item):
+        try:
+            params = {"response_format": {"type": "json_object"}} if self.json_mode else {}
+            return self.parse(await self._call(self._single_prompt(item), self.max_tokens, **params))
+        except Exception as e:
+            self.stats.errors += 1
+            if self.verbose:
+                print(f"❌ {self.name}: GPT error: {e}")
+            return self.default
+
+    async def _batch(self, items):
+        if len(items) == 1:
+            return [await self._one(items[0])]
+        try:
+            text = await self._call(self._packed_prompt(items), (self.max_tokens + 10) * len(items),
+                                    response_format={"type": "json_object"})
+            answer = parse_json_object(text)
+            answers = [answer[str(i)] for i in range(len(items))]
+            return [self.parse(a if isinstance(a, str) else json.dumps(a)) for a in answers]
+        except Exception as e:
+            # a malformed or incomplete packed reply: ask for each item on its own
+            self.stats.fallbacks += 1
+            if self.verbose:
+                print(f"🔁 {self.name}: packed request for {len(items)} items failed ({e}); retrying one by one")
+            return list(await asyncio.gather(*(self._one(item) for item in items)))
+
+    async def amap(self, items):
+        """Results for `items`, in order"""
+        items = list(items)
+        self.stats = MapStats()
+        self.stats.items = len(items)
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as self._executor:
+            batches = [items[i:i + self.batch_size] for i in range(0, len(items), self.batch_size)]
+            results = await asyncio.gather(*(self._batch(batch) for batch in batches))
+        self.stats.elapsed = time.perf_counter() - t0
+        if self.verbose:
+            print(f"⚡ {self.name}: {self.stats}")
+        return [value for batch in results for value in batch]
+
+    def map(self, items):
+        """Blocking wrapper around amap() for scripts"""
+        return asyncio.run(self.amap(items))
+
+
+def yes_no(text):
+    """Parser for 'yes' / 'no' answers"""
+    return text.strip().strip(".").lower() == "yes"
+
+
+def attributes_json(attributes):
+    return f"Attributes: {json.dumps(attributes, indent=2)}"
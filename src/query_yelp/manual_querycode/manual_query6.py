@@ -1,32 +1,35 @@
-import duckdb
 import pandas as pd
-from pymongo import MongoClient
 from openai import AzureOpenAI
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from entity_resolution import BatchRefResolver
+from business_features import SOURCE_PROJECTION, load_business_features
+from llm_cache import wrap_client
+from connections import get_manager
+from datetime_normalizer import parse_datetimes
 import json
 
 # === Step 0: Setup Connections ===
-con_duck = duckdb.connect("../query_dataset/yelp_user.db")
-client_mongo = MongoClient("mongodb://localhost:27017/")
+con_duck = get_manager().duckdb()
+client_mongo = get_manager().mongo()  # MONGO_URI=embedded:// reads the query_dataset dump without a mongod
 biz_collection = client_mongo["yelp_business"]["business"]
 
 import os
-client = AzureOpenAI(
+# responses are cached by prompt; see llm_cache.py for LLM_CACHE_MODE
+client = wrap_client(AzureOpenAI(
         api_key=os.getenv("AZURE_API_KEY"),
         api_version=os.getenv("AZURE_API_VERSION", "2023-05-15"),
         azure_endpoint=os.getenv("AZURE_API_BASE")
-    )
+    ))
 deployment_name = "gpt-4o-mini"
 # === Step 1: Load review table and business_refs ===
 df_review = con_duck.execute("SELECT * FROM review").fetchdf()
 unique_business_refs = df_review["business_ref"].dropna().unique().tolist()
 
 # === Step 2: Load business_id + name + description + attributes from Mongo ===
-business_docs = list(biz_collection.find({}, {
-    "business_id": 1,
-    "name": 1,
-    "description": 1,
-    "attributes": 1
-}))
+business_docs = list(biz_collection.find({}, SOURCE_PROJECTION))
 all_business_ids = [doc["business_id"] for doc in business_docs if "business_id" in doc]
 
 # === Step 3: GPT infer mapping rule ===
@@ -56,48 +59,11 @@ mapping_rule_explanation = get_mapping_rule(all_business_ids, unique_business_re
 print("\n🧠 GPT-inferred mapping rule:\n", mapping_rule_explanation)
 
 # === Step 4: Resolve business_ref → business_id ===
-def resolve_ref_to_id(business_ref):
-    prompt = (
-        f"The inferred mapping rule is:\n\n{mapping_rule_explanation}\n\n"
-        f"Now determine the business_id for:\n"
-        f"- business_ref: {business_ref}\n\n"
-        "Only respond with the business_id (e.g., 'biz_001')."
-    )
-    try:
-        response = client.chat.completions.create(
-            model=deployment_name,
-            messages=[
-                {"role": "system", "content": "You are a data assistant mapping business_ref to business_id."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.0,
-            max_tokens=20
-        )
-        return response.choices[0].message.content.strip()
-    except Exception as e:
-        print(f"❌ GPT error on {business_ref}: {e}")
-        return None
-
-ref_to_id_map = {}
-predicted_business_ids = []
-
-for i, row in df_review.iterrows():
-    business_ref = row["business_ref"]
-    if pd.isna(business_ref):
-        predicted_business_ids.append(None)
-        continue
-
-    if business_ref not in ref_to_id_map:
-        ref_to_id_map[business_ref] = resolve_ref_to_id(business_ref)
-
-    business_id = ref_to_id_map[business_ref]
-    predicted_business_ids.append(business_id)
-    print(f"[{i}] business_ref = {business_ref} → business_id = {business_id}")
-
-df_review["business_id"] = predicted_business_ids
+resolver = BatchRefResolver(client, deployment_name, all_business_ids, rule_hint=mapping_rule_explanation)
+df_review["business_id"] = resolver.resolve_column(df_review["business_ref"])
 
 # === Step 3: Filter Jan–Jun 2016 reviews and group ===
-df_review["date"] = pd.to_datetime(df_review["date"], unit="ms", errors="coerce")
+df_review["date"] = parse_datetimes(df_review["date"])
 df_filtered = df_review[
     (df_review["date"] >= "2016-01-01") & (df_review["date"] <= "2016-06-30")
 ].copy()
@@ -115,31 +81,11 @@ if df_top.empty:
 
 best_biz_id = df_top.iloc[0]["business_id"]
 
-# === Step 4: Extract name + category from description ===
-def extract_categories(description):
-    prompt = (
-        "Based on the following business description, identify one or more likely business categories.\n"
-        "Respond with a comma-separated list (e.g., 'Nail Salon, Spa').\n\n"
-        f"Description: {description}"
-    )
-    try:
-        res = client.chat.completions.create(
-            model=deployment_name,
-            messages=[
-                {"role": "system", "content": "You extract business categories."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.0,
-            max_tokens=30
-        )
-        return res.choices[0].message.content.strip()
-    except:
-        return "Unknown"
-
-biz_doc = next((b for b in business_docs if b.get("business_id") == best_biz_id), {})
-biz_name = biz_doc.get("name", "Unknown")
-desc = biz_doc.get("description", "")
-category_str = extract_categories(desc) if desc else "Unknown"
+# === Step 4: Name + categories from the extracted business features ===
+df_features = load_business_features(client, deployment_name, business_docs)
+best_features = df_features[df_features["business_id"] == best_biz_id].iloc[0]
+biz_name = best_features["name"] or "Unknown"
+category_str = ", ".join(best_features["categories"] or []) or "Unknown"
 
 # === Step 5: Final result ===
 avg_rating = df_top.iloc[0]["avg_rating"]
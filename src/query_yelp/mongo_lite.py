@@ -0,0 +1,360 @@
+"""
+In-process, read-only stand-in for the MongoDB side of the benchmark.
+
+Serves a mongodump folder (query_dataset/<db>/<collection>.bson) straight from
+memory-mapped BSON files, with the subset of pymongo the scripts use:
+client[db][collection].find(filter, projection), find_one, count_documents,
+distinct, and equality lookups through optional secondary indexes
+(`business_id` by default). No mongod, no mongorestore:
+
+    from mongo_lite import connect_mongo
+    client_mongo = connect_mongo()          # MONGO_URI, default mongodb://localhost:27017/
+    client_mongo = connect_mongo("embedded://")                    # query_dataset/ dumps
+    client_mongo = connect_mongo("embedded:///path/to/dump_root")
+
+Supported filter operators: equality, $eq $ne $in $nin $gt $gte $lt $lte
+$exists $regex, $and $or $nor, and dotted paths into sub-documents; on an
+array field they match any element, as in Mongo. Anything else raises
+NotImplementedError.
+Projections are inclusion ({"a": 1}), exclusion ({"a": 0}) or a list of fields.
+Only the top-level fields a query needs are decoded.
+"""
+import os
+import re
+from pathlib import Path
+
+from bson_io import BsonFile
+
+
+QUERY_DATASET_DIR = Path(__file__).resolve().parent / "query_dataset"
+DEFAULT_MONGO_URI = "mongodb://localhost:27017/"
+EMBEDDED_SCHEME = "embedded://"
+DEFAULT_INDEXES = ("business_id",)
+
+_MISSING = object()
+
+
+def get_path(doc, path):
+    """Value at dotted `path`, or _MISSING"""
+    value = doc
+    for part in path.split("."):
+        if isinstance(value, dict) and part in value:
+            value = value[part]
+        else:
+            return _MISSING
+    return value
+
+
+_OPERATORS = {"$eq", "$ne", "$in", "$nin", "$exists", "$regex", "$gt", "$gte", "$lt", "$lte"}
+
+
+def _compare(value, op, arg):
+    """
+    Mongo comparison semantics: on an array field, $eq / $in / ordering
+    operators match if the whole array or any element does ($ne / $nin are
+    their negations, so they require that no element matches)
+    """
+    if op not in _OPERATORS:
+        raise NotImplementedError(f"unsupported query operator {op}")
+    if op == "$eq":
+        if value is _MISSING:
+            return arg is None
+        return value == arg or (isinstance(value, list) and arg in value)
+    if op == "$ne":
+        return not _compare(value, "$eq", arg)
+    if op == "$in":
+        return any(_compare(value, "$eq", a) for a in arg)
+    if op == "$nin":
+        return not _compare(value, "$in", arg)
+    if op == "$exists":
+        return (value is not _MISSING) == bool(arg)
+    if isinstance(value, list):
+        return any(_compare(v, op, arg) for v in value)
+    if op == "$regex":
+        return isinstance(value, str) and re.search(arg, value) is not None
+    if value is _MISSING or value is None:
+        return False
+    try:
+        if op == "$gt":
+            return value > arg
+        if op == "$gte":
+            return value >= arg
+        if op == "$lt":
+            return value < arg
+        if op == "$lte":
+            return value <= arg
+    except TypeError:
+        return False
+
+
+def matches(doc, query):
+    """Whether `doc` satisfies a Mongo `query` (the subset listed in the module docstring)"""
+    for key, cond in query.items():
+        if key == "$and":
+            if not all(matches(doc, q) for q in cond):
+                return False
+        elif key == "$or":
+            if not any(matches(doc, q) for q in cond):
+                return False
+        elif key == "$nor":
+            if any(matches(doc, q) for q in cond):
+                return False
+        elif key.startswith("$"):
+            raise NotImplementedError(f"unsupported query operator {key}")
+        else:
+            value = get_path(doc, key)
+            if isinstance(cond, dict) and cond and all(k.startswith("$") for k in cond):
+                options = cond.get("$options", "")
+                for op, arg in cond.items():
+                    if op == "$options":
+                        continue
+                    if op == "$regex" and options:
+                        arg = re.compile(arg, re.IGNORECASE if "i" in options else 0)
+                    if not _compare(value, op, arg):
+                        return False
+            elif not _compare(value, "$eq", cond):
+                return False
+    return True
+
+
+def query_fields(query):
+    """Top-level fields referenced by `query`"""
+    fields = set()
+    for key, cond in query.items():
+        if key in ("$and", "$or", "$nor"):
+            for q in cond:
+                fields |= query_fields(q)
+        else:
+            fields.add(key.split(".")[0])
+    return fields
+
+
+def normalize_projection(projection):
+    """projection -> (include set or None, exclude set, keep _id)"""
+    if projection is None:
+        return None, set(), True
+    if isinstance(projection, (list, tuple, set)):
+        projection = {field: 1 for field in projection}
+    keep_id = bool(projection.get("_id", 1))
+    rest = {k: v for k, v in projection.items() if k != "_id"}
+    if rest and all(rest.values()):
+        return set(rest), set(), keep_id
+    if any(rest.values()):
+        raise ValueError("cannot mix inclusion and exclusion in a projection")
+    return None, set(rest), keep_id
+
+
+def project(doc, include, exclude, keep_id):
+    if include is not None:
+        # top-level fields keep the document's order, like the server
+        out = {k: v for k, v in doc.items() if k in include or (keep_id and k == "_id")}
+        for field in include:
+            if "." not in field:
+                continue
+            value = get_path(doc, field)
+            if value is _MISSING:
+                continue
+            target, parts = out, field.split(".")
+            for part in parts[:-1]:
+                target = target.setdefault(part, {})
+            target[parts[-1]] = value
+        return out
+    return {k: v for k, v in doc.items() if k not in exclude and (keep_id or k != "_id")}
+
+
+class Cursor:
+    """Lazy result of Collection.find(); iterate it or call list() on it"""
+
+    def __init__(self, collection, query, projection):
+        self.collection = collection
+        self.query = query or {}
+        self.projection = projection
+        self._skip = 0
+        self._limit = 0
+
+    def skip(self, n):
+        self._skip = n
+        return self
+
+    def limit(self, n):
+        self._limit = n
+        return self
+
+    def __iter__(self):
+        include, exclude, keep_id = normalize_projection(self.projection)
+        fields = None
+        if include is not None:
+            fields = {f.split(".")[0] for f in include} | query_fields(self.query) | ({"_id"} if keep_id else set())
+        skipped = returned = 0
+        for doc in self.collection._candidates(self.query, fields):
+            if not matches(doc, self.query):
+                continue
+            if skipped < self._skip:
+                skipped += 1
+                continue
+            yield project(doc, include, exclude, keep_id)
+            returned += 1
+            if self._limit and returned >= self._limit:
+                return
+
+
+class Collection:
+    """One `<name>.bson` file of a dump, memory-mapped on first use"""
+
+    def __init__(self, path, indexes=DEFAULT_INDEXES):
+        self.path = Path(path)
+        self.name = self.path.stem
+        self._file = None
+        self._wanted_indexes = tuple(indexes)
+        self._indexes = {}
+
+    @property
+    def file(self):
+        if self._file is None:
+            self._file = BsonFile(self.path)
+        return self._file
+
+    def create_index(self, field):
+        """Equality index on a top-level field: value -> document positions"""
+        if field not in self._indexes:
+            index = {}
+            for pos, doc in enumerate(self.file.iter_documents([field])):
+                value = doc.get(field)
+                for key in (value if isinstance(value, list) else [value]):
+                    try:
+                        index.setdefault(key, []).append(pos)
+                    except TypeError:  # unhashable value, e.g. a sub-document
+                        pass
+            self._indexes[field] = index
+        return field
+
+    def _positions(self, query):
+        """Document positions that can match `query` from an index, or None to scan everything"""
+        for field in self._wanted_indexes:
+            cond = query.get(field, _MISSING)
+            if cond is _MISSING:
+                continue
+            if isinstance(cond, dict) and set(cond) == {"$eq"}:
+                keys = [cond["$eq"]]
+            elif isinstance(cond, dict) and set(cond) == {"$in"}:
+                keys = list(cond["$in"])
+            elif isinstance(cond, dict):
+                continue
+            else:
+                keys = [cond]
+            try:
+                index = self._indexes.get(field) or self._indexes[self.create_index(field)]
+                return sorted({pos for key in keys for pos in index.get(key, ())})
+            except TypeError:
+                continue
+        return None
+
+    def _candidates(self, query, fields):
+        positions = self._positions(query)
+        if positions is None:
+            yield from self.file.iter_documents(fields)
+            return
+        for pos in positions:
+            yield self.file.doc_at(pos, fields)
+
+    def find(self, filter=None, projection=None):
+        return Cursor(self, filter, projection)
+
+    def find_one(self, filter=None, projection=None):
+        return next(iter(self.find(filter, projection).limit(1)), None)
+
+    def count_documents(self, filter=None):
+        if not filter:
+            return len(self.file)
+        return sum(1 for _ in self.find(filter, {"_id": 1}))
+
+    def estimated_document_count(self):
+        return len(self.file)
+
+    def distinct(self, key, filter=None):
+        values = []
+        for doc in self.find(filter, [key]):
+            value = get_path(doc, key)
+            for v in (value if isinstance(value, list) else [value]):
+                if v is not _MISSING and v not in values:
+                    values.append(v)
+        return values
+
+    def to_arrow(self, fields, nested="json"):
+        """Bulk export of top-level `fields` as a pyarrow Table (see BsonFile.to_arrow)"""
+        return self.file.to_arrow(fields, nested)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class Database:
+    def __init__(self, path, indexes=DEFAULT_INDEXES):
+        self.path = Path(path)
+        self.name = self.path.name
+        self._indexes = indexes
+        self._collections = {}
+
+    def list_collection_names(self):
+        return sorted(p.stem for p in self.path.glob("*.bson"))
+
+    def __getitem__(self, name):
+        if name not in self._collections:
+            path = self.path / f"{name}.bson"
+            if not path.exists():
+                raise KeyError(f"no collection {name!r} in {self.path} (has {self.list_collection_names()})")
+            self._collections[name] = Collection(path, self._indexes)
+        return self._collections[name]
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def close(self):
+        for collection in self._collections.values():
+            collection.close()
+
+
+class EmbeddedClient:
+    """MongoClient look-alike over a folder of mongodump databases (one sub-folder per database)"""
+
+    def __init__(self, root=QUERY_DATASET_DIR, indexes=DEFAULT_INDEXES):
+        self.root = Path(root)
+        self._indexes = indexes
+        self._databases = {}
+
+    def list_database_names(self):
+        return sorted(p.name for p in self.root.iterdir() if p.is_dir() and any(p.glob("*.bson")))
+
+    def __getitem__(self, name):
+        if name not in self._databases:
+            self._databases[name] = Database(self.root / name, self._indexes)
+        return self._databases[name]
+
+    def close(self):
+        for database in self._databases.values():
+            database.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def connect_mongo(uri=None, **client_kwargs):
+    """
+    A Mongo client for `uri` (default: $MONGO_URI, else mongodb://localhost:27017/).
+    "embedded://" serves the query_dataset dumps in-process; "embedded:///some/dir"
+    serves the dumps under that folder. Anything else goes to pymongo.MongoClient,
+    with `client_kwargs` (e.g. maxPoolSize).
+    """
+    uri = uri or os.getenv("MONGO_URI", DEFAULT_MONGO_URI)
+    if uri.startswith(EMBEDDED_SCHEME):
+        root = uri[len(EMBEDDED_SCHEME):]
+        return EmbeddedClient(root or QUERY_DATASET_DIR)
+    from pymongo import MongoClient
+    return MongoClient(uri, **client_kwargs)
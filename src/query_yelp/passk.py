@@ -0,0 +1,174 @@
+"""
+pass@k estimation, scalar and batched.
+
+pass@k = 1 - C(n - c, k) / C(n, k) = 1 - prod_{i=n-c+1}^{n} (1 - k / i).
+The batched version evaluates the product in log space from a cached table of
+cumulative sums of log(1 - k / i), so a whole (cells x k) matrix costs two
+gathers and an exp regardless of n.
+
+Re-score journals from the command line:
+    python passk.py pass_at_k_results_wh_gpt-4.1.journal.jsonl --bootstrap 1000
+"""
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from journal import RunJournal
+
+
+Interval = namedtuple("Interval", ["estimate", "lower", "upper"])
+
+# journal fields that describe a run rather than the cell it belongs to
+RUN_FIELDS = ("run_id", "success", "latency", "tokens", "ts")
+
+
+def pass_at_k(n, c, k):
+    """Compute unbiased pass@k (plug-in 1 - (1 - c/n)^k when k > n, e.g. after early stopping)"""
+    if k > n:
+        return 1.0 - (1.0 - c / n) ** k
+    if n - c < k:
+        return 1.0
+    return 1.0 - np.prod(1.0 - k / np.arange(n - c + 1, n + 1))
+
+
+@lru_cache(maxsize=64)
+def _log_survival_table(ks, size):
+    """T[j, m] = sum_{i=k_j+1}^{m} log(1 - k_j / i), for m = 0..size"""
+    k = np.asarray(ks, dtype=float)[:, None]
+    i = np.arange(1, size + 1, dtype=float)[None, :]
+    terms = np.log1p(-np.where(i > k, k / i, 0.0))
+    table = np.zeros((len(ks), size + 1))
+    np.cumsum(terms, axis=1, out=table[:, 1:])
+    table.setflags(write=False)
+    return table
+
+
+def pass_at_k_matrix(n, c, k):
+    """
+    Batched pass@k. `n` and `c` broadcast against each other (one entry per
+    cell); `k` is a 1-D list of k values. Returns an array of shape
+    broadcast(n, c).shape + (len(k),), matching pass_at_k element-wise.
+    Cells with n == 0 are NaN.
+    """
+    n, c = np.broadcast_arrays(np.asarray(n, dtype=np.int64), np.asarray(c, dtype=np.int64))
+    shape = n.shape
+    n, c = n.ravel(), c.ravel()
+    k = np.asarray(k, dtype=np.int64).ravel()
+    if np.any(c < 0) or np.any(c > n):
+        raise ValueError("need 0 <= c <= n for every cell")
+
+    # round the table size up so growing n keeps hitting the cache
+    size = 1 << max(int(n.max(initial=0)), 1).bit_length()
+    table = _log_survival_table(tuple(int(x) for x in k), size)
+
+    rows = np.arange(len(k))[None, :]
+    log_ratio = table[rows, n[:, None]] - table[rows, (n - c)[:, None]]
+    out = 0.0 - np.expm1(log_ratio)
+
+    nn, cc, kk = n[:, None], c[:, None], k[None, :]
+    out = np.where(nn - cc < kk, 1.0, out)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        plug_in = 1.0 - (1.0 - cc / nn) ** kk
+    out = np.where(kk > nn, plug_in, out)
+    out = np.where(nn == 0, np.nan, out)
+    return out.reshape(shape + (len(k),))
+
+
+def bootstrap_pass_at_k(n, c, k, n_boot=1000, alpha=0.05, seed=None):
+    """
+    Percentile bootstrap intervals for per-cell pass@k and for the Overall
+    mean across cells. Each replicate resamples every cell's n runs with
+    replacement, i.e. draws c* ~ Binomial(n, c / n).
+
+    Returns (per_cell, overall) Interval tuples of arrays shaped (cells, K)
+    and (K,).
+    """
+    n = np.asarray(n, dtype=np.int64).ravel()
+    c = np.asarray(c, dtype=np.int64).ravel()
+    rng = np.random.default_rng(seed)
+
+    estimate = pass_at_k_matrix(n, c, k)
+    p = np.divide(c, n, out=np.zeros(len(n)), where=n > 0)
+    c_boot = rng.binomial(n, p, size=(n_boot, len(n)))
+    boot = pass_at_k_matrix(np.broadcast_to(n, c_boot.shape), c_boot, k)
+
+    q = [100 * alpha / 2, 100 * (1 - alpha / 2)]
+    cell_lo, cell_hi = np.nanpercentile(boot, q, axis=0)
+    overall_lo, overall_hi = np.nanpercentile(np.nanmean(boot, axis=1), q, axis=0)
+    return (
+        Interval(estimate, cell_lo, cell_hi),
+        Interval(np.nanmean(estimate, axis=0), overall_lo, overall_hi),
+    )
+
+
+def score_journal(records, k_list, n_boot=0, alpha=0.05, seed=None):
+    """
+    pass@k table for journal records, one row per cell: every record field
+    except the per-run ones (run_id, success, ...) is a cell key. After each
+    block of cells sharing the non-query keys (e.g. one model x description)
+    comes an Overall row (query_id="Overall") with the mean over its queries.
+    With n_boot > 0, adds pass@k_lo / pass@k_hi columns and bootstrap bounds
+    on the Overall rows.
+    """
+    df = pd.DataFrame(records)
+    keys = [col for col in df.columns if col not in RUN_FIELDS]
+    cells = df.groupby(keys, sort=False, dropna=False)["success"].agg(n="size", c="sum").reset_index()
+
+    label = "query_id" if "query_id" in keys else keys[0]
+    block_keys = [col for col in keys if col != label]
+    if block_keys:
+        block_of = cells.groupby(block_keys, sort=False, dropna=False).ngroup().to_numpy()
+    else:
+        block_of = np.zeros(len(cells), dtype=int)
+
+    frames = []
+    for b in range(block_of.max(initial=-1) + 1):
+        block = cells[block_of == b].reset_index(drop=True)
+        values = pass_at_k_matrix(block["n"].to_numpy(), block["c"].to_numpy(), k_list)
+        for j, k in enumerate(k_list):
+            block[f"pass@{k}"] = values[:, j]
+        overall = {col: block[col].iloc[0] for col in block_keys}
+        overall[label] = "Overall"
+        for j, k in enumerate(k_list):
+            overall[f"pass@{k}"] = np.nanmean(values[:, j])
+
+        if n_boot:
+            block_seed = None if seed is None else seed + b
+            per_cell, agg = bootstrap_pass_at_k(block["n"], block["c"], k_list, n_boot, alpha, block_seed)
+            for j, k in enumerate(k_list):
+                block[f"pass@{k}_lo"] = per_cell.lower[:, j]
+                block[f"pass@{k}_hi"] = per_cell.upper[:, j]
+                overall[f"pass@{k}_lo"] = agg.lower[j]
+                overall[f"pass@{k}_hi"] = agg.upper[j]
+        frames.append(pd.concat([block, pd.DataFrame([overall])], ignore_index=True))
+
+    return pd.concat(frames, ignore_index=True)
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Re-score run journals into a pass@k table")
+    parser.add_argument("journals", nargs="+", help="run journal JSONL files")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 5, 10, 15, 20, 30, 40, 50])
+    parser.add_argument("--bootstrap", type=int, default=0, help="bootstrap replicates for CIs; 0 disables")
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("-o", "--output", default=None, help="CSV path; default prints to stdout")
+    args = parser.parse_args()
+
+    records = []
+    for path in args.journals:
+        records.extend(RunJournal(path).replay())
+
+    df = score_journal(records, args.k, args.bootstrap, args.alpha, args.seed)
+    if args.output:
+        df.to_csv(args.output, index=False)
+        print(f"💾 Saved {int(df['n'].notna().sum())} cells to: {args.output}")
+    else:
+        print(df.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,38 @@
+import sys
+from pathlib import Path
+
 import pandas as pd
 
-def get_indianapolis_average_rating(business_path, review_path):
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from ground_truth_data import GroundTruthData
+
+# columns read from each ground-truth table
+TABLES = {
+    "business": ["business_id", "city"],
+    "review": ["business_id", "stars"],
+}
+
+
+def compute(data):
     """
     Compute the average rating of all businesses located in Indianapolis.
 
     Args:
-        business_path (str): Path to the Yelp business JSONL file.
-        review_path (str): Path to the Yelp review JSONL file.
+        data (GroundTruthData): Loaded ground-truth tables.
 
     Returns:
         tuple:
             - int: Number of businesses in Indianapolis
             - float: Average rating
-            - pd.DataFrame: Raw review records for Indianapolis businesses (for optional export)
+            - pd.DataFrame: Review records for Indianapolis businesses (for optional export)
     """
-    # Load datasets
-    df_business = pd.read_json(business_path, lines=True)
-    df_review = pd.read_json(review_path, lines=True)
-
-    # Filter businesses located in Indianapolis
-    df_indy = df_business[df_business["city"] == "Indianapolis"].copy()
-
-    # Get list of business_id
-    indy_ids = df_indy["business_id"]
+    # Businesses located in Indianapolis
+    df_business = data["business"]
+    indy_ids = df_business.loc[df_business["city"] == "Indianapolis", "business_id"]
 
-    # Filter reviews for these businesses
-    df_indy_reviews = df_review[df_review["business_id"].isin(indy_ids)]
+    # Reviews for these businesses
+    df_reviews = data.review_business
+    df_indy_reviews = df_reviews[df_reviews["city"] == "Indianapolis"]
 
     # Compute average rating
     average_rating = df_indy_reviews["stars"].mean()
@@ -33,17 +40,34 @@ def get_indianapolis_average_rating(business_path, review_path):
     return len(indy_ids), average_rating, df_indy_reviews
 
 
+def get_indianapolis_average_rating(business_path, review_path):
+    """
+    Compute the average rating of all businesses located in Indianapolis.
+
+    Args:
+        business_path (str): Path to the Yelp business JSONL file.
+        review_path (str): Path to the Yelp review JSONL file.
+
+    Returns:
+        tuple: See compute().
+    """
+    return compute(GroundTruthData.from_paths(TABLES, business=business_path, review=review_path))
+
+
+def write_ground_truth(result, path="ground_truth.csv"):
+    num_businesses, avg_rating, df_reviews = result
+    pd.DataFrame([[avg_rating]]).to_csv(path, index=False, header=False)
+
+
 if __name__ == "__main__":
     business_file = "../ground_truth_dataset/business_gt.json"
     review_file = "../ground_truth_dataset/review_gt.json"
 
     # Run computation
-    num_businesses, avg_rating, df_reviews = get_indianapolis_average_rating(business_file, review_file)
+    result = get_indianapolis_average_rating(business_file, review_file)
+    num_businesses, avg_rating, df_reviews = result
 
     # Print result
     print(avg_rating)
 
-    
-
-    # Optional: save reviews to CSV
-    pd.DataFrame([[avg_rating]]).to_csv("ground_truth.csv", index=False, header=False)
\ No newline at end of file
+    write_ground_truth(result)
@@ -1,13 +1,23 @@
-import pandas as pd
+import sys
+from pathlib import Path
 
-def get_top_state_review_stats(business_path, review_path):
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from ground_truth_data import GroundTruthData
+
+# columns read from each ground-truth table
+TABLES = {
+    "business": ["business_id", "state"],
+    "review": ["review_id", "business_id", "stars"],
+}
+
+
+def compute(data):
     """
     Identify the U.S. state with the highest number of reviews,
     and compute the average rating from reviews in that state.
 
     Args:
-        business_path (str): Path to the Yelp business JSONL file.
-        review_path (str): Path to the Yelp review JSONL file.
+        data (GroundTruthData): Loaded ground-truth tables.
 
     Returns:
         tuple:
@@ -16,12 +26,8 @@ def get_top_state_review_stats(business_path, review_path):
             - float: Average rating in that state
             - pd.DataFrame: Full state-level statistics (for optional export)
     """
-    # Load datasets
-    df_business = pd.read_json(business_path, lines=True)
-    df_review = pd.read_json(review_path, lines=True)
-
-    # Merge to associate state with each review
-    df_merged = pd.merge(df_review, df_business[["business_id", "state"]], on="business_id", how="inner")
+    # Reviews joined with their business's state
+    df_merged = data.review_business
 
     # Group by state and compute review count and average stars
     state_stats = df_merged.groupby("state").agg(
@@ -38,20 +44,41 @@ def get_top_state_review_stats(business_path, review_path):
     return top_state, top_count, top_avg_rating, state_stats
 
 
-if __name__ == "__main__":
-    business_file = "../ground_truth_dataset/business_gt.json"
-    review_file = "../ground_truth_dataset/review_gt.json"
+def get_top_state_review_stats(business_path, review_path):
+    """
+    Identify the U.S. state with the highest number of reviews,
+    and compute the average rating from reviews in that state.
 
-    # Compute stats
-    state, count, avg_rating, df_stats = get_top_state_review_stats(business_file, review_file)
+    Args:
+        business_path (str): Path to the Yelp business JSONL file.
+        review_path (str): Path to the Yelp review JSONL file.
 
-    # Print result
-    print(state, count, avg_rating)
+    Returns:
+        tuple: See compute().
+    """
+    return compute(GroundTruthData.from_paths(TABLES, business=business_path, review=review_path))
 
+
+def write_ground_truth(result, path="ground_truth.csv"):
+    state, count, avg_rating, df_stats = result
     top_row = df_stats.loc[df_stats['review_count'].idxmax()]
 
     top_state = top_row['state']
     top_avg_rating = top_row['avg_rating']
 
-    with open("ground_truth.csv", "w") as f:
+    with open(path, "w") as f:
         f.write(f"{top_state},{top_avg_rating}\n")
+
+
+if __name__ == "__main__":
+    business_file = "../ground_truth_dataset/business_gt.json"
+    review_file = "../ground_truth_dataset/review_gt.json"
+
+    # Compute stats
+    result = get_top_state_review_stats(business_file, review_file)
+    state, count, avg_rating, df_stats = result
+
+    # Print result
+    print(state, count, avg_rating)
+
+    write_ground_truth(result)
@@ -1,69 +1,69 @@
-import pandas as pd
-import ast
+import sys
+from pathlib import Path
 
 import pandas as pd
-import ast
 
-def get_parking_business_count(business_path, review_path, target_year=2018):
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from ground_truth_data import GroundTruthData
+
+# columns read from each ground-truth table
+TABLES = {
+    "business": ["business_id", "attributes"],
+    "review": ["business_id", "date"],
+}
+
+
+def compute(data, target_year=2018):
     """
     Count how many businesses that received reviews in a given year
     offer either BusinessParking or BikeParking.
 
     Args:
-        business_path (str): Path to business JSONL file.
-        review_path (str): Path to review JSONL file.
+        data (GroundTruthData): Loaded ground-truth tables.
         target_year (int): The year to filter reviews by.
 
     Returns:
         int: Number of businesses matching the condition.
     """
-    # Load data
-    df_business = pd.read_json(business_path, lines=True)
-    df_review = pd.read_json(review_path, lines=True)
-
     # Parse review date and filter by year
-    df_review["date"] = pd.to_datetime(df_review["date"])
-    df_review_year = df_review[df_review["date"].dt.year == target_year].copy()
+    df_review = data["review"]
+    review_dates = pd.to_datetime(df_review["date"])
+    df_review_year = df_review[review_dates.dt.year == target_year]
 
     # Get unique business_ids reviewed in that year
     reviewed_ids = df_review_year["business_id"].unique()
 
-    # Filter businesses that received reviews in that year
-    df_active = df_business[df_business["business_id"].isin(reviewed_ids)].copy()
+    # Businesses that received reviews in that year
+    df_business = data["business"]
+    active = df_business["business_id"].isin(reviewed_ids)
+
+    # Refined logic: only count if at least one parking option is actually available,
+    # i.e. BikeParking is True or any BusinessParking option is True
+    has_parking_attr = data.business_attributes.loc[active, "has_parking"]
 
-    # Parse attributes safely
-    def parse_attributes(attr):
-        if isinstance(attr, dict):
-            return attr
-        try:
-            return ast.literal_eval(attr)
-        except:
-            return {}
+    return has_parking_attr.sum()
 
-    df_active["attributes_parsed"] = df_active["attributes"].apply(parse_attributes)
 
-    # Refined logic: only count if at least one parking option is actually available
-    def has_parking(attrs):
-        # Check BikeParking directly
-        if attrs.get("BikeParking") in [True, "True"]:
-            return True
+def get_parking_business_count(business_path, review_path, target_year=2018):
+    """
+    Count how many businesses that received reviews in a given year
+    offer either BusinessParking or BikeParking.
 
-        # Check BusinessParking options
-        bp = attrs.get("BusinessParking")
-        if bp:
-            try:
-                if isinstance(bp, str):
-                    bp = ast.literal_eval(bp)
-                if isinstance(bp, dict):
-                    return any(v in [True, "True"] for v in bp.values())
-            except:
-                pass
-        return False
+    Args:
+        business_path (str): Path to business JSONL file.
+        review_path (str): Path to review JSONL file.
+        target_year (int): The year to filter reviews by.
 
-    df_active["has_parking_attr"] = df_active["attributes_parsed"].apply(has_parking)
+    Returns:
+        int: Number of businesses matching the condition.
+    """
+    data = GroundTruthData.from_paths(TABLES, business=business_path, review=review_path)
+    return compute(data, target_year=target_year)
 
-    return df_active["has_parking_attr"].sum()
 
+def write_ground_truth(count, path="ground_truth.csv"):
+    with open(path, "w") as f:
+        f.write(f"{count}\n")
 
 
 if __name__ == "__main__":
@@ -74,5 +74,4 @@ if __name__ == "__main__":
 
     print(count)
 
-    with open("ground_truth.csv", "w") as f:
-        f.write(f"{count}\n")
+    write_ground_truth(count)
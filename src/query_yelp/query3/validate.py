@@ -1,4 +1,15 @@
-import re
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from validators import Number, Validator
+
+VALIDATOR = Validator(Number(
+    35, pattern=r"\b\d+\b", compare="int",
+    found="Found number: {target}",
+    mismatch="Number {target} not found in LLM output.",
+))
+
 
 def validate(llm_output: str) -> (bool, str):
     """
@@ -7,21 +18,4 @@ def validate(llm_output: str) -> (bool, str):
         (True, "OK") if found
         (False, reason) if not
     """
-    ground_truth = 35
-
-    # find all integers in LLM output
-    matches = re.findall(r"\b\d+\b", llm_output)
-
-    if not matches:
-        reason = "No number found in LLM output."
-        print(f"❌ {reason}")
-        return False, reason
-
-    for m in matches:
-        if int(m) == ground_truth:
-            print(f"✅ Found number: {ground_truth}")
-            return True, "OK"
-
-    reason = f"Number {ground_truth} not found in LLM output."
-    print(f"❌ {reason}")
-    return False, reason
+    return VALIDATOR(llm_output)
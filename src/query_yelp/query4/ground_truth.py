@@ -1,5 +1,52 @@
+import sys
+from pathlib import Path
+
 import pandas as pd
-import ast
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from ground_truth_data import GroundTruthData
+
+# columns read from each ground-truth table
+TABLES = {
+    "business": ["business_id", "attributes", "category_list"],
+    "review": ["business_id", "stars"],
+}
+
+
+def compute(data):
+    """
+    Find the business category with the largest number of businesses that accept credit cards,
+    and return its average user rating.
+
+    Args:
+        data (GroundTruthData): Loaded ground-truth tables.
+
+    Returns:
+        pd.DataFrame: A single-row DataFrame with [category, count, avg_rating].
+    """
+    # Businesses that accept credit cards, from the normalized attributes
+    df_business = data["business"]
+    accepts_credit = data.business_attributes["BusinessAcceptsCreditCards"]
+    cc_ids = df_business.loc[accepts_credit, "business_id"]
+
+    # Businesses per category and mean review rating per category, as sparse products
+    index = data.category_index
+    cc_mask = index.business_mask(cc_ids)
+    category_counts = index.category_totals(cc_mask, distinct=True).astype("int64")
+    df_review = data["review"]
+    category_ratings = index.review_stats(df_review["business_id"], df_review["stars"], business_mask=cc_mask)
+
+    # Categories with at least one credit-card business and one review, in category order
+    df_result = pd.DataFrame({
+        "category": category_ratings["category"],
+        "count": category_counts[pd.Index(index.categories).get_indexer(category_ratings["category"])],
+        "avg_rating": category_ratings["mean"],
+    })
+    df_result = df_result[df_result["count"] > 0].sort_values("category").reset_index(drop=True)
+    top_row = df_result.sort_values(by="count", ascending=False).head(1)
+
+    return top_row
+
 
 def get_top_credit_card_category(business_path, review_path):
     """
@@ -13,49 +60,11 @@ def get_top_credit_card_category(business_path, review_path):
     Returns:
         pd.DataFrame: A single-row DataFrame with [category, count, avg_rating].
     """
-    df_business = pd.read_json(business_path, lines=True)
-    df_review = pd.read_json(review_path, lines=True)
-
-    # Parse attributes
-    def parse_attributes(attr):
-        if isinstance(attr, dict):
-            return attr
-        try:
-            return ast.literal_eval(attr)
-        except:
-            return {}
-
-    df_business["attributes_parsed"] = df_business["attributes"].apply(parse_attributes)
-    df_business["accepts_credit"] = df_business["attributes_parsed"].apply(
-        lambda x: x.get("BusinessAcceptsCreditCards", "").lower() == "true"
-    )
-
-    df_cc = df_business[df_business["accepts_credit"] == True].copy()
-
-    # Parse categories
-    def parse_categories(cat):
-        if isinstance(cat, str):
-            return [c.strip() for c in cat.split(",") if c.strip()]
-        return []
-
-    df_cc["category_list"] = df_cc["categories"].apply(parse_categories)
-    df_exploded = df_cc[["business_id", "category_list"]].explode("category_list").dropna()
-
-    # Count businesses per category
-    category_counts = df_exploded.groupby("category_list")["business_id"].nunique().reset_index()
-    category_counts.columns = ["category", "count"]
-
-    # Join reviews and compute avg rating per category
-    df_review_filtered = df_review[df_review["business_id"].isin(df_exploded["business_id"])]
-    df_merged = pd.merge(df_review_filtered, df_exploded, on="business_id", how="inner")
-    category_ratings = df_merged.groupby("category_list")["stars"].mean().reset_index()
-    category_ratings.columns = ["category", "avg_rating"]
-
-    # Merge and get top category
-    df_result = pd.merge(category_counts, category_ratings, on="category")
-    top_row = df_result.sort_values(by="count", ascending=False).head(1)
+    return compute(GroundTruthData.from_paths(TABLES, business=business_path, review=review_path))
 
-    return top_row
+
+def write_ground_truth(top_category, path="ground_truth.csv"):
+    top_category.to_csv(path, index=False, header=False)
 
 
 if __name__ == "__main__":
@@ -66,5 +75,4 @@ if __name__ == "__main__":
 
     print(top_category.to_string(index=False))
 
-
-    top_category.to_csv("ground_truth.csv", index=False, header=False)
+    write_ground_truth(top_category)
@@ -1,4 +1,19 @@
-import re
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from validators import AllOf, Contains, Number, Validator
+
+VALIDATOR = Validator(AllOf(
+    Contains(["Restaurant"], missing="Category '{term}' not found in LLM output."),
+    Number(
+        3.633676092544987, places=2, pattern=r"\d+\.\d+", compare="format",
+        none_found="No float number found in LLM output.",
+        found="Found: Restaurant, {target}",
+        mismatch="Value '{target}' not found in LLM output.",
+    ),
+))
+
 
 def validate(llm_output: str) -> (bool, str):
     """
@@ -13,32 +28,4 @@ def validate(llm_output: str) -> (bool, str):
         (True, "OK") if found
         (False, reason) if not
     """
-    gt_category = "Restaurant"
-    gt_value = 3.633676092544987
-
-    gt_category_lower = gt_category.lower()
-    gt_value_str = f"{gt_value:.2f}"
-
-    # 检查类别
-    if gt_category_lower not in llm_output.lower():
-        reason = f"Category '{gt_category}' not found in LLM output."
-        print(f"❌ {reason}")
-        return False, reason
-
-    # 提取所有浮点数
-    matches = re.findall(r"\d+\.\d+", llm_output)
-
-    if not matches:
-        reason = "No float number found in LLM output."
-        print(f"❌ {reason}")
-        return False, reason
-
-    # 检查是否有匹配的数值
-    for m in matches:
-        if f"{float(m):.2f}" == gt_value_str:
-            print(f"✅ Found: {gt_category}, {gt_value_str}")
-            return True, "OK"
-
-    reason = f"Value '{gt_value_str}' not found in LLM output."
-    print(f"❌ {reason}")
-    return False, reason
+    return VALIDATOR(llm_output)
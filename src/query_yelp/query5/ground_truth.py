@@ -1,39 +1,32 @@
+import sys
+from pathlib import Path
+
 import pandas as pd
-import ast
 
-def get_top_wifi_state(business_path, review_path):
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from ground_truth_data import GroundTruthData
+
+# columns read from each ground-truth table
+TABLES = {
+    "business": ["business_id", "state", "attributes"],
+    "review": ["business_id", "stars"],
+}
+
+
+def compute(data):
     """
     Find the U.S. state with the most businesses offering WiFi,
     and compute the average rating of those businesses.
 
     Args:
-        business_path (str): Path to the business JSONL file.
-        review_path (str): Path to the review JSONL file.
+        data (GroundTruthData): Loaded ground-truth tables.
 
     Returns:
         pd.DataFrame: A one-row DataFrame with columns [state, wifi_business_count, avg_rating].
     """
-    df_business = pd.read_json(business_path, lines=True)
-    df_review = pd.read_json(review_path, lines=True)
-
-    # Parse attributes safely
-    def parse_attributes(attr):
-        if isinstance(attr, dict):
-            return attr
-        try:
-            return ast.literal_eval(attr)
-        except:
-            return {}
-
-    df_business["attributes_parsed"] = df_business["attributes"].apply(parse_attributes)
-
-    # Check if business offers WiFi
-    def offers_wifi(attr_dict):
-        wifi = attr_dict.get("WiFi", "").lower()
-        return wifi in ["u'free'", "u'paid'", "'free'", "'paid'", "free", "paid"]
-
-    df_business["offers_wifi"] = df_business["attributes_parsed"].apply(offers_wifi)
-    df_wifi = df_business[df_business["offers_wifi"] == True].copy()
+    # Businesses offering free or paid WiFi
+    df_business = data["business"]
+    df_wifi = df_business[data.business_attributes["offers_wifi"]]
 
     # Count per state
     state_counts = df_wifi.groupby("state")["business_id"].nunique().reset_index()
@@ -43,6 +36,7 @@ def get_top_wifi_state(business_path, review_path):
     # Extract that state's business IDs
     top_state = top_state_row.iloc[0]["state"]
     wifi_business_ids = df_wifi[df_wifi["state"] == top_state]["business_id"]
+    df_review = data["review"]
     df_review_filtered = df_review[df_review["business_id"].isin(wifi_business_ids)]
     avg_rating = df_review_filtered["stars"].mean()
 
@@ -56,17 +50,36 @@ def get_top_wifi_state(business_path, review_path):
     return result
 
 
-if __name__ == "__main__":
-    business_file = "../ground_truth_dataset/business_gt.json"
-    review_file = "../ground_truth_dataset/review_gt.json"
+def get_top_wifi_state(business_path, review_path):
+    """
+    Find the U.S. state with the most businesses offering WiFi,
+    and compute the average rating of those businesses.
 
-    result = get_top_wifi_state(business_file, review_file)
+    Args:
+        business_path (str): Path to the business JSONL file.
+        review_path (str): Path to the review JSONL file.
 
-    print(result.to_string(index=False))
+    Returns:
+        pd.DataFrame: A one-row DataFrame with columns [state, wifi_business_count, avg_rating].
+    """
+    return compute(GroundTruthData.from_paths(TABLES, business=business_path, review=review_path))
 
+
+def write_ground_truth(result, path="ground_truth.csv"):
     top_row = result.iloc[0]
     state = top_row['state']
     avg_rating = top_row['avg_rating']
 
-    with open("ground_truth.csv", "w") as f:
+    with open(path, "w") as f:
         f.write(f"{state},{avg_rating}\n")
+
+
+if __name__ == "__main__":
+    business_file = "../ground_truth_dataset/business_gt.json"
+    review_file = "../ground_truth_dataset/review_gt.json"
+
+    result = get_top_wifi_state(business_file, review_file)
+
+    print(result.to_string(index=False))
+
+    write_ground_truth(result)
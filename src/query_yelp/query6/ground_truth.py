@@ -1,32 +1,38 @@
+import sys
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
-import ast
 
-def get_top_rated_business_in_period(business_path, review_path, target_period="2016-H1"):
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from ground_truth_data import GroundTruthData
+
+# columns read from each ground-truth table
+TABLES = {
+    "business": ["business_id", "name", "categories"],
+    "review": ["business_id", "stars", "date"],
+}
+
+
+def compute(data, target_period="2016-H1"):
     """
     Find the highest-rated business (with at least 5 reviews) in the specified half-year period.
 
     Args:
-        business_path (str): Path to the business JSONL file.
-        review_path (str): Path to the review JSONL file.
+        data (GroundTruthData): Loaded ground-truth tables.
         target_period (str): Half-year period label (e.g., "2016-H1")
 
     Returns:
-        pd.DataFrame: Single-row DataFrame with period, name, avg_rating, review_count, and categories.
+        pd.DataFrame: Single-row DataFrame with name, avg_rating, review_count, and categories.
     """
-    df_business = pd.read_json(business_path, lines=True)
-    df_review = pd.read_json(review_path, lines=True)
+    df_review = data["review"]
 
-    # Convert review date to datetime
-    df_review["date"] = pd.to_datetime(df_review["date"])
-
-    # Create half-year label
-    def get_half_year_period(date):
-        return f"{date.year}-H1" if date.month <= 6 else f"{date.year}-H2"
-    
-    df_review["period"] = df_review["date"].apply(get_half_year_period)
+    # Half-year label of each review date
+    dates = pd.to_datetime(df_review["date"])
+    period = dates.dt.strftime("%Y") + np.where(dates.dt.month <= 6, "-H1", "-H2")
 
     # Filter reviews for the specified period
-    df_period = df_review[df_review["period"] == target_period]
+    df_period = df_review[period == target_period]
 
     # Aggregate average rating and review count per business
     df_agg = df_period.groupby("business_id").agg(
@@ -41,10 +47,7 @@ def get_top_rated_business_in_period(business_path, review_path, target_period="
     df_top = df_agg.sort_values(["avg_rating", "review_count"], ascending=[False, False]).head(1)
 
     # Merge business metadata
-    df_top = df_top.merge(df_business[["business_id", "name", "categories"]], on="business_id", how="left")
-
-    # Add period column for completeness
-    df_top.insert(0, "period", target_period)
+    df_top = df_top.merge(data["business"][["business_id", "name", "categories"]], on="business_id", how="left")
 
     # Select relevant columns
     df_top = df_top[["name", "avg_rating", "review_count", "categories"]]
@@ -52,6 +55,31 @@ def get_top_rated_business_in_period(business_path, review_path, target_period="
     return df_top
 
 
+def get_top_rated_business_in_period(business_path, review_path, target_period="2016-H1"):
+    """
+    Find the highest-rated business (with at least 5 reviews) in the specified half-year period.
+
+    Args:
+        business_path (str): Path to the business JSONL file.
+        review_path (str): Path to the review JSONL file.
+        target_period (str): Half-year period label (e.g., "2016-H1")
+
+    Returns:
+        pd.DataFrame: Single-row DataFrame with name, avg_rating, review_count, and categories.
+    """
+    data = GroundTruthData.from_paths(TABLES, business=business_path, review=review_path)
+    return compute(data, target_period=target_period)
+
+
+def write_ground_truth(result, path="ground_truth.csv"):
+    top_row = result.iloc[0]
+    name = top_row['name']
+    categories = top_row['categories']
+
+    with open(path, "w") as f:
+        f.write(f"{name},{categories}\n")
+
+
 if __name__ == "__main__":
     business_file = "../ground_truth_dataset/business_gt.json"
     review_file = "../ground_truth_dataset/review_gt.json"
@@ -62,10 +90,4 @@ if __name__ == "__main__":
     print(result.to_string(index=False))
 
     # Optional export
-    top_row = result.iloc[0]
-    name = top_row['name']
-    avg_rating = top_row['avg_rating']
-    categories = top_row['categories']
-
-    with open("ground_truth.csv", "w") as f:
-        f.write(f"{name},{categories}\n")
+    write_ground_truth(result)
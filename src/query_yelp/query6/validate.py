@@ -1,3 +1,16 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from validators import AllOf, Contains, Validator
+
+VALIDATOR = Validator(AllOf(
+    Contains(["Coffee House Too Cafe"], missing="Missing name: {term}"),
+    Contains(["Restaurants", "Breakfast & Brunch", "American (New)", "Cafes"]),
+    ok_message="Name and all categories are present.",
+))
+
+
 def validate(llm_output: str) -> (bool, str):
     """
     Validate if:
@@ -9,26 +22,4 @@ def validate(llm_output: str) -> (bool, str):
         (True, "OK") if all pass
         (False, reason) if not
     """
-    # ground truth
-    name = "Coffee House Too Cafe"
-    categories = ["Restaurants", "Breakfast & Brunch", "American (New)", "Cafes"]
-
-    llm_lower = llm_output.lower()
-    name_lower = name.lower()
-    categories_lower = [c.lower() for c in categories]
-
-    # check name
-    if name_lower not in llm_lower:
-        reason = f"Missing name: {name}"
-        print(f"❌ {reason}")
-        return False, reason
-
-    # check all categories
-    for cat in categories_lower:
-        if cat not in llm_lower:
-            reason = f"Missing category: {cat}"
-            print(f"❌ {reason}")
-            return False, reason
-
-    print("✅ Name and all categories are present.")
-    return True, "OK"
+    return VALIDATOR(llm_output)
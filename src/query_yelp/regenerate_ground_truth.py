@@ -0,0 +1,111 @@
+"""
+Regenerate every queryN/ground_truth.csv in one process.
+
+Discovers the query directories, imports each ground_truth.py, loads every
+table it needs once (the union of the queries' TABLES projections) and
+evaluates each query's compute() against the same GroundTruthData, so the
+review→business join, the exploded categories and the parsed attributes are
+built once and shared.
+
+    python regenerate_ground_truth.py                   # all queries
+    python regenerate_ground_truth.py query3 query4     # a subset
+    python regenerate_ground_truth.py --workers 4       # queries in parallel processes
+"""
+import importlib.util
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from dataset_cache import DATASET_DIR
+from ground_truth_data import GroundTruthData, merge_columns
+
+
+PROJECT_DIR = Path(__file__).resolve().parent
+
+_data = None
+
+
+def find_query_dirs(project_dir: Path):
+    """Find all queryN directories that have a ground_truth.py, sorted by N"""
+    return sorted(
+        [p for p in project_dir.iterdir()
+         if p.is_dir() and re.fullmatch(r"query\d+", p.name) and (p / "ground_truth.py").exists()],
+        key=lambda p: int(re.search(r"\d+", p.name).group())
+    )
+
+
+def load_module(query_dir):
+    path = Path(query_dir) / "ground_truth.py"
+    spec = importlib.util.spec_from_file_location(f"{Path(query_dir).name}_ground_truth", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def warm(data):
+    """Build the shared intermediates before workers fork, so each is built once"""
+    tables = data.tables
+    if "review" in tables and "business" in tables:
+        data.review_business
+    if "business" in tables and "category_list" in tables["business"].columns:
+        data.category_index
+    if "business" in tables and "attributes" in tables["business"].columns:
+        data.business_attributes
+
+
+def _init_worker(data):
+    global _data
+    _data = data
+
+
+def regenerate(query_dir, data=None):
+    """Compute one query's ground truth and write its CSV; returns (name, csv text, seconds)"""
+    module = load_module(query_dir)
+    t0 = time.perf_counter()
+    result = module.compute(data if data is not None else _data)
+    out_path = Path(query_dir) / "ground_truth.csv"
+    module.write_ground_truth(result, out_path)
+    return Path(query_dir).name, out_path.read_text().strip(), time.perf_counter() - t0
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Regenerate ground_truth.csv for every query")
+    parser.add_argument("queries", nargs="*", help="query_ids to regenerate (e.g. query3); default is all")
+    parser.add_argument("--dataset-dir", type=str, default=str(DATASET_DIR),
+                        help="directory with the *_gt.json files")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="evaluate queries in this many processes (tables are loaded once, before forking)")
+    args = parser.parse_args()
+
+    query_dirs = find_query_dirs(PROJECT_DIR)
+    if args.queries:
+        unknown = set(args.queries) - {q.name for q in query_dirs}
+        if unknown:
+            print(f"❌ Unknown query_ids: {sorted(unknown)}")
+            sys.exit(1)
+        query_dirs = [q for q in query_dirs if q.name in args.queries]
+
+    t0 = time.perf_counter()
+    columns = merge_columns(*(load_module(q).TABLES for q in query_dirs))
+    data = GroundTruthData.load(columns, args.dataset_dir)
+    warm(data)
+    print(f"📦 Loaded {', '.join(f'{t} ({len(c)} cols)' for t, c in columns.items())} "
+          f"in {time.perf_counter() - t0:.2f}s")
+
+    if args.workers > 1:
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                                 initargs=(data,)) as pool:
+            results = list(pool.map(regenerate, query_dirs))
+    else:
+        results = [regenerate(q, data) for q in query_dirs]
+
+    for name, csv_text, seconds in results:
+        print(f"✅ {name} ({seconds:.2f}s): {' | '.join(csv_text.splitlines())}")
+    print(f"🌟 Regenerated {len(results)} ground truths in {time.perf_counter() - t0:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
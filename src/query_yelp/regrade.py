@@ -0,0 +1,98 @@
+"""
+Re-grade stored agent transcripts with the current validators and rebuild pass@k.
+
+After fixing a queryN/validate.py, stream the transcript store(s) written by
+run_experiments.py through the validators (in a process pool, see
+validators.validate_many) instead of re-running the sweep against the model:
+
+    python regrade.py pass_at_k_results_wh_gpt-4.1.transcripts.jsonl.gz
+    python regrade.py runs.transcripts.jsonl.gz --query query2 query5 -o regraded.csv
+    python regrade.py runs.transcripts.jsonl.gz --journal regraded.journal.jsonl
+
+Only the final answer is graded; traces are not loaded into memory. The pass@k
+table is computed with passk.score_journal, one row per (model, description,
+query) cell; --journal also writes the new verdicts as a run journal.
+"""
+import argparse
+import time
+
+from journal import RunJournal
+from passk import score_journal
+from transcripts import TranscriptStore
+from validators import load_validators, validate_many
+
+
+CELL_FIELDS = ("model", "description", "query_id")
+
+
+def load_answers(paths, queries=None):
+    """One {cell fields, run_id, success, final_answer} record per stored run (later duplicates win)"""
+    runs = {}
+    for path in paths:
+        for rec in TranscriptStore(path).iter_records():
+            if queries and rec.get("query_id") not in queries:
+                continue
+            row = {field: rec[field] for field in CELL_FIELDS if field in rec}
+            row.update(run_id=rec["run_id"], success=rec.get("success"), final_answer=rec.get("final_answer") or "")
+            key = tuple(row.get(field) for field in CELL_FIELDS + ("run_id",))
+            runs.pop(key, None)
+            runs[key] = row
+    return list(runs.values())
+
+
+def regrade(rows, validators=None, workers=None):
+    """Rows with `success` replaced by the current verdict (and the old one kept as `stored_success`)"""
+    verdicts = validate_many([(row["query_id"], row["final_answer"]) for row in rows], validators, workers)
+    return [
+        {**row, "stored_success": row["success"], "success": ok, "reason": reason}
+        for row, (ok, reason) in zip(rows, verdicts)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-grade stored transcripts and rebuild pass@k")
+    parser.add_argument("transcripts", nargs="+", help="transcript stores (*.transcripts.jsonl.gz)")
+    parser.add_argument("--query", nargs="+", default=None, help="only these query_ids")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 5, 10, 15, 20, 30, 40, 50])
+    parser.add_argument("--workers", type=int, default=None, help="grading processes; default CPU count")
+    parser.add_argument("--bootstrap", type=int, default=0, help="bootstrap replicates for CIs; 0 disables")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("-o", "--output", default=None, help="CSV path; default prints to stdout")
+    parser.add_argument("--journal", default=None, help="also write the new verdicts to this run journal")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    rows = load_answers(args.transcripts, set(args.query) if args.query else None)
+    if not rows:
+        print("❌ No transcripts found.")
+        return
+    validators = load_validators()
+    missing = sorted({row["query_id"] for row in rows} - set(validators))
+    if missing:
+        print(f"⚠️ No validator for {missing}, skipping their runs")
+        rows = [row for row in rows if row["query_id"] in validators]
+    graded = regrade(rows, validators, args.workers)
+
+    flipped = [row for row in graded if row["stored_success"] is not None and row["success"] != bool(row["stored_success"])]
+    print(f"🔁 Re-graded {len(graded)} runs in {time.perf_counter() - t0:.2f}s, {len(flipped)} verdicts changed")
+    for row in flipped[:20]:
+        print(f"   {row['query_id']} run {row['run_id']}: {bool(row['stored_success'])} -> {row['success']} ({row['reason']})")
+
+    if args.journal:
+        journal = RunJournal(args.journal)
+        for row in graded:
+            journal.append(**{f: row[f] for f in CELL_FIELDS if f in row}, run_id=row["run_id"], success=row["success"])
+        print(f"📝 Wrote {len(graded)} verdicts to: {args.journal}")
+
+    records = [{**{f: row[f] for f in CELL_FIELDS if f in row}, "run_id": row["run_id"], "success": row["success"]}
+               for row in graded]
+    df = score_journal(records, args.k, args.bootstrap, seed=args.seed)
+    if args.output:
+        df.to_csv(args.output, index=False)
+        print(f"💾 Saved {int(df['n'].notna().sum())} cells to: {args.output}")
+    else:
+        print(df.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
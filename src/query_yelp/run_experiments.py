@@ -1,15 +1,21 @@
 import re
 import sys
-import numpy as np
 import pandas as pd
-import os
+import time
+from contextlib import nullcontext
 from pathlib import Path
-import yaml
 from dotenv import load_dotenv
-from openai import AzureOpenAI
 
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 from common_scaffold.agent_tools import run_baseline_agent
+import instrumentation
+from connections import get_manager
+from journal import RunJournal
+from passk import pass_at_k, pass_at_k_matrix
+from sampling import AdaptiveStopper
+from scheduler import Job, RateLimitedClient, TokenBucket, run_jobs
+from sweep import Cell, expand, load_sweep, make_client, to_long
+from transcripts import TranscriptStore, final_answer
 
 
 def find_query_dirs(project_dir: Path):
@@ -20,11 +26,72 @@ def find_query_dirs(project_dir: Path):
     )
 
 
-def pass_at_k(n, c, k):
-    """Compute unbiased pass@k"""
-    if n - c < k:
-        return 1.0
-    return 1.0 - np.prod(1.0 - k / np.arange(n - c + 1, n + 1))
+def cell_outcomes(records, max_n, default_model, default_description):
+    """
+    Map Cell -> {run_id: success} for journaled runs with run_id <= max_n.
+    Records written before sweeps existed carry no description and belong to
+    the default cell fields.
+    """
+    runs = {}
+    for rec in records:
+        if rec["run_id"] <= max_n:
+            cell = Cell(rec.get("model", default_model), rec.get("description", default_description),
+                        rec["query_id"])
+            runs.setdefault(cell, {})[rec["run_id"]] = bool(rec["success"])
+    return runs
+
+
+def legacy_results(result_path, cells, outcomes, default_model, default_description):
+    """
+    Rows of a single-cell results CSV for cells in `cells` with no journaled
+    run. Queries finished before the journal existed only survive there, and
+    the CSV is rewritten with them, so they are read on every start; a cell
+    with any journaled run is derived from the journal instead (e.g. after
+    raising n).
+    """
+    if not Path(result_path).exists():
+        return {}
+    rows = {}
+    for row in pd.read_csv(result_path).to_dict("records"):
+        cell = Cell(default_model, default_description, row["query_id"])
+        if cell in cells and cell not in outcomes:
+            rows[cell] = {**cell._asdict(), **row}
+    return rows
+
+
+def results_from_journal(outcomes, cells, finished, k_list, legacy_rows=None):
+    """
+    Derive the pass@k table from journaled runs: one row per finished cell (in
+    sweep order) with the n actually used, and after each (model, description)
+    block an Overall row with the mean over its queries.
+    Rows for cells that only exist in a pre-journal results CSV are kept as-is.
+    """
+    done = [cell for cell in cells if cell in finished]
+    n = [len(outcomes.get(cell, {})) for cell in done]
+    c = [sum(outcomes.get(cell, {}).values()) for cell in done]
+    values = pass_at_k_matrix(n, c, k_list)
+    computed = {}
+    for i, cell in enumerate(done):
+        row = {**cell._asdict(), "n": n[i], "c": c[i]}
+        for j, k in enumerate(k_list):
+            row[f"pass@{k}"] = values[i, j]
+        computed[cell] = row
+
+    legacy_rows = legacy_rows or {}
+    blocks = {}
+    for cell in cells:
+        row = computed.get(cell, legacy_rows.get(cell))
+        if row is not None:
+            blocks.setdefault((cell.model, cell.description), []).append(row)
+
+    frames = []
+    for (model, description), rows in blocks.items():
+        df = pd.DataFrame(rows)
+        overall_row = {"model": model, "description": description, "query_id": "Overall"}
+        for k in k_list:
+            overall_row[f"pass@{k}"] = df[f"pass@{k}"].mean()
+        frames.append(pd.concat([df, pd.DataFrame([overall_row])], ignore_index=True))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
 
 
 def main():
@@ -32,40 +99,50 @@ def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--start", type=str, default=None,
                         help="query_id (e.g. query3) to start from; default is from the beginning")
+    parser.add_argument("--sweep", type=str, default=None,
+                        help="sweep spec YAML (see sweep.yaml); default is the single gpt-4.1 with-hint run")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="number of agent runs kept in flight at once, across all sweep cells")
+    parser.add_argument("--rpm", type=float, default=None,
+                        help="max model requests per minute per endpoint, for models whose spec sets none")
+    parser.add_argument("--ci-width", type=float, default=None,
+                        help="adaptive mode: stop sampling a query once the confidence interval on its "
+                             "success rate (pass@1) is at most this wide; default samples all n runs")
+    parser.add_argument("--min-n", type=int, default=10,
+                        help="adaptive mode: runs to take before the stopping rule is checked")
+    parser.add_argument("--confidence", type=float, default=0.95,
+                        help="adaptive mode: confidence level of the pass@k intervals")
+    parser.add_argument("--no-trace", action="store_true",
+                        help="skip the per-run span trace (<results>.trace.json) and latency summary")
     args = parser.parse_args()
 
-    # Configurable parameters
-    n = 50
-    k_list = [1, 5, 10, 15, 20, 30, 40, 50]
-
     project_dir = Path(__file__).parent
     load_dotenv()
 
-    # Load DB description & config
-    with open(project_dir / "db_description_withhint.txt") as f:
-        db_description = f.read()
-    with open(project_dir / "db_config.yaml") as f:
-        db_config = yaml.safe_load(f)
+    # Configurable parameters
+    spec = load_sweep(args.sweep, project_dir)
+    n = spec["n"]
+    k_list = spec["k_list"]
+    stopper = AdaptiveStopper(k_list, max_n=n, max_width=args.ci_width,
+                              min_n=args.min_n, confidence=args.confidence)
 
-    client = AzureOpenAI(
-        api_key=os.getenv("AZURE_API_KEY_o3"),
-        api_version=os.getenv("AZURE_API_VERSION_o3", "2023-05-15"),
-        azure_endpoint=os.getenv("AZURE_API_BASE_o3")
-    )
-    deployment_name = "gpt-4.1"
+    # Load DB descriptions & config
+    db_descriptions = {name: path.read_text() for name, path in spec["descriptions"].items()}
+    # db_config.yaml is read once, with paths resolved against the project; the
+    # DuckDB / Mongo handles behind it are opened once and shared by all runs
+    db_config = get_manager().config
+
+    # one client and one token bucket per model endpoint, shared by every in-flight run
+    clients, deployments = {}, {}
+    for model, cfg in spec["models"].items():
+        rpm = cfg.get("rpm") or args.rpm
+        bucket = TokenBucket.per_minute(rpm) if rpm else None
+        clients[model] = RateLimitedClient(make_client(cfg), bucket)
+        deployments[model] = cfg.get("deployment", model)
 
     queries = find_query_dirs(project_dir)
     query_names = [q.name for q in queries]
 
-    # load existing results if any
-    result_path = project_dir / "pass_at_k_results_wh_gpt-4.1.csv"
-    if result_path.exists():
-        df_existing = pd.read_csv(result_path)
-        done_queries = set(df_existing["query_id"].dropna().tolist())
-    else:
-        df_existing = pd.DataFrame()
-        done_queries = set()
-
     # decide where to start
     start_idx = 0
     if args.start:
@@ -75,62 +152,161 @@ def main():
             print(f"❌ Invalid start query_id: {args.start}")
             sys.exit(1)
 
+    cells = expand(spec, queries)
+    query_dir_of = dict(cells)
+    cells = [cell for cell, _ in cells]
+    default_model, default_description = next(iter(spec["models"])), next(iter(spec["descriptions"]))
+    single_cell = len(spec["models"]) == 1 and len(spec["descriptions"]) == 1
+
+    def label(cell):
+        return cell.query_id if single_cell else "/".join(cell)
+
+    # every finished run is journaled; the results CSV is derived from the journal
+    result_path = spec["results"]
+    journal = RunJournal(result_path.with_suffix(".journal.jsonl"),
+                         defaults={"model": default_model, "description": default_description})
+    # final answers and model traces, so regrade.py can re-score runs without the model
+    transcripts = TranscriptStore(result_path.with_suffix(".transcripts.jsonl.gz"))
+    # model / tool / validation spans of every run, for finding where sweep time goes
+    tracer = None if args.no_trace else instrumentation.enable()
+    trace_path = result_path.with_suffix(".trace.json")
+    records = journal.replay()
+    outcomes = cell_outcomes(records, n, default_model, default_description)
+
+    legacy_rows = {}
+    if single_cell:
+        legacy_rows = legacy_results(result_path, query_dir_of, outcomes, default_model, default_description)
+    finished = {
+        cell for cell, runs in outcomes.items() if stopper.should_stop(len(runs), sum(runs.values()))
+    }
+    done_cells = set(legacy_rows) | finished
+
     print(f"📝 Found {len(queries)} queries: {query_names}")
     print(f"🚀 Starting from: {query_names[start_idx]}")
-    print(f"✅ Already done: {done_queries}")
-
-    all_rows = []
+    print(f"🧠 Models: {deployments}, descriptions: {list(db_descriptions)}")
+    print(f"✅ Already done: {sorted(label(cell) for cell in done_cells)}")
+    print(f"🧵 Concurrency: {args.concurrency}")
+    if stopper.adaptive:
+        print(f"📉 Adaptive sampling: stop at pass@1 CI width <= {args.ci_width} "
+              f"({args.confidence:.0%}), min n={stopper.min_n}, max n={n}")
 
-    for i, query_dir in enumerate(queries[start_idx:], start=start_idx + 1):
-        qid = query_dir.name
-        if qid in done_queries:
-            print(f"⏩ Skipping already done: {qid}")
+    todo = []
+    for cell in cells:
+        if query_names.index(cell.query_id) < start_idx:
             continue
+        if cell in done_cells:
+            print(f"⏩ Skipping already done: {label(cell)}")
+            continue
+        if cell in outcomes:
+            print(f"↩️  Resuming {label(cell)}: {len(outcomes[cell])}/{n} runs in journal")
+        todo.append(cell)
+
+    in_flight = {cell: 0 for cell in todo}
+    stopped = set()
+    failed = []
 
-        print(f"\n🚀 Query {i}/{len(queries)}: {qid}")
-        c = 0
+    def jobs():
+        # pulled lazily by the scheduler, so the stopping rule sees every finished run;
+        # runs already in flight when it fires still complete and are counted
+        for cell in todo:
+            for run_id in range(1, n + 1):
+                runs = outcomes.get(cell, {})
+                if stopper.should_stop(len(runs), sum(runs.values())):
+                    stopped.add(cell)
+                    break
+                if run_id in runs:
+                    continue
+                in_flight[cell] += 1
+                yield Job(cell, run_id, query_dir_of[cell])
 
-        for run_id in range(1, n + 1):
-            print(f"   ▶ Run {run_id}/{n}")
-            print(f"🧠 Using model deployment: {deployment_name}")
+    def run_one(job):
+        cell = job.cell
+        client = clients[cell.model]
+        print(f"   ▶ {label(cell)} run {job.run_id}/{n}")
+        tokens_before = client.thread_tokens()
+        client.start_transcript()
+        t0 = time.perf_counter()
+        with tracer.run(**cell._asdict(), run_id=job.run_id) if tracer else nullcontext():
             success = run_baseline_agent(
-                query_dir=query_dir,
+                query_dir=job.query_dir,
                 project_dir=project_dir,
-                db_description=db_description,
+                db_description=db_descriptions[cell.description],
                 db_config=db_config,
                 client=client,
-                deployment_name=deployment_name
+                deployment_name=deployments[cell.model]
             )
-            if success:
-                c += 1
+        trace = client.thread_transcript()
+        return {
+            "success": bool(success),
+            "latency": time.perf_counter() - t0,
+            "tokens": client.thread_tokens() - tokens_before,
+        }, trace
+
+    def save_results():
+        df = results_from_journal(outcomes, cells, finished, k_list, legacy_rows)
+        if df.empty:
+            return df
+        if single_cell:
+            # keep the historical one-row-per-query layout
+            df.drop(columns=["model", "description"]).to_csv(result_path, index=False)
+        else:
+            to_long(df, k_list).to_csv(result_path, index=False)
+        return df
 
-        row = {"query_id": qid, "n": n, "c": c}
-        print(f"✅ {qid}: {c}/{n} correct")
+    def on_result(job, result):
+        cell = job.cell
+        result, trace = result
+        transcripts.append(**cell._asdict(), run_id=job.run_id, success=result["success"],
+                           final_answer=final_answer(trace), trace=trace)
+        records.append(journal.append(**cell._asdict(), run_id=job.run_id, **result))
+        outcomes.setdefault(cell, {})[job.run_id] = result["success"]
+        settle(cell)
 
-        for k in k_list:
-            passk = pass_at_k(n, c, k)
-            row[f"pass@{k}"] = passk
-            print(f"🎯 {qid} pass@{k}: {passk:.4f}")
+    def on_error(job, exc):
+        # not journaled, so the run is retried when the sweep is resumed
+        failed.append(job)
+        print(f"❌ {label(job.cell)} run {job.run_id} failed: {type(exc).__name__}: {exc}")
+        settle(job.cell)
 
-        all_rows.append(row)
+    def settle(cell):
+        in_flight[cell] -= 1
+        runs = outcomes.get(cell, {})
+        n_used, c = len(runs), sum(runs.values())
+        if in_flight[cell] > 0 or not (cell in stopped or stopper.should_stop(n_used, c)):
+            return
+        finished.add(cell)
+
+        print(f"✅ {label(cell)}: {c}/{n_used} correct")
+        for k in k_list:
+            print(f"🎯 {label(cell)} pass@{k}: {pass_at_k(n_used, c, k):.4f}")
 
-        # save intermediate results
-        df_new = pd.DataFrame(all_rows)
-        df_combined = pd.concat([df_existing, df_new], ignore_index=True)
-        df_combined.to_csv(result_path, index=False)
+        save_results()
         print(f"💾 Saved intermediate results to: {result_path}")
 
-        # reset new rows for next query
-        df_existing = df_combined.copy()
-        all_rows = []
+    def save_trace():
+        tracer.export_chrome(trace_path)
+        summary = instrumentation.summarize(tracer.events)
+        if summary.empty:
+            return
+        latency_path = result_path.with_suffix(".latency.csv")
+        summary.to_csv(latency_path, index=False)
+        print(f"\n⏱️  Span summary (seconds) saved to: {latency_path}, trace: {trace_path}")
+        cols = [c for c in instrumentation.CELL_TAGS if c in summary and not single_cell]
+        cols += ["query_id", "cat", "count", "total", "p50", "p90", "p99", "share"]
+        print(summary[cols].to_string(index=False, float_format=lambda x: f"{x:.3f}"))
+
+    try:
+        run_jobs(jobs(), run_one, max_in_flight=args.concurrency, on_result=on_result, on_error=on_error)
+    finally:
+        if tracer is not None:
+            save_trace()
+
+    if failed:
+        print(f"⚠️ {len(failed)} runs failed and were not journaled; re-run to retry them: "
+              f"{[f'{label(job.cell)}#{job.run_id}' for job in failed]}")
 
     # compute overall and save
-    if not df_existing.empty:
-        overall_row = {"query_id": "Overall"}
-        for k in k_list:
-            overall_row[f"pass@{k}"] = df_existing[f"pass@{k}"].mean()
-        df_final = pd.concat([df_existing, pd.DataFrame([overall_row])], ignore_index=True)
-        df_final.to_csv(result_path, index=False)
+    if not save_results().empty:
         print(f"\n🌟 Final results (with Overall) saved to: {result_path}")
 
 if __name__ == "__main__":
@@ -0,0 +1,73 @@
+"""
+Adaptive stopping rule for pass@k sampling.
+
+Runs of one query are treated as i.i.d. Bernoulli trials with success rate p,
+so pass@k = 1 - (1 - p)^k is monotone in p and a confidence interval on p
+maps directly onto one for every k. Sampling a query stops once the Wilson
+interval on p (= pass@1) is narrower than the configured width, or max_n is
+hit. The rule is deliberately on p rather than on every pass@k: for large k
+the pass@k interval of an all-fail query stays near [0, 1] until n is far
+beyond k, so requiring every k to be narrow would never stop early on exactly
+the saturated (all pass) and hopeless (all fail) queries where stopping early
+saves the most. Their p intervals shrink like z^2 / n.
+"""
+import math
+from statistics import NormalDist
+
+
+def wilson_interval(n, c, z):
+    """Wilson score interval for a binomial proportion with c successes out of n"""
+    if n == 0:
+        return 0.0, 1.0
+    p = c / n
+    denom = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / denom
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return max(0.0, center - half), min(1.0, center + half)
+
+
+def pass_at_k_interval(n, c, k, z):
+    """Confidence interval for the true pass@k, from the Wilson interval on p"""
+    lo, hi = wilson_interval(n, c, z)
+    return 1.0 - (1.0 - lo) ** k, 1.0 - (1.0 - hi) ** k
+
+
+class AdaptiveStopper:
+    """
+    Decide when a query has been sampled enough.
+
+    With max_width=None this is the fixed-n rule: stop exactly at max_n.
+    Otherwise stop as soon as n >= min_n and the Wilson interval on the
+    success rate p (pass@1) is no wider than max_width. widths() reports the
+    implied pass@k interval widths for k in k_list; they do not gate stopping.
+    """
+
+    def __init__(self, k_list, max_n, max_width=None, min_n=10, confidence=0.95):
+        self.k_list = list(k_list)
+        self.max_n = max_n
+        self.max_width = max_width
+        self.min_n = min(min_n, max_n)
+        self.z = NormalDist().inv_cdf(0.5 + confidence / 2)
+
+    @property
+    def adaptive(self):
+        return self.max_width is not None
+
+    def width(self, n, c):
+        """Width of the Wilson interval on p after c successes in n runs"""
+        lo, hi = wilson_interval(n, c, self.z)
+        return hi - lo
+
+    def widths(self, n, c):
+        widths = {}
+        for k in self.k_list:
+            lo, hi = pass_at_k_interval(n, c, k, self.z)
+            widths[k] = hi - lo
+        return widths
+
+    def should_stop(self, n, c):
+        if n >= self.max_n:
+            return True
+        if not self.adaptive or n < self.min_n:
+            return False
+        return self.width(n, c) <= self.max_width
@@ -0,0 +1,181 @@
+"""
+Bounded-concurrency scheduling for run_experiments.py.
+
+Agent runs are independent and spend almost all of their time waiting on the
+model endpoint, so we keep several (query, run_id) jobs in flight at once and
+throttle the model calls themselves with a per-endpoint token bucket.
+"""
+import random
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from types import SimpleNamespace
+
+import instrumentation
+from transcripts import TraceRecorder
+
+
+Job = namedtuple("Job", ["cell", "run_id", "query_dir"])
+
+_NO_JOB = object()
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts of up to `capacity`"""
+
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity is not None else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def per_minute(cls, rpm, capacity=None):
+        return cls(rpm / 60.0, capacity)
+
+    def acquire(self):
+        """Block until a token is available and take it"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    delay = self._blocked_until - now
+                else:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                    self._last = now
+                    if self._tokens >= 1.0:
+                        self._tokens -= 1.0
+                        return
+                    delay = (1.0 - self._tokens) / self.rate
+            time.sleep(delay)
+
+    def backoff(self, seconds):
+        """Stop handing out tokens for `seconds`, e.g. after the endpoint answered 429"""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+            self._last = self._blocked_until
+
+
+def is_retryable(exc):
+    """True for rate-limit and transient server/network errors from the OpenAI SDK"""
+    status = getattr(exc, "status_code", None)
+    if status == 429 or (status is not None and status >= 500):
+        return True
+    return type(exc).__name__ in ("RateLimitError", "APITimeoutError", "APIConnectionError")
+
+
+class RateLimitedClient:
+    """
+    Wrap an OpenAI-style client so every chat completion first takes a token
+    from `bucket`, and 429 / transient errors are retried with exponential
+    backoff. A backoff pauses the whole bucket, so every worker sharing the
+    endpoint slows down together instead of hammering it in parallel.
+    Everything other than `chat.completions.create` is passed through.
+    """
+
+    def __init__(self, client, bucket=None, max_retries=6, base_delay=1.0, max_delay=60.0):
+        self._client = client
+        self.bucket = bucket
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._usage = threading.local()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, *args, **kwargs):
+        requested = time.perf_counter()
+        for attempt in range(self.max_retries + 1):
+            if self.bucket is not None:
+                self.bucket.acquire()
+            try:
+                t0 = time.perf_counter()
+                response = self._client.chat.completions.create(*args, **kwargs)
+            except Exception as e:
+                if attempt == self.max_retries or not is_retryable(e):
+                    raise
+                delay = min(self.max_delay, self.base_delay * 2 ** attempt) * random.uniform(0.5, 1.5)
+                print(f"⏳ {type(e).__name__}, retrying in {delay:.1f}s ({attempt + 1}/{self.max_retries})")
+                if self.bucket is not None:
+                    self.bucket.backoff(delay)
+                else:
+                    time.sleep(delay)
+            else:
+                usage = getattr(response, "usage", None)
+                self._usage.tokens = self.thread_tokens() + (getattr(usage, "total_tokens", 0) or 0)
+                recorder = getattr(self._usage, "recorder", None)
+                if recorder is not None:
+                    recorder.record(kwargs.get("messages", ()), response, time.perf_counter() - t0)
+                tracer = instrumentation.current()
+                if tracer is not None:
+                    tracer.model_call(kwargs.get("messages"), response, requested, t0, time.perf_counter(),
+                                      attempts=attempt + 1)
+                return response
+
+    def thread_tokens(self):
+        """Total tokens used by calls made from the current thread"""
+        return getattr(self._usage, "tokens", 0)
+
+    def start_transcript(self):
+        """Start recording the calls made from the current thread (replacing any earlier recording)"""
+        self._usage.recorder = TraceRecorder()
+
+    def thread_transcript(self):
+        """Calls recorded on the current thread since start_transcript(), as a transcripts.py trace"""
+        recorder = getattr(self._usage, "recorder", None)
+        return recorder.calls if recorder is not None else []
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+def run_jobs(jobs, worker, max_in_flight=1, on_result=None, on_error=None):
+    """
+    Call worker(job) for every job, with at most `max_in_flight` running at once.
+
+    Jobs are pulled from the iterable lazily, so a generator can decide what to
+    submit next from the results seen so far. on_result(job, result) is called
+    on the calling thread as each job finishes, before the next job is pulled.
+    A job that raises is passed to on_error(job, exc) and the rest keep going.
+    Without on_error, nothing new is started after the first exception; the
+    jobs already running still finish and reach on_result, then the first
+    exception is re-raised.
+    """
+    if max_in_flight < 1:
+        raise ValueError(f"max_in_flight must be >= 1, got {max_in_flight}")
+
+    jobs = iter(jobs)
+    pending = {}
+    first_error = None
+    with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+
+        def fill():
+            while first_error is None and len(pending) < max_in_flight:
+                job = next(jobs, _NO_JOB)
+                if job is _NO_JOB:
+                    return
+                pending[pool.submit(worker, job)] = job
+
+        fill()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                job = pending.pop(fut)
+                try:
+                    result = fut.result()
+                except Exception as e:
+                    if on_error is not None:
+                        on_error(job, e)
+                    elif first_error is None:
+                        first_error = e
+                    continue
+                if on_result is not None:
+                    on_result(job, result)
+            fill()
+    if first_error is not None:
+        raise first_error
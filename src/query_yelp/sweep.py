@@ -0,0 +1,107 @@
+"""
+Sweep specs for run_experiments.py.
+
+A sweep is the cross product of model clients, DB description variants and
+queries (see sweep.yaml). Without a spec file, run_experiments runs the
+single-cell DEFAULT_SPEC, which is the original gpt-4.1 / with-hint setup.
+"""
+import copy
+import os
+from collections import namedtuple
+from pathlib import Path
+
+import pandas as pd
+import yaml
+from openai import AzureOpenAI, OpenAI
+
+from fake_llm import FakeChatClient
+
+
+Cell = namedtuple("Cell", ["model", "description", "query_id"])
+
+DEFAULT_SPEC = {
+    "n": 50,
+    "k_list": [1, 5, 10, 15, 20, 30, 40, 50],
+    "models": {
+        "gpt-4.1": {
+            "type": "azure",
+            "deployment": "gpt-4.1",
+            "api_key_env": "AZURE_API_KEY_o3",
+            "api_version_env": "AZURE_API_VERSION_o3",
+            "endpoint_env": "AZURE_API_BASE_o3",
+        },
+    },
+    "descriptions": {"wh": "db_description_withhint.txt"},
+    "queries": "all",
+    "results": "pass_at_k_results_wh_gpt-4.1.csv",
+}
+
+
+def load_sweep(path, project_dir: Path):
+    """Read a sweep spec, filling unspecified keys from DEFAULT_SPEC; None gives the default"""
+    spec = copy.deepcopy(DEFAULT_SPEC)
+    base_dir = project_dir
+    if path is not None:
+        path = Path(path)
+        with open(path) as f:
+            spec.update(yaml.safe_load(f) or {})
+        base_dir = path.resolve().parent
+    spec["descriptions"] = {
+        name: (base_dir / file) for name, file in spec["descriptions"].items()
+    }
+    spec["results"] = base_dir / spec["results"]
+    for cfg in spec["models"].values():
+        if cfg.get("script"):
+            cfg["script"] = base_dir / cfg["script"]
+    return spec
+
+
+def make_client(model_cfg):
+    """Build the SDK client for one `models` entry of a sweep spec"""
+    kind = model_cfg.get("type", "azure")
+    if kind == "azure":
+        return AzureOpenAI(
+            api_key=os.getenv(model_cfg["api_key_env"]),
+            api_version=os.getenv(model_cfg.get("api_version_env", ""), "2023-05-15"),
+            azure_endpoint=os.getenv(model_cfg["endpoint_env"])
+        )
+    if kind == "openai":
+        return OpenAI(
+            api_key=os.getenv(model_cfg.get("api_key_env", "OPENAI_API_KEY")),
+            base_url=os.getenv(model_cfg["endpoint_env"]) if model_cfg.get("endpoint_env") else None
+        )
+    if kind == "fake":
+        keys = ("latency_median", "latency_sigma", "tokens_per_second", "tokens_per_second_sigma", "seed")
+        overrides = {key: model_cfg[key] for key in keys if key in model_cfg}
+        if model_cfg.get("script"):
+            return FakeChatClient.from_script(model_cfg["script"], **overrides)
+        return FakeChatClient(**overrides)
+    raise ValueError(f"Unknown model type: {kind}")
+
+
+def expand(spec, query_dirs):
+    """All cells of the sweep, model-major, with the queryN directory of each"""
+    wanted = spec["queries"]
+    if wanted != "all":
+        known = {q.name for q in query_dirs}
+        missing = [q for q in wanted if q not in known]
+        if missing:
+            raise ValueError(f"Unknown queries in sweep spec: {missing}")
+        query_dirs = [q for q in query_dirs if q.name in set(wanted)]
+    return [
+        (Cell(model, description, q.name), q)
+        for model in spec["models"]
+        for description in spec["descriptions"]
+        for q in query_dirs
+    ]
+
+
+def to_long(df_wide, k_list):
+    """Melt a wide pass@k table (one pass@k column per k) into one row per k"""
+    value_cols = [f"pass@{k}" for k in k_list]
+    id_cols = [col for col in df_wide.columns if col not in value_cols]
+    df = df_wide.reset_index(names="_row").melt(
+        id_vars=["_row"] + id_cols, value_vars=value_cols, var_name="k", value_name="pass_at_k"
+    )
+    df["k"] = df["k"].str.removeprefix("pass@").astype(int)
+    return df.sort_values(["_row", "k"], ignore_index=True).drop(columns="_row")
@@ -0,0 +1,161 @@
+"""
+Compressed, append-only store of agent run transcripts.
+
+Next to the run journal (which only keeps the verdict), every finished run's
+final answer and full model trace is appended as one gzip member holding one
+JSON line. Concatenated gzip members are themselves a valid gzip file, so
+`zcat runs.transcripts.jsonl.gz` works, and a crash mid-write can only tear
+the last member: it is skipped on read and cut off before the next append.
+regrade.py re-scores these transcripts with the current validators instead of
+re-running the agents.
+
+A trace is the list of model calls recorded by RateLimitedClient: each call
+stores only the messages added since the previous call (`start` is where they
+begin in the request), plus the reply and its token usage, so a long
+conversation is not stored once per turn. messages_of() rebuilds the full
+conversation.
+
+    store = TranscriptStore("pass_at_k_results_wh_gpt-4.1.transcripts.jsonl.gz")
+    store.append(query_id="query1", run_id=3, success=True, final_answer="...", trace=[...])
+    for rec in store.replay(): ...
+"""
+import gzip
+import json
+import os
+import threading
+import time
+import zlib
+
+
+def to_jsonable(value):
+    """json.dumps default for SDK objects (pydantic models, namespaces)"""
+    if hasattr(value, "model_dump"):
+        return value.model_dump(exclude_none=True)
+    if hasattr(value, "__dict__"):
+        return vars(value)
+    return str(value)
+
+
+def messages_of(trace):
+    """The full message list of the last call in `trace`, followed by its reply"""
+    messages = []
+    for call in trace:
+        messages[call["start"]:] = call["messages"]
+    if trace and trace[-1].get("response") is not None:
+        messages.append(trace[-1]["response"])
+    return messages
+
+
+def final_answer(trace):
+    """Text of the last assistant reply in `trace` ("" when there is none)"""
+    for call in reversed(trace):
+        content = (call.get("response") or {}).get("content")
+        if content:
+            return content
+    return ""
+
+
+def _members(f, chunk_size=1 << 20):
+    """Yield (end offset, payload) for every complete gzip member of `f`, stopping at the first bad one"""
+    offset = 0
+    decoder, payload = zlib.decompressobj(zlib.MAX_WBITS | 16), []
+    while chunk := f.read(chunk_size):
+        while chunk:
+            try:
+                payload.append(decoder.decompress(chunk))
+            except zlib.error:
+                return  # garbage after the last good member: treated like a torn tail
+            if not decoder.eof:
+                offset += len(chunk)
+                break
+            offset += len(chunk) - len(decoder.unused_data)
+            yield offset, b"".join(payload)
+            chunk = decoder.unused_data
+            decoder, payload = zlib.decompressobj(zlib.MAX_WBITS | 16), []
+
+
+class TranscriptStore:
+    """Gzip-member-per-record JSONL store of {query_id, run_id, ..., final_answer, trace} records"""
+
+    KEY_FIELDS = ("model", "description", "query_id", "run_id")
+
+    def __init__(self, path, compresslevel=6):
+        self.path = path
+        self.compresslevel = compresslevel
+        self._lock = threading.Lock()
+        self._checked_tail = False
+
+    def iter_records(self):
+        """Every complete record, in write order (duplicates included); a torn tail is ignored"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            for _, payload in _members(f):
+                for line in payload.splitlines():
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+
+    def replay(self):
+        """Records in write order; if a run was stored twice, the later record wins"""
+        records = {}
+        for rec in self.iter_records():
+            key = tuple(rec.get(k) for k in self.KEY_FIELDS)
+            records.pop(key, None)
+            records[key] = rec
+        return list(records.values())
+
+    def append(self, **record):
+        """Durably append one transcript record; safe to call from several threads"""
+        record.setdefault("ts", time.time())
+        line = json.dumps(record, ensure_ascii=False, default=to_jsonable) + "\n"
+        member = gzip.compress(line.encode("utf-8"), compresslevel=self.compresslevel, mtime=0)
+        with self._lock:
+            if not self._checked_tail:
+                self._truncate_torn_tail()
+                self._checked_tail = True
+            with open(self.path, "ab") as f:
+                f.write(member)
+                f.flush()
+                os.fsync(f.fileno())
+        return record
+
+    def _truncate_torn_tail(self):
+        """Cut a partially written last member left by a crash, so later members stay readable"""
+        if not os.path.exists(self.path):
+            return
+        end = 0
+        with open(self.path, "rb") as f:
+            for end, _ in _members(f):
+                pass
+        if end < os.path.getsize(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(end)
+
+
+class TraceRecorder:
+    """Builds a trace from successive chat requests of one conversation"""
+
+    def __init__(self):
+        self.calls = []
+        self._messages = []
+
+    def record(self, messages, response, latency=None):
+        """Add one model call: its request messages, reply and token usage"""
+        messages = json.loads(json.dumps(list(messages), default=to_jsonable))
+        start = 0
+        for old, new in zip(self._messages, messages):
+            if old != new:
+                break
+            start += 1
+        choices = getattr(response, "choices", None) or []
+        usage = getattr(response, "usage", None)
+        self.calls.append({
+            "start": start,
+            "messages": messages[start:],
+            "response": to_jsonable(choices[0].message) if choices else None,
+            "usage": to_jsonable(usage) if usage is not None else None,
+            "latency": latency,
+        })
+        self._messages = messages
@@ -0,0 +1,259 @@
+"""
+Declarative answer validators for the queryN/validate.py files.
+
+Each query declares its expected answer once, as a spec compiled at import
+time (regexes compiled, names lower-cased):
+
+    Number(3.547, places=2)                          any number in the output rounds to the target
+    Number(35, pattern=r"\\b\\d+\\b", compare="int")     an exact integer
+    Near(["PA", "Pennsylvania"], Number(3.70))       the first alias found, then a number within 50 chars
+    Contains(["Restaurants", "Food"])                every term, case-insensitive (a set answer)
+    Ordered(["Restaurants", "Food"])                 every term, in this order (a ranked answer)
+    AllOf(check, check, ...)                         all of them, reasons from the first failure
+
+A Validator wraps a spec. Calling it returns (ok, reason) like the old
+validate() functions and prints their ✅ / ❌ lines. check() returns the
+same verdict silently. validate_many() grades a batch of stored outputs
+across processes without printing anything:
+
+    from validators import load_validators, validate_many
+    results = validate_many([("query1", text1), ("query4", text2), ...])   # [(ok, reason), ...]
+"""
+import importlib.util
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import instrumentation
+
+
+PROJECT_DIR = Path(__file__).resolve().parent
+
+
+class Outcome:
+    """Verdict of one check, plus the ✅ / ❌ lines the interactive validate() prints"""
+
+    __slots__ = ("ok", "reason", "messages")
+
+    def __init__(self, ok, reason="OK", messages=()):
+        self.ok = ok
+        self.reason = reason
+        self.messages = list(messages)
+
+
+def _fail(reason, messages=()):
+    return Outcome(False, reason, list(messages) + [f"❌ {reason}"])
+
+
+class Number:
+    """
+    Some number in the text equals `target`: compared after rounding to
+    `places` ("round"), as a `places`-decimal string ("format"), or as an
+    integer ("int"). Message templates get {value}, {target} (the rounded /
+    formatted target) and {exact} (the target as given).
+    """
+
+    def __init__(self, target, places=2, pattern=r"(\d+\.\d+)", compare="round",
+                 none_found="No number found in LLM output.",
+                 found="Found matching number: {value} ≈ {target}",
+                 mismatch="No matching number (≈ {target:.2f}) found in LLM output."):
+        if compare not in ("round", "format", "int"):
+            raise ValueError(f"unknown comparison {compare!r}")
+        self.exact = target
+        self.places = places
+        self.compare = compare
+        self.regex = re.compile(pattern)
+        self.none_found, self.found, self.mismatch = none_found, found, mismatch
+        if compare == "round":
+            self.target = round(target, places)
+        elif compare == "format":
+            self.target = f"{target:.{places}f}"
+        else:
+            self.target = int(target)
+
+    def _matches(self, token):
+        if self.compare == "int":
+            return int(token) == self.target, int(token)
+        value = float(token)
+        if self.compare == "round":
+            return round(value, self.places) == self.target, value
+        return f"{value:.{self.places}f}" == self.target, value
+
+    def check(self, text, context=None):
+        context = dict(context or {}, target=self.target, exact=self.exact)
+        seen = False
+        for match in self.regex.finditer(text):
+            seen = True
+            try:
+                ok, value = self._matches(match.group(0))
+            except ValueError:
+                continue
+            if ok:
+                return Outcome(True, "OK", [f"✅ {self.found.format(value=value, **context)}"])
+        if not seen:
+            return _fail(self.none_found.format(**context))
+        return _fail(self.mismatch.format(**context))
+
+
+class Near:
+    """
+    The first of `names` (in order, case-insensitive) occurring in the text,
+    and `number` within `window` characters from where it starts. Templates
+    get {name}, {idx} and {names}.
+    """
+
+    def __init__(self, names, number, window=50,
+                 missing="Missing name: {names}",
+                 found_name="Found name: '{name}' at position {idx}"):
+        self.names = list(names)
+        self._lowered = [n.lower() for n in self.names]
+        self.number = number
+        self.window = window
+        self.missing = missing
+        self.found_name = found_name
+
+    def check(self, text, context=None):
+        lowered = text.lower()
+        for name, name_lower in zip(self.names, self._lowered):
+            idx = lowered.find(name_lower)
+            if idx != -1:
+                context = dict(context or {}, name=name, idx=idx, names=self.names)
+                outcome = self.number.check(text[idx:idx + self.window], context)
+                outcome.messages.insert(0, f"✅ {self.found_name.format(**context)}")
+                return outcome
+        return _fail(self.missing.format(names=self.names))
+
+
+class Contains:
+    """Every term occurs, case-insensitive. `missing` gets {term} and {lower}"""
+
+    def __init__(self, terms, missing="Missing category: {lower}"):
+        self.terms = list(terms)
+        self._lowered = [t.lower() for t in self.terms]
+        self.missing = missing
+
+    def check(self, text, context=None):
+        lowered = text.lower()
+        for term, term_lower in zip(self.terms, self._lowered):
+            if term_lower not in lowered:
+                return _fail(self.missing.format(term=term, lower=term_lower))
+        return Outcome(True)
+
+
+class Ordered(Contains):
+    """Every term occurs, case-insensitive, each after the previous one"""
+
+    def __init__(self, terms, missing="Missing category: {lower}",
+                 out_of_order="Category '{term}' is out of order"):
+        super().__init__(terms, missing)
+        self.out_of_order = out_of_order
+
+    def check(self, text, context=None):
+        lowered = text.lower()
+        pos = 0
+        for term, term_lower in zip(self.terms, self._lowered):
+            idx = lowered.find(term_lower, pos)
+            if idx == -1:
+                reason = self.missing if term_lower not in lowered else self.out_of_order
+                return _fail(reason.format(term=term, lower=term_lower))
+            pos = idx + len(term_lower)
+        return Outcome(True)
+
+
+class AllOf:
+    """Every check passes, in order; `ok_message` is printed on success"""
+
+    def __init__(self, *checks, ok_message=None):
+        self.checks = checks
+        self.ok_message = ok_message
+
+    def check(self, text, context=None):
+        messages = []
+        for check in self.checks:
+            outcome = check.check(text, context)
+            messages += outcome.messages
+            if not outcome.ok:
+                return Outcome(False, outcome.reason, messages)
+        if self.ok_message:
+            messages.append(f"✅ {self.ok_message}")
+        return Outcome(True, "OK", messages)
+
+
+class Validator:
+    """A compiled answer spec with the validate(llm_output) -> (bool, str) interface"""
+
+    def __init__(self, spec, name=None):
+        self.spec = spec
+        self.name = name
+
+    def check(self, llm_output):
+        """(ok, reason) without printing"""
+        outcome = self.spec.check(llm_output)
+        return outcome.ok, outcome.reason
+
+    def __call__(self, llm_output, verbose=True):
+        with instrumentation.span("validate", "validation", validator=self.name):
+            outcome = self.spec.check(llm_output)
+        if verbose:
+            for line in outcome.messages:
+                print(line)
+        return outcome.ok, outcome.reason
+
+
+def load_validator(query_dir):
+    """The VALIDATOR declared by `query_dir`/validate.py"""
+    path = Path(query_dir) / "validate.py"
+    spec = importlib.util.spec_from_file_location(f"validate_{Path(query_dir).name}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    validator = getattr(module, "VALIDATOR", None)
+    if validator is None:
+        raise AttributeError(f"{path} does not declare a VALIDATOR")
+    validator.name = validator.name or Path(query_dir).name
+    return validator
+
+
+def load_validators(project_dir=PROJECT_DIR):
+    """{query name: Validator} for every queryN folder with a validate.py"""
+    dirs = [p for p in Path(project_dir).iterdir() if re.fullmatch(r"query\d+", p.name) and (p / "validate.py").exists()]
+    dirs.sort(key=lambda p: int(p.name[5:]))
+    return {p.name: load_validator(p) for p in dirs}
+
+
+def _check_chunk(validator, texts):
+    return [validator.check(text) for text in texts]
+
+
+def validate_many(items, validators=None, workers=None, chunk_size=2048):
+    """
+    Grade (query, llm_output) pairs silently; returns [(ok, reason)] in input
+    order. Batches of at most one chunk, or with a single worker, are graded
+    in-process; larger ones in chunks across `workers` processes (default:
+    CPU count).
+    """
+    validators = validators or load_validators()
+    items = list(items)
+    workers = workers or os.cpu_count() or 1
+    if len(items) <= chunk_size or workers == 1:
+        return [validators[query].check(text) for query, text in items]
+
+    # chunk per query so every task ships one validator and a list of texts
+    by_query = {}
+    for i, (query, text) in enumerate(items):
+        by_query.setdefault(query, []).append(i)
+    tasks = []
+    for query, positions in by_query.items():
+        for start in range(0, len(positions), chunk_size):
+            tasks.append((query, positions[start:start + chunk_size]))
+
+    results = [None] * len(items)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            (positions, pool.submit(_check_chunk, validators[query], [items[i][1] for i in positions]))
+            for query, positions in tasks
+        ]
+        for positions, future in futures:
+            for i, result in zip(positions, future.result()):
+                results[i] = result
+    return results
@@ -0,0 +1,99 @@
+"""
+Vectorized normalizer for the Yelp business `attributes` column.
+
+Raw attributes are dicts of Python-literal strings, e.g.
+    {"WiFi": "u'free'", "BikeParking": "True",
+     "BusinessParking": "{'garage': False, 'street': True, ...}", ...}
+and sometimes the whole dict arrives as its repr string. normalize_attributes()
+turns that column into one wide, typed frame in a single pass:
+
+    BikeParking                    bool      True for True / "True"
+    BusinessParking.<key>          bool      one column per key seen (garage, street, ...)
+    BusinessParking.any            bool      any BusinessParking value is True / "True"
+    has_parking                    bool      BikeParking or BusinessParking.any
+    WiFi                           category  'free' / 'paid' / 'no' / ... with the u'...' quoting removed
+    offers_wifi                    bool      WiFi is free or paid
+    BusinessAcceptsCreditCards     bool      case-insensitive "true"
+    RestaurantsPriceRange2         Int64     1-4, <NA> when missing
+
+Missing attributes count as False, matching the ground-truth scripts. Literal
+strings are parsed once per distinct value (and memoized across calls); the
+per-key conversions are pandas string ops over whole columns.
+"""
+import ast
+from functools import lru_cache
+
+import pandas as pd
+
+
+TRUE_VALUES = [True, "True"]
+PARKING_KEYS = ["garage", "street", "validated", "lot", "valet"]
+
+
+@lru_cache(maxsize=1 << 16)
+def literal_eval(text):
+    """Memoized ast.literal_eval; None when the text is not a valid literal"""
+    try:
+        return ast.literal_eval(text)
+    except Exception:
+        return None
+
+
+def parse_literals(series):
+    """
+    Map a column of dicts / literal strings to dicts ({} when unparseable),
+    evaluating each distinct string only once.
+    """
+    is_str = series.map(lambda v: isinstance(v, str))
+    codes, uniques = pd.factorize(series[is_str])
+    parsed_uniques = [literal_eval(text) for text in uniques]
+    out = pd.Series([{}] * len(series), index=series.index, dtype=object)
+    out[is_str] = [parsed_uniques[code] for code in codes]
+    is_dict = series.map(lambda v: isinstance(v, dict))
+    out[is_dict] = series[is_dict]
+    return out.map(lambda v: v if isinstance(v, dict) else {})
+
+
+def expand(dicts):
+    """Series of dicts -> frame with one object column per key (NaN where missing)"""
+    return pd.DataFrame.from_records(dicts.tolist(), index=dicts.index) if len(dicts) else \
+        pd.DataFrame(index=dicts.index)
+
+
+def column(frame, name):
+    if name in frame.columns:
+        return frame[name]
+    return pd.Series(None, index=frame.index, dtype=object)
+
+
+def normalize_wifi(wifi):
+    """"u'free'" / "'free'" / "free" -> "free" (lower-cased); <NA> when missing"""
+    lowered = wifi.astype("string").str.lower()
+    return lowered.str.replace(r"^u?'(.*)'$", r"\1", regex=True)
+
+
+def normalize_attributes(attributes):
+    """Raw `attributes` column (dicts or their repr strings) -> wide typed frame, same index"""
+    raw = expand(parse_literals(attributes))
+    out = pd.DataFrame(index=attributes.index)
+
+    out["BikeParking"] = column(raw, "BikeParking").isin(TRUE_VALUES)
+
+    parking = expand(parse_literals(column(raw, "BusinessParking")))
+    parking_keys = PARKING_KEYS + [key for key in parking.columns if key not in PARKING_KEYS]
+    for key in parking_keys:
+        out[f"BusinessParking.{key}"] = column(parking, key).isin(TRUE_VALUES)
+    out["BusinessParking.any"] = (parking.isin(TRUE_VALUES).any(axis=1) if len(parking.columns)
+                                  else pd.Series(False, index=out.index))
+    out["has_parking"] = out["BikeParking"] | out["BusinessParking.any"]
+
+    wifi = normalize_wifi(column(raw, "WiFi"))
+    out["WiFi"] = wifi.astype("category")
+    out["offers_wifi"] = wifi.isin(["free", "paid"]).fillna(False).astype(bool)
+
+    credit = column(raw, "BusinessAcceptsCreditCards").astype("string").str.lower()
+    out["BusinessAcceptsCreditCards"] = credit.eq("true").fillna(False).astype(bool)
+
+    price = pd.to_numeric(column(raw, "RestaurantsPriceRange2"), errors="coerce")
+    out["RestaurantsPriceRange2"] = price.round().astype("Int64")
+    return out
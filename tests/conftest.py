@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# the modules are flat scripts in src/query_yelp and import each other by name
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src" / "query_yelp"))
@@ -0,0 +1,137 @@
+import bson
+import duckdb
+import pandas as pd
+import pytest
+
+import bson_io
+from connections import ConnectionManager
+from federated import (Aggregate, Federation, Filter, Frame, Join, Scan, optimize, predicate_sql,
+                       predicates_mongo, prune_columns, push_filters)
+
+
+def reviews():
+    return Scan("users", "review", columns=["business_ref", "rating", "date"],
+                derive={"business_id": "replace(business_ref, 'ref_', 'id_')"})
+
+
+def businesses():
+    return Scan("biz", "business", columns=["business_id", "name", "city"])
+
+
+# ---- optimizer ----
+
+def test_filters_reach_the_scan_that_owns_the_column():
+    plan = reviews().join(businesses(), on="business_id").filter(
+        ("rating", ">=", 4), ("city", "==", "Tampa"), ("business_id", "in", ["id_1"]))
+    out = push_filters(plan)
+    assert isinstance(out, Join)
+    assert out.left.where == [("rating", ">=", 4), ("business_id", "in", ["id_1"])]
+    # a predicate on the shared inner-join key holds on both sides
+    assert out.right.where == [("city", "==", "Tampa"), ("business_id", "in", ["id_1"])]
+
+
+def test_left_join_keeps_right_side_filters_above_the_join():
+    plan = reviews().join(businesses(), on="business_id", how="left").filter(("city", "==", "Tampa"))
+    out = push_filters(plan)
+    assert isinstance(out, Filter) and out.predicates == [("city", "==", "Tampa")]
+    assert out.child.right.where == []
+
+
+def test_callable_derived_columns_are_filtered_locally():
+    scan = Scan("biz", "business", columns=["business_id"], derive={"short": lambda df: df["business_id"].str[:3]})
+    out = push_filters(scan.filter(("short", "==", "id_"), ("business_id", "!=", "x")))
+    assert isinstance(out, Filter) and out.predicates == [("short", "==", "id_")]
+    assert out.child.where == [("business_id", "!=", "x")]
+
+
+def test_filters_stay_above_aggregates():
+    plan = reviews().aggregate(["business_id"], n=("rating", "count")).filter(("n", ">", 2))
+    out = push_filters(plan)
+    assert isinstance(out, Filter) and isinstance(out.child, Aggregate)
+    assert out.child.child.where == []
+
+
+def test_prune_columns_keeps_what_the_plan_reads():
+    plan = reviews().filter(("date", ">=", "2018")).join(businesses(), on="business_id") \
+        .aggregate(["name"], avg=("rating", "mean"))
+    out = prune_columns(push_filters(plan))
+    join = out.child
+    # business_ref stays because the derived join key is computed from it
+    assert join.left.columns == ["business_ref", "rating", "date"]
+    assert join.right.columns == ["business_id", "name"]
+
+
+def test_predicate_translation():
+    params = []
+    assert predicate_sql(("a", "in", [1, 2]), params) == '"a" IN (?, ?)' and params == [1, 2]
+    assert predicate_sql(("a", "in", []), []) == "FALSE"
+    assert predicate_sql(("a", "is null"), []) == '"a" IS NULL'
+    assert predicates_mongo([("a", ">", 1), ("a", "<", 5), ("b", "not null")]) == \
+        {"a": {"$gt": 1, "$lt": 5}, "b": {"$ne": None}}
+    assert predicates_mongo([("a", ">", 1), ("a", ">", 2)]) == {"a": {"$gt": 1}, "$and": [{"a": {"$gt": 2}}]}
+    with pytest.raises(ValueError):
+        Scan("users", "review").filter(("a", "~", 1))
+
+
+# ---- execution ----
+
+REVIEWS = pd.DataFrame({
+    "business_ref": ["ref_1", "ref_1", "ref_2", "ref_3", "ref_3", "ref_3"],
+    "rating": [5, 3, 4, 2, 5, 4],
+    "date": ["2018-03-01", "2017-01-01", "2018-05-05", "2018-07-07", "2019-01-01", "2018-09-09"],
+})
+BUSINESSES = [
+    {"business_id": "id_1", "name": "Cafe", "city": "Tampa"},
+    {"business_id": "id_2", "name": "Diner", "city": "Reno"},
+    {"business_id": "id_3", "name": "Bar", "city": "Tampa"},
+]
+
+
+@pytest.fixture
+def federation(tmp_path, monkeypatch):
+    monkeypatch.setattr(bson_io, "CACHE_DIR", tmp_path / "cache")
+    con = duckdb.connect(str(tmp_path / "users.db"))
+    con.execute("CREATE TABLE review AS SELECT * FROM REVIEWS")
+    con.close()
+    (tmp_path / "dump" / "yelp_db").mkdir(parents=True)
+    with open(tmp_path / "dump" / "yelp_db" / "business.bson", "wb") as f:
+        for doc in BUSINESSES:
+            f.write(bson.encode(doc))
+    (tmp_path / "db_config.yaml").write_text(
+        "db_clients:\n"
+        "  users: {db_type: duckdb, db_path: users.db}\n"
+        "  biz: {db_type: mongo, db_name: yelp_db, dump_folder: dump/yelp_db}\n")
+    manager = ConnectionManager(tmp_path / "db_config.yaml", mongo_uri="embedded://")
+    yield Federation(manager)
+    manager.close()
+
+
+def expected(min_date="2018-01-01", city="Tampa"):
+    df = REVIEWS.assign(business_id=REVIEWS["business_ref"].str.replace("ref_", "id_"))
+    df = df[df["date"] >= min_date].merge(pd.DataFrame(BUSINESSES), on="business_id")
+    df = df[df["city"] == city]
+    out = df.groupby("name", as_index=False).agg(n=("rating", "count"), avg=("rating", "mean"))
+    return out.sort_values("name").reset_index(drop=True)
+
+
+def test_execute_matches_pandas(federation):
+    plan = reviews().join(businesses(), on="business_id") \
+        .filter(("date", ">=", "2018-01-01"), ("city", "==", "Tampa")) \
+        .aggregate(["name"], n=("rating", "count"), avg=("rating", "mean")).sort("name")
+    got = federation.execute(plan).to_pandas()
+    pd.testing.assert_frame_equal(got, expected(), check_dtype=False)
+
+
+def test_explain_shows_pushed_down_work(federation):
+    plan = reviews().join(businesses(), on="business_id") \
+        .filter(("date", ">=", "2018-01-01"), ("city", "==", "Tampa"))
+    lines = federation.explain(plan).splitlines()
+    assert lines[0].startswith("duckdb users: SELECT * FROM (SELECT") and "WHERE" in lines[0]
+    assert "yelp_db.business.find({'city': {'$eq': 'Tampa'}}" in lines[1]
+
+
+def test_frames_join_sources(federation):
+    wanted = Frame(pd.DataFrame({"business_id": ["id_3"], "tag": ["x"]}), name="wanted")
+    plan = businesses().join(wanted, on="business_id")
+    got = federation.execute(optimize(plan)).to_pandas()
+    assert got[["name", "tag"]].values.tolist() == [["Bar", "x"]]
@@ -0,0 +1,95 @@
+import importlib.util
+import sys
+import types
+
+import pandas as pd
+import pytest
+
+from journal import RunJournal
+from sweep import Cell
+
+if importlib.util.find_spec("common_scaffold") is None:
+    # the agent scaffold is not in this repo; the resume helpers never call it
+    scaffold = types.ModuleType("common_scaffold.agent_tools")
+    scaffold.run_baseline_agent = None
+    sys.modules.setdefault("common_scaffold", types.ModuleType("common_scaffold"))
+    sys.modules.setdefault("common_scaffold.agent_tools", scaffold)
+
+from run_experiments import cell_outcomes, legacy_results, results_from_journal  # noqa: E402
+
+K = [1, 5]
+
+
+def test_replay_round_trip_and_later_record_wins(tmp_path):
+    journal = RunJournal(tmp_path / "runs.journal.jsonl")
+    journal.append(model="m", description="d", query_id="query1", run_id=1, success=False)
+    journal.append(model="m", description="d", query_id="query1", run_id=2, success=True)
+    journal.append(model="m", description="d", query_id="query1", run_id=1, success=True)
+    records = RunJournal(journal.path).replay()
+    assert [(r["run_id"], r["success"]) for r in records] == [(2, True), (1, True)]
+
+
+def test_torn_tail_is_ignored_and_terminated_on_append(tmp_path):
+    path = tmp_path / "runs.journal.jsonl"
+    journal = RunJournal(path)
+    journal.append(query_id="query1", run_id=1, success=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"query_id": "query1", "run_id": 2, "succ')  # crash mid-write
+    assert len(RunJournal(path).replay()) == 1
+
+    RunJournal(path).append(query_id="query1", run_id=3, success=False)
+    assert [r["run_id"] for r in RunJournal(path).replay()] == [1, 3]
+
+
+def test_defaults_match_pre_sweep_records(tmp_path):
+    journal = RunJournal(tmp_path / "runs.journal.jsonl", defaults={"model": "m", "description": "wh"})
+    journal.append(query_id="query1", run_id=1, success=False)  # written before sweeps existed
+    journal.append(model="m", description="wh", query_id="query1", run_id=1, success=True)
+    records = journal.replay()
+    assert len(records) == 1 and records[0]["success"] is True
+
+
+def test_cell_outcomes_resume_skips_runs_beyond_n():
+    records = [
+        {"query_id": "query1", "run_id": 1, "success": True},
+        {"model": "m", "description": "wh", "query_id": "query1", "run_id": 2, "success": False},
+        {"model": "m", "description": "wh", "query_id": "query1", "run_id": 9, "success": True},
+        {"model": "other", "description": "wh", "query_id": "query1", "run_id": 1, "success": True},
+    ]
+    outcomes = cell_outcomes(records, 5, "m", "wh")
+    assert outcomes == {Cell("m", "wh", "query1"): {1: True, 2: False},
+                        Cell("other", "wh", "query1"): {1: True}}
+
+
+def save_single_cell(df, path):
+    """What run_experiments.save_results writes for a one-model, one-description sweep"""
+    df.drop(columns=["model", "description"]).to_csv(path, index=False)
+
+
+def test_legacy_rows_survive_restarts(tmp_path):
+    # query1 finished before the journal existed: it only lives in the CSV
+    path = tmp_path / "results.csv"
+    pd.DataFrame([{"query_id": "query1", "n": 7, "c": 3, "pass@1": 3 / 7, "pass@5": 0.99}]).to_csv(path, index=False)
+    cells = [Cell("m", "wh", "query1"), Cell("m", "wh", "query2")]
+    outcomes = {cells[1]: {1: True, 2: False}}
+
+    for _ in range(3):  # every start reads the CSV the previous one wrote
+        legacy = legacy_results(path, cells, outcomes, "m", "wh")
+        assert set(legacy) == {cells[0]}
+        df = results_from_journal(outcomes, cells, {cells[1]}, K, legacy)
+        save_single_cell(df, path)
+
+    df = pd.read_csv(path).set_index("query_id")
+    assert list(df.index) == ["query1", "query2", "Overall"]
+    assert df.loc["query1", "n"] == 7 and df.loc["query1", "pass@1"] == pytest.approx(3 / 7)
+    assert df.loc["query2", "pass@1"] == pytest.approx(0.5)
+    assert df.loc["Overall", "pass@1"] == pytest.approx((3 / 7 + 0.5) / 2)
+
+
+def test_journaled_runs_replace_a_legacy_row(tmp_path):
+    path = tmp_path / "results.csv"
+    pd.DataFrame([{"query_id": "query1", "n": 7, "c": 3, "pass@1": 3 / 7, "pass@5": 0.99}]).to_csv(path, index=False)
+    cells = [Cell("m", "wh", "query1")]
+    outcomes = {cells[0]: {1: True}}
+    assert legacy_results(path, cells, outcomes, "m", "wh") == {}
+    assert legacy_results(tmp_path / "missing.csv", cells, {}, "m", "wh") == {}
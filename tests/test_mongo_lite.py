@@ -0,0 +1,111 @@
+import bson
+import pytest
+
+import bson_io
+from mongo_lite import EmbeddedClient, matches, normalize_projection, project
+
+DOC = {
+    "_id": 1,
+    "name": "Cafe",
+    "stars": 4.5,
+    "review_count": 12,
+    "closed": None,
+    "categories": ["Food", "Coffee & Tea"],
+    "scores": [2, 7],
+    "address": {"city": "Indianapolis", "state": "IN"},
+}
+
+
+@pytest.mark.parametrize("query, expected", [
+    ({}, True),
+    ({"name": "Cafe"}, True),
+    ({"name": "cafe"}, False),
+    ({"stars": {"$gt": 4, "$lte": 4.5}}, True),
+    ({"stars": {"$lt": 4.5}}, False),
+    ({"name": {"$gt": 3}}, False),                        # mismatched types never compare
+    ({"missing": None}, True),                            # null matches a missing field
+    ({"closed": None}, True),
+    ({"closed": {"$exists": True}}, True),
+    ({"missing": {"$exists": False}}, True),
+    ({"missing": {"$gt": 0}}, False),
+    ({"name": {"$in": ["Bar", "Cafe"]}}, True),
+    ({"name": {"$nin": ["Bar", "Cafe"]}}, False),
+    ({"name": {"$ne": "Bar"}}, True),
+    ({"name": {"$regex": "^ca", "$options": "i"}}, True),
+    ({"name": {"$regex": "^ca"}}, False),
+    ({"address.city": "Indianapolis"}, True),
+    ({"address.zip": {"$exists": True}}, False),
+    ({"address": {"city": "Indianapolis", "state": "IN"}}, True),
+    ({"$or": [{"name": "Bar"}, {"stars": 4.5}]}, True),
+    ({"$and": [{"name": "Cafe"}, {"stars": 3}]}, False),
+    ({"$nor": [{"name": "Bar"}]}, True),
+])
+def test_scalar_operators(query, expected):
+    assert matches(DOC, query) is expected
+
+
+@pytest.mark.parametrize("query, expected", [
+    ({"categories": "Food"}, True),                        # any element
+    ({"categories": ["Food", "Coffee & Tea"]}, True),      # or the whole array
+    ({"categories": ["Coffee & Tea", "Food"]}, False),
+    ({"categories": {"$eq": "Food"}}, True),
+    ({"categories": {"$in": ["Bars", "Food"]}}, True),
+    ({"categories": {"$in": ["Bars"]}}, False),
+    ({"categories": {"$nin": ["Food"]}}, False),          # no element may match
+    ({"categories": {"$nin": ["Bars"]}}, True),
+    ({"categories": {"$ne": "Food"}}, False),
+    ({"categories": {"$regex": "^Coffee"}}, True),
+    ({"scores": {"$gt": 5}}, True),
+    ({"scores": {"$gt": 7}}, False),
+    ({"scores": {"$gt": 1, "$lt": 3}}, True),             # each condition by any element
+])
+def test_array_fields_match_any_element(query, expected):
+    assert matches(DOC, query) is expected
+
+
+@pytest.mark.parametrize("query", [
+    {"name": {"$size": 2}},
+    {"missing": {"$elemMatch": {"a": 1}}},               # raised even though the field is missing
+    {"closed": {"$type": "null"}},
+    {"$where": "true"},
+])
+def test_unsupported_operators_raise(query):
+    with pytest.raises(NotImplementedError):
+        matches(DOC, query)
+
+
+def test_projections():
+    assert project(DOC, *normalize_projection({"name": 1, "address.city": 1})) == {
+        "_id": 1, "name": "Cafe", "address": {"city": "Indianapolis"}}
+    assert project(DOC, *normalize_projection(["name", "_id"])) == {"_id": 1, "name": "Cafe"}
+    assert set(project(DOC, *normalize_projection({"categories": 0, "_id": 0}))) == set(DOC) - {"categories", "_id"}
+    with pytest.raises(ValueError):
+        normalize_projection({"name": 1, "stars": 0})
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(bson_io, "CACHE_DIR", tmp_path / "cache")
+    (tmp_path / "yelp_db").mkdir()
+    docs = [
+        {"_id": 1, "business_id": "b1", "city": "Indianapolis", "categories": ["Food", "Bars"]},
+        {"_id": 2, "business_id": "b2", "city": "Tampa", "categories": ["Food"]},
+        {"_id": 3, "business_id": "b3", "city": "Indianapolis", "categories": []},
+    ]
+    with open(tmp_path / "yelp_db" / "business.bson", "wb") as f:
+        for doc in docs:
+            f.write(bson.encode(doc))
+    client = EmbeddedClient(tmp_path)
+    yield client
+    client.close()
+
+
+def test_collection_queries(client):
+    business = client["yelp_db"]["business"]
+    assert business.count_documents({}) == 3
+    assert business.count_documents({"city": "Indianapolis"}) == 2
+    assert business.find_one({"business_id": "b2"}, {"city": 1, "_id": 0}) == {"city": "Tampa"}
+    assert [d["_id"] for d in business.find({"business_id": {"$in": ["b3", "b1"]}})] == [1, 3]
+    assert [d["_id"] for d in business.find({"categories": "Bars"})] == [1]
+    assert business.distinct("categories", {"city": "Indianapolis"}) == ["Food", "Bars"]
+    assert [d["_id"] for d in business.find().skip(1).limit(1)] == [2]
@@ -0,0 +1,73 @@
+from math import comb
+
+import numpy as np
+import pytest
+
+from passk import bootstrap_pass_at_k, pass_at_k, pass_at_k_matrix, score_journal
+
+K = [1, 2, 5, 10, 20, 50]
+
+
+def exact(n, c, k):
+    """Definition of pass@k: 1 - C(n - c, k) / C(n, k)"""
+    return 1 - comb(n - c, k) / comb(n, k)
+
+
+def test_scalar_matches_the_definition():
+    for n in (1, 5, 20, 50):
+        for c in range(n + 1):
+            for k in (k for k in K if k <= n):
+                assert pass_at_k(n, c, k) == pytest.approx(exact(n, c, k), abs=1e-12)
+
+
+def test_matrix_matches_scalar_elementwise():
+    rng = np.random.default_rng(0)
+    n = rng.integers(1, 120, size=300)
+    c = rng.integers(0, n + 1)
+    out = pass_at_k_matrix(n, c, K)
+    assert out.shape == (300, len(K))
+    expected = [[pass_at_k(int(ni), int(ci), k) for k in K] for ni, ci in zip(n, c)]
+    np.testing.assert_allclose(out, expected, atol=1e-12)
+
+
+def test_matrix_edge_cells():
+    out = pass_at_k_matrix([10, 10, 10, 3, 0], [0, 10, 9, 1, 0], [1, 2, 5])
+    np.testing.assert_allclose(out[0], 0.0)
+    np.testing.assert_allclose(out[1], 1.0)
+    np.testing.assert_allclose(out[2], [0.9, 1.0, 1.0])
+    # k > n falls back to the plug-in estimate, like the scalar version
+    assert out[3, 2] == pytest.approx(pass_at_k(3, 1, 5))
+    assert np.isnan(out[4]).all()
+
+
+def test_matrix_broadcasts_and_validates():
+    assert pass_at_k_matrix(np.full((2, 3), 10), 4, [1, 5]).shape == (2, 3, 2)
+    with pytest.raises(ValueError):
+        pass_at_k_matrix([5], [6], [1])
+
+
+def test_bootstrap_brackets_the_estimate_and_is_seeded():
+    n, c = [20, 20, 20], [2, 10, 18]
+    per_cell, overall = bootstrap_pass_at_k(n, c, [1, 5], n_boot=500, seed=1)
+    assert (per_cell.lower <= per_cell.estimate + 1e-12).all()
+    assert (per_cell.estimate <= per_cell.upper + 1e-12).all()
+    assert overall.lower[0] <= overall.estimate[0] <= overall.upper[0]
+    again, _ = bootstrap_pass_at_k(n, c, [1, 5], n_boot=500, seed=1)
+    np.testing.assert_array_equal(per_cell.lower, again.lower)
+
+
+def test_score_journal_adds_an_overall_row_per_block():
+    records = []
+    for model, successes in (("a", [1, 1, 0, 0]), ("b", [1, 0, 0, 0])):
+        for query in ("query1", "query2"):
+            for run_id, ok in enumerate(successes, 1):
+                records.append({"model": model, "query_id": query, "run_id": run_id, "success": bool(ok)})
+    df = score_journal(records, [1, 2])
+    assert list(zip(df["model"], df["query_id"])) == [
+        ("a", "query1"), ("a", "query2"), ("a", "Overall"),
+        ("b", "query1"), ("b", "query2"), ("b", "Overall"),
+    ]
+    a = df[df["model"] == "a"].set_index("query_id")
+    assert a.loc["query1", "pass@1"] == pytest.approx(pass_at_k(4, 2, 1))
+    assert a.loc["Overall", "pass@2"] == pytest.approx(pass_at_k(4, 2, 2))
+    assert df.set_index(["model", "query_id"]).loc[("b", "Overall"), "pass@1"] == pytest.approx(0.25)
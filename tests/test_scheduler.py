@@ -0,0 +1,207 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import scheduler
+from scheduler import RateLimitedClient, TokenBucket, is_retryable, run_jobs
+
+
+class FakeClock:
+    """Stands in for the time module: sleep() advances the clock instead of blocking"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    perf_counter = monotonic
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += max(seconds, 1e-9)  # like a real clock, always moves forward
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(scheduler, "time", clock)
+    monkeypatch.setattr(scheduler.random, "uniform", lambda a, b: 1.0)  # no jitter
+    return clock
+
+
+class APIError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class FlakyClient:
+    """chat.completions.create raises the queued errors, then answers "ok" """
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+# ---- TokenBucket ----
+
+def test_bucket_allows_a_burst_then_paces_at_rate(clock):
+    bucket = TokenBucket(rate=2, capacity=3)
+    for _ in range(3):
+        bucket.acquire()
+    assert clock.sleeps == []
+    start = clock.now
+    for _ in range(4):
+        bucket.acquire()
+    assert clock.now - start == pytest.approx(2.0)
+
+
+def test_bucket_refills_while_idle_up_to_capacity(clock):
+    bucket = TokenBucket(rate=1, capacity=2)
+    bucket.acquire()
+    bucket.acquire()
+    clock.now += 10  # would be 10 tokens without the cap
+    for _ in range(2):
+        bucket.acquire()
+    assert clock.sleeps == []
+    bucket.acquire()
+    assert clock.sleeps == [pytest.approx(1.0)]
+
+
+def test_backoff_blocks_then_restarts_empty(clock):
+    bucket = TokenBucket(rate=2, capacity=5)
+    start = clock.now
+    bucket.backoff(5)
+    bucket.acquire()
+    assert clock.now - start == pytest.approx(5.5)
+
+
+def test_backoff_never_shortens_an_earlier_one(clock):
+    bucket = TokenBucket(rate=10, capacity=1)
+    start = clock.now
+    bucket.backoff(5)
+    bucket.backoff(1)
+    bucket.acquire()
+    assert clock.now - start == pytest.approx(5.1)
+
+
+def test_bucket_rejects_non_positive_rate():
+    with pytest.raises(ValueError):
+        TokenBucket(0)
+    assert TokenBucket.per_minute(120).rate == 2.0
+
+
+# ---- retries ----
+
+def test_is_retryable():
+    assert is_retryable(APIError(429))
+    assert is_retryable(APIError(503))
+    assert not is_retryable(APIError(400))
+    assert not is_retryable(ValueError("bad"))
+    assert is_retryable(type("APITimeoutError", (Exception,), {})())
+
+
+def test_retries_back_off_exponentially(clock):
+    client = FlakyClient([APIError(429), APIError(500), APIError(429)])
+    wrapped = RateLimitedClient(client, base_delay=1.0, max_delay=60.0)
+    assert wrapped.chat.completions.create(model="m", messages=[]) == "ok"
+    assert client.calls == 4
+    assert clock.sleeps == [1.0, 2.0, 4.0]
+
+
+def test_backoff_is_capped_at_max_delay(clock):
+    client = FlakyClient([APIError(429)] * 3)
+    wrapped = RateLimitedClient(client, base_delay=10.0, max_delay=15.0)
+    wrapped.chat.completions.create(model="m", messages=[])
+    assert clock.sleeps == [10.0, 15.0, 15.0]
+
+
+def test_non_retryable_error_is_raised_at_once(clock):
+    client = FlakyClient([APIError(400)])
+    wrapped = RateLimitedClient(client)
+    with pytest.raises(APIError):
+        wrapped.chat.completions.create(model="m", messages=[])
+    assert client.calls == 1
+    assert clock.sleeps == []
+
+
+def test_gives_up_after_max_retries(clock):
+    client = FlakyClient([APIError(429)] * 10)
+    wrapped = RateLimitedClient(client, max_retries=2, base_delay=1.0)
+    with pytest.raises(APIError):
+        wrapped.chat.completions.create(model="m", messages=[])
+    assert client.calls == 3
+    assert clock.sleeps == [1.0, 2.0]
+
+
+def test_backoff_pauses_the_shared_bucket(clock):
+    bucket = TokenBucket(rate=1, capacity=1)
+    client = FlakyClient([APIError(429)])
+    wrapped = RateLimitedClient(client, bucket=bucket, base_delay=3.0)
+    start = clock.now
+    wrapped.chat.completions.create(model="m", messages=[])
+    # first token is free, then the 3 s backoff and one token's refill time
+    assert clock.now - start == pytest.approx(4.0)
+
+
+# ---- run_jobs ----
+
+def test_run_jobs_pulls_lazily_and_reports_in_order():
+    pulled, seen = [], []
+
+    def jobs():
+        for i in range(4):
+            pulled.append(i)
+            yield i
+
+    def on_result(job, result):
+        assert pulled == list(range(job + 1))  # the next job is pulled only after this callback
+        seen.append(result)
+
+    run_jobs(jobs(), lambda i: i * 10, max_in_flight=1, on_result=on_result)
+    assert seen == [0, 10, 20, 30]
+
+
+def test_run_jobs_on_error_keeps_going():
+    results, errors = [], []
+
+    def worker(i):
+        if i == 1:
+            raise RuntimeError("boom")
+        return i
+
+    run_jobs(range(4), worker, max_in_flight=2,
+             on_result=lambda job, r: results.append(r), on_error=lambda job, e: errors.append(job))
+    assert sorted(results) == [0, 2, 3]
+    assert errors == [1]
+
+
+def test_run_jobs_without_on_error_drains_then_raises():
+    started, results = [], []
+
+    def worker(i):
+        started.append(i)
+        if i == 0:
+            raise RuntimeError("boom")
+        time.sleep(0.2)  # still running when job 0 fails
+        return i
+
+    with pytest.raises(RuntimeError, match="boom"):
+        run_jobs(iter(range(4)), worker, max_in_flight=2, on_result=lambda job, r: results.append(r))
+    assert results == [1]
+    assert sorted(started) == [0, 1]
+
+
+def test_run_jobs_rejects_zero_concurrency():
+    with pytest.raises(ValueError):
+        run_jobs([1], lambda i: i, max_in_flight=0)
@@ -0,0 +1,88 @@
+import importlib.util
+import random
+import re
+from pathlib import Path
+
+import pytest
+
+from validators import load_validators, validate_many
+
+LEGACY_DIR = Path(__file__).resolve().parent / "legacy_validators"
+QUERIES = [f"query{i}" for i in range(1, 8)]
+FILLER = ["The answer is", "approximately", "rating", "average", "state", "category", "N/A", "~", "about",
+          "and", "then", "(", ")", "1.0", "0", "2019", "12.5", "-", "**", "100%"]
+
+
+def load_legacy(query):
+    """validate() of the per-query file the declarative spec replaced (kept verbatim in legacy_validators/)"""
+    spec = importlib.util.spec_from_file_location(f"legacy_{query}", LEGACY_DIR / f"{query}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.validate
+
+
+def vocabulary(query):
+    """Answer fragments of one query: its string literals, its numbers and near misses of them"""
+    source = (LEGACY_DIR / f"{query}.py").read_text(encoding="utf-8")
+    words = [s for s in re.findall(r'"([^"{}\n]{1,40})"', source) if s not in ("OK",)]
+    numbers = ["3.5", "4", "12.25"]
+    for literal in re.findall(r"\b\d+\.\d+|\b\d+\b", source):
+        value = float(literal)
+        numbers += [f"{value:.{places}f}" for places in range(0, 5)]
+        numbers += [f"{value + delta:.2f}" for delta in (-0.01, -0.005, 0.004, 0.006, 0.01)]
+    return words, numbers
+
+
+def corpus(query, size=400, seed=0):
+    rng = random.Random(f"{seed}:{query}")
+    words, numbers = vocabulary(query)
+    texts = ["", " ", "nothing useful"]
+    for _ in range(size // 10):  # every fragment once, in source order and shuffled, so full answers occur
+        parts = words + [rng.choice(numbers)]
+        texts.append(", ".join(parts))
+        rng.shuffle(parts)
+        texts.append(" ".join(parts))
+    for _ in range(size):
+        parts = []
+        for _ in range(rng.randint(1, 8)):
+            kind = rng.random()
+            if kind < 0.4:
+                part = rng.choice(words)
+                part = rng.choice([part, part.lower(), part.upper(), part[:-1]])
+            elif kind < 0.75:
+                part = rng.choice(numbers)
+            else:
+                part = rng.choice(FILLER)
+            parts.append(part)
+            parts.append(rng.choice([" ", ", ", "\n", ": ", "", " " * rng.randint(20, 60)]))
+        texts.append("".join(parts))
+    return texts
+
+
+@pytest.fixture(scope="module")
+def validators():
+    return load_validators()
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_declarative_validator_matches_the_old_one(query, validators, capsys):
+    legacy = load_legacy(query)
+    validator = validators[query]
+    passed = 0
+    for text in corpus(query):
+        expected = legacy(text)
+        expected_out = capsys.readouterr().out
+        got = validator(text)
+        got_out = capsys.readouterr().out
+        assert got == expected, text
+        assert got_out == expected_out, text
+        assert validator.check(text) == expected
+        passed += expected[0]
+    assert passed > 0  # the corpus exercises the success path too
+
+
+def test_validate_many_matches_single_checks(validators):
+    items = [(query, text) for query in QUERIES for text in corpus(query, size=50, seed=1)]
+    expected = [validators[query].check(text) for query, text in items]
+    assert validate_many(items, validators, workers=1) == expected
+    assert validate_many(items, validators, workers=2, chunk_size=64) == expected